@@ -3,6 +3,14 @@ ASGI config for eco_prom project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Jonli yangilanishlar (/orders/api/live/, server-sent events) uzoq ochiq
+turadigan ulanishlar, shuning uchun ularni ASGI server orqali ishga tushiring:
+
+    uvicorn eco_prom.asgi:application --workers 1
+
+Bir nechta worker/jarayon ishlatilsa, settings.LIVE_BROKER ni
+'orders.live.RedisBroker' ga o'zgartiring.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
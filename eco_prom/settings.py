@@ -38,10 +38,21 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'orders.roles.GroupNamesMiddleware',
+    'orders.audit.AuditActorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Foydalanuvchi guruhlarini so'rovlar orasida keshlash (soniya). 0 - faqat so'rov ichida.
+# Bir nechta jarayonda ishlatilsa umumiy kesh (Redis/Memcached) sozlanishi kerak.
+ROLE_CACHE_TIMEOUT = 0
+
+# Skaner kodlari keshi (orders/material_lookup.py, har bir jarayonda alohida)
+MATERIAL_LOOKUP_CACHE_SIZE = 2048
+MATERIAL_LOOKUP_TTL = 300       # topilgan kod (soniya); boshqa jarayondagi o'zgarishlar shundan keyin ko'rinadi
+MATERIAL_LOOKUP_MISS_TTL = 5    # topilmagan kod (soniya)
+
 ROOT_URLCONF = 'eco_prom.urls'
 
 TEMPLATES = [
@@ -65,6 +76,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Parallel oqimli testlar uchun faylli test bazasi (xotiradagi umumiy
+        # kesh rejimida ikkinchi yozuvchi kutmasdan "table is locked" oladi)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -118,3 +132,18 @@ LOGIN_REDIRECT_URL = '/orders/'
 
 # Tizimdan chiqish (logout) amali bajarilgandan so'ng /login/ sahifasiga qaytarish.
 LOGOUT_REDIRECT_URL = '/login/'
+
+# =======================================================
+# 📨 TELEGRAM (xabarlar TelegramOutbox orqali, `manage.py run_outbox` yuboradi)
+# =======================================================
+# Token va chat ID faqat muhit o'zgaruvchilaridan olinadi; bo'sh bo'lsa run_outbox hech narsa yubormaydi
+TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID', '')
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', "https://api.telegram.org")
+
+# =======================================================
+# 📡 JONLI YANGILANISHLAR (SSE, orders/live.py)
+# =======================================================
+# Bir nechta jarayon/server bo'lsa: 'orders.live.RedisBroker' va LIVE_REDIS_URL
+LIVE_BROKER = os.environ.get('LIVE_BROKER', 'orders.live.InProcessBroker')
+LIVE_REDIS_URL = os.environ.get('LIVE_REDIS_URL', 'redis://localhost:6379/0')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, Notification, Worker
+from .models import Order, Notification, TelegramOutbox, Worker
 
 # -----------------------------------
 # 1. ORDER ADMINI
@@ -48,4 +48,14 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ('user', 'order', 'message', 'is_read', 'created_at')
     list_filter = ('is_read', 'created_at')
     search_fields = ('user__username', 'message', 'order__order_number')
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+# -----------------------------------
+# 4. TELEGRAM NAVBATI (Outbox)
+# -----------------------------------
+@admin.register(TelegramOutbox)
+class TelegramOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'method', 'chat_id', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'method')
+    search_fields = ('text', 'last_error')
+    date_hierarchy = 'created_at'
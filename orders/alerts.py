@@ -0,0 +1,82 @@
+# orders/alerts.py
+"""
+Muddat buzilishi ogohlantirishlari (run_overdue_alerts buyrug'i uchun).
+
+Yangi muddati o'tgan buyurtmalar bitta so'rov bilan topiladi, har bir
+buyurtma uchun admin guruhlariga bitta guruh xabari yoziladi (adminlar
+soniga qarab ko'paymaydi) va `deadline_breach_alert_sent` bitta
+UPDATE ... WHERE id IN (...) bilan belgilanadi. Sahifalar (order_list)
+endi hech narsa yozmaydi.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import MAIN_Q
+from .models import Order
+from .notifications import create_group_notifications
+
+# Hali ishlab chiqarishda bo'lgan (yopilmagan) statuslar
+ALERT_STATUSES = ['KIRITILDI', 'TASDIQLANDI', 'USTA_QABUL_QILDI', 'USTA_BOSHLA', 'ISHDA']
+# Superuserlar 'Glavniy Admin' xabarlarini guruhda bo'lmasa ham oladi
+ALERT_GROUPS = ['Glavniy Admin', "Ishlab Chiqarish Boshlig'i"]
+
+BATCH_SIZE = 500
+
+
+def breach_message(order):
+    return (
+        f"🚨 URGENT: Buyurtma #{order.order_number} ning muddati "
+        f"{timezone.localtime(order.deadline).strftime('%d-%m %H:%M')} da O'TIB KETDI. "
+        f"Status: {order.get_status_display()}."
+    )
+
+
+def create_overdue_alerts(orders):
+    """
+    Berilgan buyurtmalar uchun adminlar guruhlariga xabar yozadi va ularni
+    "yuborilgan" deb belgilaydi. Yaratilgan xabarlar sonini qaytaradi.
+    """
+    orders = [order for order in orders if order.deadline]
+    if not orders:
+        return 0
+
+    with transaction.atomic():
+        created, _ = create_group_notifications(
+            [(order, breach_message(order)) for order in orders], ALERT_GROUPS, batch_size=BATCH_SIZE,
+        )
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(deadline_breach_alert_sent=True)
+
+    for order in orders:
+        order.deadline_breach_alert_sent = True
+    return len(created)
+
+
+def pending_breaches(now=None):
+    """Muddati o'tgan, hali ogohlantirilmagan asosiy buyurtmalar."""
+    now = now or timezone.now()
+    return Order.objects.filter(
+        MAIN_Q,
+        deadline__lt=now,
+        status__in=ALERT_STATUSES,
+        deadline_breach_alert_sent=False,
+    ).order_by('deadline')
+
+
+def process_overdue_orders(now=None, batch_size=BATCH_SIZE):
+    """
+    Bir marta tekshirish: yangi muddati o'tganlarni partiyalab ogohlantiradi.
+    (buyurtmalar soni, xabarlar soni) qaytaradi.
+    """
+    order_count = notification_count = 0
+
+    while True:
+        with transaction.atomic():
+            batch = list(pending_breaches(now).select_for_update()[:batch_size])
+            if not batch:
+                break
+            notification_count += create_overdue_alerts(batch)
+            order_count += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    return order_count, notification_count
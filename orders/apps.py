@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        # Signal qabul qiluvchilarni ro'yxatdan o'tkazish
+        from . import audit, catalog, customers, live, material_lookup, notifications, roles, rollups, search  # noqa: F401
@@ -0,0 +1,134 @@
+# orders/audit.py
+"""
+Buyurtmalar jurnali (OrderAuditEvent).
+
+Order yaratilganda, statusi o'zgarganda va o'chirilganda jurnalga bitta
+qator yoziladi (post_save / post_delete). Shuning uchun status o'zgartiruvchi
+barcha viewlar (menejer, usta, ombor, qorovul) alohida kod yozmasdan
+jurnalga tushadi. Amalni bajargan foydalanuvchi AuditActorMiddleware
+so'rov boshida qo'yadigan kontekst o'zgaruvchisidan olinadi; so'rovdan
+tashqarida (buyruqlar, testlar) `acting_as(user)` ishlatiladi.
+
+Signal yubormaydigan ommaviy o'zgarishlar (orders.chain: bulk_create,
+queryset.update) `record_events` ni o'zlari chaqiradi.
+
+Jurnal sahifasi (orders.views.product_audit_log_view) kursor bilan
+sahifalanadi; eski LogEntry yozuvlari `manage.py backfill_order_audit`
+bilan ko'chiriladi.
+"""
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .dashboard import date_range_q
+from .models import Order, OrderAuditEvent
+
+_current_actor = ContextVar('order_audit_actor', default=None)
+
+# LogEntry.change_message dagi "Status o'zgartirildi: KIRITILDI -> TASDIQLANDI"
+STATUS_CHANGE_RE = re.compile(r'\b([A-Z_]{3,})\s*->\s*([A-Z_]{3,})\b')
+
+
+def current_actor():
+    return _current_actor.get()
+
+
+@contextmanager
+def acting_as(user):
+    """Blok ichida yozilgan jurnal yozuvlari shu foydalanuvchi nomidan."""
+    token = _current_actor.set(user)
+    try:
+        yield
+    finally:
+        _current_actor.reset(token)
+
+
+class AuditActorMiddleware:
+    """Kirgan foydalanuvchini so'rov davomida jurnal uchun eslab qoladi."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        with acting_as(user if user is not None and user.is_authenticated else None):
+            return self.get_response(request)
+
+
+# ======================== YOZISH ========================
+
+def build_event(order, action, from_status='', to_status='', message='', actor=None):
+    """Saqlanmagan OrderAuditEvent (bulk_create uchun)."""
+    actor = actor if actor is not None else current_actor()
+    return OrderAuditEvent(
+        order=order,
+        order_number=order.order_number or '',
+        actor_id=actor.pk if actor is not None else None,
+        action=action,
+        from_status=from_status or '',
+        to_status=to_status or '',
+        message=message,
+    )
+
+
+def record_events(events):
+    return OrderAuditEvent.objects.bulk_create(events)
+
+
+def record_created(orders, message=''):
+    """bulk_create qilingan buyurtmalar uchun (signal yuborilmaydi)."""
+    return record_events([build_event(order, 'CREATE', to_status=order.status, message=message) for order in orders])
+
+
+def record_transitions(changes, message=''):
+    """changes: (buyurtma, eski status) juftliklari - queryset.update() dan keyin."""
+    return record_events([
+        build_event(order, 'STATUS', from_status=old_status, to_status=order.status, message=message)
+        for order, old_status in changes
+        if old_status != order.status
+    ])
+
+
+# ======================== O'QISH ========================
+
+def filter_events(params):
+    """
+    Jurnal sahifasi va eksport uchun umumiy filtrlar (GET parametrlari):
+    q - buyurtma raqami, action, status (yangi status), actor (username),
+    start_date / end_date (sana obyektlari).
+    """
+    events = OrderAuditEvent.objects.select_related('actor')
+    q = (params.get('q') or '').strip()
+    if q:
+        events = events.filter(order_number__icontains=q)
+    if params.get('action'):
+        events = events.filter(action=params['action'])
+    if params.get('status'):
+        events = events.filter(to_status=params['status'])
+    if params.get('actor'):
+        events = events.filter(actor__username=params['actor'])
+    return events.filter(date_range_q(params.get('start_date'), params.get('end_date')))
+
+
+# ======================== SIGNALLAR ========================
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        record_events([build_event(instance, 'CREATE', to_status=instance.status)])
+    elif (update_fields is None or 'status' in update_fields) and instance.has_changed('status'):
+        old_status = instance.previous('status') if instance.is_tracked('status') else ''
+        record_events([build_event(instance, 'STATUS', from_status=old_status, to_status=instance.status)])
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    event = build_event(instance, 'DELETE', from_status=instance.status)
+    # Buyurtma qatori allaqachon o'chgan: FK bo'sh, raqam order_number da qoladi
+    event.order = None
+    record_events([event])
@@ -0,0 +1,102 @@
+# orders/catalog.py
+"""
+Material katalogi: kirim/chiqim sahifasi va skaner uchun materiallar ro'yxati.
+
+Katalog har bir sahifa ochilganda HTML ichiga JSON qilib yozilmaydi: brauzer
+uni bitta URL dan (orders.views.material_catalog_api) oladi va ETag bo'yicha
+keshlaydi. MaterialCatalogVersion dagi raqam Material yoki Category
+saqlanganda / o'chirilganda oshadi, o'zgargan materiallarga shu raqam
+yoziladi. Shuning uchun mijoz `?since=N` bilan faqat N dan keyin o'zgargan
+materiallarni oladi; material o'chirilgan bo'lsa (reset_version > N)
+katalog to'liq qaytariladi.
+
+Katalogda qoldiq (quantity) yo'q: u har bir kirim/chiqimda o'zgaradi
+(orders.stock, signal yubormaydi) va keshni doim eskirtirib turardi.
+Tanlangan materialning joriy qoldig'i get_material_details dan olinadi.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Category, Material, MaterialCatalogVersion
+
+CATALOG_FIELDS = ('id', 'name', 'product_name', 'code', 'unit', 'category__name')
+
+
+def current_version():
+    """(version, reset_version) - bitta SELECT."""
+    row = MaterialCatalogVersion.objects.values_list('version', 'reset_version').first()
+    return row or (0, 0)
+
+
+def bump_version(reset=False):
+    """Katalog versiyasini oshiradi va yangi raqamni qaytaradi (numbering bilan bir xil usul)."""
+    changes = {'version': F('version') + 1}
+    if reset:
+        changes['reset_version'] = F('version') + 1
+    with transaction.atomic():
+        if not MaterialCatalogVersion.objects.update(**changes):
+            try:
+                with transaction.atomic():
+                    MaterialCatalogVersion.objects.create(pk=1, version=1, reset_version=1 if reset else 0)
+            except IntegrityError:
+                MaterialCatalogVersion.objects.update(**changes)
+        return MaterialCatalogVersion.objects.values_list('version', flat=True).get()
+
+
+def catalog_etag(version, since=None):
+    return f'"materials-{version}"' if since is None else f'"materials-{version}-since-{since}"'
+
+
+def catalog_payload(version, reset_version, since=None):
+    """
+    Katalog JSON i. since berilmasa yoki undan keyin material o'chirilgan bo'lsa -
+    to'liq ro'yxat (full=True), aks holda faqat o'zgarganlar.
+    """
+    full = since is None or since < reset_version
+    materials = Material.objects.order_by('id')
+    if not full:
+        materials = materials.filter(catalog_version__gt=since)
+    return {
+        'success': True,
+        'version': version,
+        'full': full,
+        'materials': [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'product_name': row['product_name'] or '',
+                'code': row['code'] or '',
+                'unit': row['unit'],
+                'category': row['category__name'] or 'Kategoriyasiz',
+            }
+            for row in materials.values(*CATALOG_FIELDS)
+        ],
+    }
+
+
+# ======================== SIGNALLAR ========================
+
+@receiver(post_save, sender=Material)
+def material_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    version = bump_version()
+    Material.objects.filter(pk=instance.pk).update(catalog_version=version)
+    instance.catalog_version = version
+
+
+@receiver(post_delete, sender=Material)
+def material_deleted(sender, instance, **kwargs):
+    bump_version(reset=True)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    # Nomi o'zgarsa yoki o'chirilsa (materiallarda SET_NULL) - shu kategoriyadagi materiallar o'zgargan
+    if raw:
+        return
+    version = bump_version()
+    Material.objects.filter(category=instance).update(catalog_version=version)
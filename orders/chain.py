@@ -0,0 +1,152 @@
+# orders/chain.py
+"""
+Ishlab chiqarish zanjiri: LIST / ESHIK -> PANEL -> UGOL.
+
+Usta ishini yakunlaganda (status USTA_TUGATDI) keyingi bosqich uchun
+child buyurtma ochiladi, shu bosqich ustalari biriktiriladi va ularga
+bildirishnoma yoziladi. `spawn_next_stage` buni istalgan sondagi
+buyurtma uchun bitta tranzaksiyada, qatorlar sonidan qat'i nazar o'zgarmas
+miqdordagi so'rov bilan bajaradi:
+
+    1 SELECT  - qaysi buyurtmalarning child i allaqachon bor
+    1 SELECT  - keyingi bosqichlar ustalari
+    bulk_create: child buyurtmalar, assigned_workers qatorlari, bildirishnomalar,
+                 jurnal yozuvlari
+
+Tranzaksiya muvaffaqiyatli yakunlangandan keyingina `stage_orders_spawned`
+signali yuboriladi (jonli yangilanishlar va boshqa yon ta'sirlar uchun).
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import audit
+from .models import Notification, Order, Worker
+from .notifications import create_notifications
+from .numbering import assign_order_numbers
+from .rollups import apply_changes, record_created, snapshot
+from .search import index_orders
+
+logger = logging.getLogger(__name__)
+
+NEXT_STAGE = {
+    'LIST': 'PANEL',
+    'ESHIK': 'PANEL',
+    'LIST_ESHIK': 'PANEL',
+    'PANEL': 'UGOL',
+}
+
+# Smena yopilganda yakunlanadigan (ustada turgan) holatlar
+IN_PROGRESS_STATUSES = ['USTA_QABUL_QILDI', 'USTA_BOSHLA', 'ISHDA']
+
+# sender=Order, children=[...] - tranzaksiya commit bo'lgandan keyin
+stage_orders_spawned = Signal()
+
+
+def build_child(order, next_worker_type):
+    return Order(
+        customer_unique_id=order.customer_unique_id,
+        customer_name=order.customer_name,
+        product_name=f"{order.product_name} ({next_worker_type})",
+        worker_type=next_worker_type,
+        stage=next_worker_type,
+        parent_order=order,
+        panel_type=order.panel_type,
+        panel_subtype=order.panel_subtype,
+        panel_thickness=order.panel_thickness,
+        panel_kvadrat=order.panel_kvadrat,
+        eshik_turi=order.eshik_turi,
+        pdf_file=order.pdf_file,
+        status='TASDIQLANDI',  # Child uchun menejer tasdig'i shart emas
+        created_by=order.created_by,
+    )
+
+
+def spawn_next_stage(orders):
+    """
+    USTA_TUGATDI holatidagi buyurtmalar uchun keyingi bosqich buyurtmalarini
+    yaratadi. Child i allaqachon bor yoki oxirgi bosqichdagi (UGOL)
+    buyurtmalar o'tkazib yuboriladi. Yaratilgan child lar ro'yxatini qaytaradi.
+    """
+    candidates = [
+        order for order in orders
+        if order.status == 'USTA_TUGATDI' and order.worker_type in NEXT_STAGE
+    ]
+    if not candidates:
+        return []
+
+    with transaction.atomic():
+        has_child = set(
+            Order.objects.filter(parent_order__in=[order.pk for order in candidates])
+            .values_list('parent_order_id', flat=True)
+        )
+        candidates = [order for order in candidates if order.pk not in has_child]
+        if not candidates:
+            return []
+
+        workers_by_role = defaultdict(list)
+        roles = {NEXT_STAGE[order.worker_type] for order in candidates}
+        for worker in Worker.objects.filter(role__in=roles):
+            workers_by_role[worker.role].append(worker)
+
+        children = [build_child(order, NEXT_STAGE[order.worker_type]) for order in candidates]
+        assign_order_numbers(children)
+        Order.objects.bulk_create(children)
+        # bulk_create post_save yubormaydi: qidiruv indeksi, hisobot jadvallari va jurnalni o'zimiz yangilaymiz
+        index_orders(children)
+        record_created(children)
+        audit.record_created(children)
+
+        Through = Order.assigned_workers.through
+        links, notifications = [], []
+        for child in children:
+            # from_db orqali yuklanmagan: keyingi save() lar uchun holatini eslab qolamiz
+            child._remember_values()
+            for worker in workers_by_role[child.worker_type]:
+                links.append(Through(order_id=child.pk, worker_id=worker.pk))
+                if worker.user_id:
+                    notifications.append(Notification(
+                        user_id=worker.user_id,
+                        order=child,
+                        message=f"Yangi vazifa: №{child.order_number} ({child.worker_type}). Ishni boshlashingiz mumkin!",
+                    ))
+        Through.objects.bulk_create(links, ignore_conflicts=True)
+        create_notifications(notifications)
+
+        transaction.on_commit(lambda: stage_orders_spawned.send(sender=Order, children=children))
+
+    logger.info("Keyingi bosqich uchun %s ta buyurtma yaratildi", len(children))
+    return children
+
+
+def finish_orders(orders, now=None):
+    """
+    Bir nechta buyurtmani birdaniga USTA_TUGATDI qiladi (masalan, smena
+    yopilganda) va keyingi bosqichlarni ochadi. Bitta UPDATE + spawn_next_stage.
+    Yangilangan buyurtmalar va yaratilgan child lar juftligini qaytaradi.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=[getattr(order, 'pk', order) for order in orders], status__in=IN_PROGRESS_STATUSES)
+        )
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(
+            status='USTA_TUGATDI', worker_finished_at=now,
+        )
+        changes, transitions = [], []
+        for order in orders:
+            before = snapshot(order)
+            transitions.append((order, order.status))
+            order.status = 'USTA_TUGATDI'
+            order.worker_finished_at = now
+            order._remember_values(['status', 'worker_finished_at'])
+            changes.append((order.pk, before, snapshot(order)))
+        # queryset.update() signal yubormaydi
+        apply_changes(changes)
+        audit.record_transitions(transitions)
+        children = spawn_next_stage(orders)
+    return orders, children
@@ -0,0 +1,152 @@
+# orders/customers.py
+"""
+Mijozlar analitikasi: CustomerStats jadvali.
+
+Har bir mijoz (customer_unique_id) uchun asosiy buyurtmalar (stage='ASOSIY')
+soni, birinchi/oxirgi buyurtma sanasi, m², summa, to'langan (zalog), to'lov
+foizi va sodiqlik darajasi saqlanadi. Order saqlanganda yoki o'chirilganda
+faqat shu mijozning qatori qayta hisoblanadi: (customer_unique_id, created_at)
+indeksi bo'yicha bitta GROUP BY va bitta UPSERT.
+
+Reyting sahifasidagi TOP-N ro'yxatlar CustomerStats ning indekslangan
+ustunlaridan o'qiladi, Order jadvali har safar guruhlanmaydi.
+`manage.py rebuild_customer_stats` jadvalni to'liq qayta quradi.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomerStats, Order
+
+ZERO = Decimal('0')
+
+# Statistikaga ta'sir qiluvchi Order maydonlari
+CUSTOMER_FIELDS = ('customer_unique_id', 'customer_name', 'panel_kvadrat', 'total_price', 'prepayment')
+STATS_FIELDS = (
+    'display_name', 'order_count', 'first_order_at', 'last_order_at',
+    'total_m2', 'total_billed', 'total_paid', 'payment_ratio', 'loyalty_score',
+)
+
+
+def loyalty_score(order_count, payment_ratio):
+    """A - sodiq (5+ buyurtma, 80%+ to'lov), B - doimiy (2+ buyurtma, 60%+), qolganlari C."""
+    if order_count > 5 and payment_ratio > 80:
+        return 'A'
+    if order_count > 2 and payment_ratio > 60:
+        return 'B'
+    return 'C'
+
+
+def _aggregate(orders):
+    return (
+        orders.filter(stage='ASOSIY')
+        .values('customer_unique_id')
+        .annotate(
+            display_name=Max('customer_name'),
+            order_count=Count('id'),
+            first_order_at=Min('created_at'),
+            last_order_at=Max('created_at'),
+            total_m2=Coalesce(Sum('panel_kvadrat'), ZERO),
+            total_billed=Coalesce(Sum('total_price'), ZERO),
+            total_paid=Coalesce(Sum('prepayment'), ZERO),
+        )
+        .order_by()
+    )
+
+
+def _build(row):
+    billed, paid = row['total_billed'], row['total_paid']
+    ratio = float(paid * 100 / billed) if billed > 0 else 0.0
+    return CustomerStats(
+        payment_ratio=ratio,
+        loyalty_score=loyalty_score(row['order_count'], ratio),
+        **row,
+    )
+
+
+def refresh_customers(customer_ids):
+    """Berilgan mijozlar qatorlarini Order dan qayta hisoblaydi (buyurtmasi qolmaganlar o'chiriladi)."""
+    customer_ids = {cid for cid in customer_ids if cid is not None}
+    if not customer_ids:
+        return
+    stats = [_build(row) for row in _aggregate(Order.objects.filter(customer_unique_id__in=customer_ids))]
+    with transaction.atomic():
+        if stats:
+            CustomerStats.objects.bulk_create(
+                stats,
+                update_conflicts=True,
+                unique_fields=['customer_unique_id'],
+                update_fields=STATS_FIELDS,
+            )
+        gone = customer_ids - {s.customer_unique_id for s in stats}
+        if gone:
+            CustomerStats.objects.filter(customer_unique_id__in=gone).delete()
+
+
+def rebuild_customer_stats():
+    """CustomerStats ni to'liq qayta quradi. Mijozlar sonini qaytaradi."""
+    stats = [_build(row) for row in _aggregate(Order.objects.all())]
+    with transaction.atomic():
+        CustomerStats.objects.all().delete()
+        CustomerStats.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
+
+
+def customer_summary(customer_id):
+    """Bitta mijozning yig'indisi (JSON uchun) yoki None."""
+    stats = CustomerStats.objects.filter(customer_unique_id=customer_id).first()
+    if stats is None:
+        return None
+    return {
+        'display_name': stats.display_name,
+        'total_orders': stats.order_count,
+        'total_amount': float(stats.total_billed),
+        'total_paid': float(stats.total_paid),
+        'total_area': float(stats.total_m2),
+        'avg_order_value': float(stats.avg_order_value),
+        'payment_ratio': round(stats.payment_ratio, 1),
+        'loyalty_score': stats.loyalty_score,
+        'first_order_at': stats.first_order_at.isoformat() if stats.first_order_at else None,
+        'last_order_at': stats.last_order_at.isoformat() if stats.last_order_at else None,
+    }
+
+
+def rating_row(stats):
+    """Reyting qatori (grafiklar uchun JSON)."""
+    return {
+        'customer_unique_id': stats.customer_unique_id,
+        'display_name': stats.display_name,
+        'order_count': stats.order_count,
+        'total_m2': stats.total_m2,
+        'total_paid': stats.total_paid,
+        'total_billed': stats.total_billed,
+        'payment_ratio': stats.payment_ratio,
+        'loyalty_score': stats.loyalty_score,
+    }
+
+
+# ======================== SIGNALLAR ========================
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or instance.stage != 'ASOSIY':
+        return
+    fields = CUSTOMER_FIELDS if update_fields is None else [f for f in CUSTOMER_FIELDS if f in update_fields]
+    if not created and not any(instance.has_changed(name) for name in fields):
+        return
+
+    customer_ids = {instance.customer_unique_id}
+    if not created and 'customer_unique_id' in fields and instance.is_tracked('customer_unique_id'):
+        # Buyurtma boshqa mijozga o'tkazildi: eski mijoz ham qayta hisoblanadi
+        customer_ids.add(instance.previous('customer_unique_id'))
+    refresh_customers(customer_ids)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    if instance.stage == 'ASOSIY':
+        refresh_customers([instance.customer_unique_id])
@@ -0,0 +1,192 @@
+# orders/dashboard.py
+"""
+order_list sahifasidagi barcha hisoblagichlarni (statistika) bitta
+shartli agregatsiya so'rovi orqali hisoblash.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Prefetch, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order, Worker
+
+# Arxivga tushgan (faol ro'yxatda ko'rinmaydigan) statuslar
+ARCHIVE_STATUSES = ['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR']
+COMPLETED_STATUSES = ['TAYYOR', 'BAJARILDI']
+CLOSED_STATUSES = ['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']
+
+# Buyurtmalarni bosqich bo'yicha ajratish (indekslangan `stage` ustuni orqali)
+MAIN_Q = Q(stage='ASOSIY')
+CHILD_Q = Q(stage__in=Order.CHILD_STAGES)
+PANEL_Q = Q(stage='PANEL')
+UGOL_Q = Q(stage='UGOL')
+OTHER_Q = Q(stage='BOSHQA')
+
+# order_list bo'limlari ("Yana yuklash" endpointi shu nomlardan foydalanadi)
+ORDER_LIST_SECTIONS = {
+    'main': MAIN_Q,
+    'panel': PANEL_Q,
+    'ugol': UGOL_Q,
+    'other': OTHER_Q,
+}
+
+
+def status_filter_q(filter_type, now=None):
+    """
+    Sahifadagi filtr tugmasiga (all, completed, in_progress, overdue)
+    mos keladigan Q shartini qaytaradi.
+    """
+    now = now or timezone.now()
+    if filter_type == 'completed':
+        return Q(status__in=COMPLETED_STATUSES)
+    if filter_type == 'in_progress':
+        return ~Q(status__in=CLOSED_STATUSES) & (Q(deadline__isnull=True) | Q(deadline__gte=now))
+    if filter_type == 'overdue':
+        return Q(deadline__lt=now) & ~Q(status__in=CLOSED_STATUSES)
+    return Q()
+
+
+def date_range_q(start_date, end_date, field='created_at'):
+    """
+    [start_date, end_date] kunlari uchun `field__gte` / `field__lt` shartini qaytaradi.
+    `created_at__date` dan farqli o'laroq ustunga funksiya qo'llanmaydi,
+    shuning uchun (stage, created_at) indeksidan foydalanish mumkin.
+    None bo'lgan chegara shartga qo'shilmaydi.
+    """
+    tz = timezone.get_current_timezone()
+    q = Q()
+    if start_date:
+        q &= Q(**{f'{field}__gte': timezone.make_aware(datetime.combine(start_date, time.min), tz)})
+    if end_date:
+        q &= Q(**{f'{field}__lt': timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)})
+    return q
+
+
+def worker_scope_annotation(user):
+    """Buyurtma shu foydalanuvchiga (usta) tayinlanganligini bildiruvchi Exists."""
+    return Exists(
+        Order.assigned_workers.through.objects.filter(
+            order_id=OuterRef('pk'),
+            worker__user=user,
+        )
+    )
+
+
+def annotate_order_rows(queryset, user):
+    """
+    Shablondagi har bir qator uchun kerakli ma'lumotlarni oldindan yuklaydi:
+    ustalar (user bilan birga) bitta so'rovda, `is_mine` esa Exists orqali.
+    Natijada sahifa qatorlar soniga bog'liq bo'lmagan miqdordagi so'rov bilan chiziladi.
+    """
+    return queryset.select_related('parent_order').prefetch_related(
+        Prefetch(
+            'assigned_workers',
+            queryset=Worker.objects.select_related('user'),
+            to_attr='prefetched_workers',
+        )
+    ).annotate(is_mine=worker_scope_annotation(user))
+
+
+def order_row_data(order):
+    """Buyurtma qatorining JSON uchun xom ma'lumotlari ("Yana yuklash" API)."""
+    workers = getattr(order, 'prefetched_workers', None)
+    data = {
+        'id': order.pk,
+        'order_number': order.order_number,
+        'customer_name': order.customer_name,
+        'product_name': order.product_name,
+        'stage': order.stage,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'parent_order_id': order.parent_order_id,
+        'panel_kvadrat': float(order.panel_kvadrat or 0),
+        'total_price': float(order.total_price or 0),
+        'prepayment': float(order.prepayment or 0),
+        'deadline': order.deadline.isoformat() if order.deadline else None,
+        'created_at': order.created_at.isoformat(),
+    }
+    if workers is not None:
+        data['workers'] = [w.user.get_full_name() or w.user.username for w in workers]
+    if hasattr(order, 'is_mine'):
+        data['is_mine'] = order.is_mine
+    return data
+
+
+def get_order_list_stats(user, filter_type='all', worker_scope=False, include_unpaid=False, now=None):
+    """
+    order_list sahifasidagi barcha hisoblagichlarni bitta so'rovda qaytaradi.
+
+    worker_scope=True bo'lsa, buyurtmalar soni faqat ustaga tayinlanganlar
+    bo'yicha hisoblanadi (RAD_ETILDI dan tashqari).
+    include_unpaid=True bo'lsa, qarzdor buyurtmalar soni va summasi ham
+    hisoblanadi (Admin va Menejer uchun).
+    """
+    now = now or timezone.now()
+
+    active_q = ~Q(status__in=ARCHIVE_STATUSES)
+    scope_q = Q()
+    qs = Order.objects.all()
+    if worker_scope:
+        qs = qs.annotate(is_mine=worker_scope_annotation(user))
+        scope_q = Q(is_mine=True) & ~Q(status='RAD_ETILDI')
+
+    flt = status_filter_q(filter_type, now)
+    main_q = active_q & MAIN_Q & scope_q & flt
+    child_q = active_q & scope_q & flt
+    panel_q = child_q & PANEL_Q
+    ugol_q = child_q & UGOL_Q
+    other_q = child_q & OTHER_Q
+
+    in_progress_q = status_filter_q('in_progress', now)
+    overdue_q = status_filter_q('overdue', now)
+    completed_q = status_filter_q('completed', now)
+
+    aggregates = {
+        'archived_count': Count('pk', filter=Q(status__in=ARCHIVE_STATUSES)),
+        'customers_count': Count('customer_unique_id', distinct=True),
+        'total_orders': Count('pk', filter=main_q),
+        'completed_orders': Count('pk', filter=main_q & completed_q),
+        'in_progress_orders': Count('pk', filter=main_q & in_progress_q),
+        'overdue_orders_count': Count('pk', filter=main_q & overdue_q),
+        'all_child_orders_count': Count('pk', filter=active_q & CHILD_Q),
+        'panel_child_count': Count('pk', filter=panel_q),
+        'ugul_child_count': Count('pk', filter=ugol_q),
+        'other_child_count': Count('pk', filter=other_q),
+        'panel_completed': Count('pk', filter=panel_q & completed_q),
+        'ugul_completed': Count('pk', filter=ugol_q & completed_q),
+        'other_completed': Count('pk', filter=other_q & completed_q),
+        'panel_in_progress': Count('pk', filter=panel_q & in_progress_q),
+        'ugul_in_progress': Count('pk', filter=ugol_q & in_progress_q),
+        'other_in_progress': Count('pk', filter=other_q & in_progress_q),
+    }
+
+    if include_unpaid:
+        unpaid_q = (
+            Q(parent_order__isnull=True, total_price__gt=F('prepayment')) &
+            ~Q(status='BEKOR_QILINDI')
+        )
+        aggregates['unpaid_orders_count'] = Count('pk', filter=unpaid_q)
+        # "Qarzlar hisoboti" tugmasidagi son: debt_report bilan bir xil shart (child buyurtmalar ham)
+        aggregates['debts_count'] = Count(
+            'pk', filter=Q(total_price__gt=F('prepayment')) & ~Q(status='BEKOR_QILINDI'),
+        )
+        aggregates['total_unpaid_amount'] = Coalesce(
+            Sum(F('total_price') - F('prepayment'), filter=unpaid_q),
+            Value(0),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+
+    stats = qs.aggregate(**aggregates)
+
+    if not include_unpaid:
+        stats['unpaid_orders_count'] = 0
+        stats['total_unpaid_amount'] = 0
+        stats['debts_count'] = 0
+
+    # Bo'limlar progress chizig'i: tayyorlar ulushi (%)
+    for section in ('panel', 'ugul', 'other'):
+        total = stats[f'{section}_child_count']
+        stats[f'{section}_progress_percentage'] = stats[f'{section}_completed'] * 100 / total if total else 0
+
+    return stats
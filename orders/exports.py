@@ -0,0 +1,48 @@
+# orders/exports.py
+"""
+CSV eksportlarini oqim (StreamingHttpResponse) orqali yuborish.
+
+Javob to'liq xotirada yig'ilmaydi: qatorlar queryset.iterator(chunk_size=...)
+bilan bo'laklab o'qiladi va har bir qator darhol mijozga yoziladi. Shuning
+uchun 1 ming yoki 1 million qator eksport qilinganda ham xotira sarfi va
+birinchi baytgacha bo'lgan vaqt deyarli bir xil. Har bir qator uchun
+qo'shimcha so'rov yuborilmaydi: bog'liq obyektlar select_related yoki
+bo'lak bo'yicha bitta `pk__in` so'rovi bilan olinadi.
+"""
+import csv
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+
+CSV_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer uchun "fayl": yozilgan qatorni qaytaradi, o'zida saqlamaydi."""
+
+    def write(self, value):
+        return value
+
+
+def batched(iterable, size=CSV_CHUNK_SIZE):
+    """Ketma-ketlikni `size` tadan ro'yxatlarga bo'ladi."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_csv(filename, header, rows, delimiter=';'):
+    """rows - qatorlar generatori; sarlavha birinchi yuboriladi."""
+    writer = csv.writer(Echo(), delimiter=delimiter)
+
+    def content():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -308,6 +308,40 @@ import json
 from django import forms
 from decimal import Decimal
 from .models import Material, MaterialTransaction, Category
+from django.core.exceptions import ValidationError as ModelValidationError
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Faqat tanlangan variantni chizadi: qolganlari `data-autocomplete-url`
+    orqali yozish davomida qidiriladi (partials/autocomplete_script.html).
+    Shuning uchun forma HTML i materiallar yoki buyurtmalar soniga bog'liq emas.
+    """
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def get_context(self, name, value, attrs):
+        attrs = {**(attrs or {}), 'data-autocomplete-url': reverse(self.url_name)}
+        return super().get_context(name, value, attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        options = [self.create_option(name, '', field.empty_label or '', not any(value), 0, attrs=attrs)]
+        selected = [v for v in value if v not in ('', None)]
+        if selected:
+            try:
+                objects = list(field.queryset.filter(pk__in=selected))
+            except (ValueError, TypeError, ModelValidationError):
+                objects = []
+            for index, obj in enumerate(objects, 1):
+                options.append(self.create_option(
+                    name, field.prepare_value(obj), field.label_from_instance(obj), True, index, attrs=attrs,
+                ))
+        return [(None, options, 0)]
+
 
 class MaterialTransactionForm(forms.ModelForm):
     # ✅ To'g'ri field e'lon qilish
@@ -317,16 +351,24 @@ class MaterialTransactionForm(forms.ModelForm):
         widget=forms.RadioSelect(attrs={'class': 'form-check-input'})
     )
     
+    # Tanlangan ID bitta get(pk=...) bilan tekshiriladi; ro'yxat material_autocomplete_api dan
     material = forms.ModelChoiceField(
-        queryset=Material.objects.none(),  # Boshlang'ich qiymat
+        queryset=Material.objects.select_related('category'),
         label="Material *",
         required=True,
-        widget=forms.Select(attrs={
-            'class': 'form-control select2',
+        widget=AutocompleteSelect('material_autocomplete_api', attrs={
+            'class': 'form-control',
             'id': 'id_material'
         })
     )
     
+    order = forms.ModelChoiceField(
+        queryset=Order.objects.all(),
+        required=False,
+        label="Buyurtma",
+        widget=AutocompleteSelect('order_autocomplete_api', attrs={'class': 'form-control'})
+    )
+    
     quantity_change = forms.DecimalField(
         max_digits=15,
         decimal_places=3,
@@ -398,15 +440,13 @@ class MaterialTransactionForm(forms.ModelForm):
             'material', 
             'quantity_change', 
             'received_by', 
-            'notes'
+            'notes',
+            'order',
         ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # ✅ To'g'ri queryset o'rnatish
-        self.fields['material'].queryset = Material.objects.all().select_related('category').order_by('name')
-        
         # ✅ Kategoriya fieldini to'g'ri e'lon qilish
         self.fields['category'] = forms.ModelChoiceField(
             queryset=Category.objects.all().order_by('name'),
@@ -417,31 +457,6 @@ class MaterialTransactionForm(forms.ModelForm):
                 'id': 'id_category'
             })
         )
-        
-        # ✅ Order fieldi agar mavjud bo'lsa
-        if hasattr(self, 'Order') or 'Order' in globals():
-            try:
-                from .models import Order
-                self.fields['order'] = forms.ModelChoiceField(
-                    queryset=Order.objects.all(),
-                    required=False,
-                    label="Buyurtma",
-                    widget=forms.Select(attrs={'class': 'form-control'})
-                )
-            except:
-                self.fields['order'] = forms.CharField(
-                    max_length=100,
-                    required=False,
-                    label="Buyurtma raqami",
-                    widget=forms.TextInput(attrs={'class': 'form-control'})
-                )
-        else:
-            self.fields['order'] = forms.CharField(
-                max_length=100,
-                required=False,
-                label="Buyurtma raqami",
-                widget=forms.TextInput(attrs={'class': 'form-control'})
-            )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -449,8 +464,6 @@ class MaterialTransactionForm(forms.ModelForm):
         material = cleaned_data.get('material')
         quantity = cleaned_data.get('quantity_change')
         
-        print(f"DEBUG - Material: {material}")  # Debug uchun
-        
         # 1. Material MAJBURIY tekshiruvi
         if not material:
             raise forms.ValidationError({
@@ -505,10 +518,10 @@ class MaterialTransactionForm(forms.ModelForm):
                 name=new_cat_name.strip(),
                 defaults={'description': f"Avtomatik yaratilgan: {new_cat_name}"}
             )
-            # Material kategoriyasini o'zgartirish
+            # Material kategoriyasini o'zgartirish (qoldiqqa tegmasdan: uni faqat orders.stock yozadi)
             if instance.material:
                 instance.material.category = category
-                instance.material.save()
+                instance.material.save(update_fields=['category'])
         
         # ✅ Maxsulot nomini saqlash
         product_name = self.cleaned_data.get('product_name')
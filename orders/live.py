@@ -0,0 +1,248 @@
+# orders/live.py
+"""
+Jonli yangilanishlar (server-sent events).
+
+Buyurtma statusi o'zgarishi, yangi bildirishnomalar va qorovul (darvoza)
+hodisalari kanallarga e'lon qilinadi; /orders/api/live/ SSE endpointi
+foydalanuvchining kanallariga obuna bo'lib, kichik JSON hodisalarni
+brauzerga uzatadi. Planshetlar sahifani qayta yuklash o'rniga shu
+hodisalar bo'yicha kartochkalarni yangilaydi.
+
+Kanallar:
+    orders          - barcha buyurtma o'zgarishlari (dashboardlar)
+    user:<id>       - foydalanuvchining shaxsiy xabarlari
+    group:<nomi>    - rol (guruh) bo'yicha xabarlar
+
+Broker settings.LIVE_BROKER orqali almashtiriladi:
+    'orders.live.InProcessBroker' (standart) - bitta jarayon ichida, testlar uchun ham
+    'orders.live.RedisBroker'               - bir nechta jarayon/serverlar uchun
+                                              (redis paketi va LIVE_REDIS_URL kerak)
+
+Hodisalar faqat tranzaksiya commit bo'lgandan keyin e'lon qilinadi.
+Uzoq ulanishlar uchun ilova ASGI server orqali ishga tushiriladi
+(masalan: `uvicorn eco_prom.asgi:application`).
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .chain import stage_orders_spawned
+from .models import Order
+from .roles import get_group_names
+
+ORDERS_CHANNEL = 'orders'
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def group_channel(name):
+    return f'group:{name}'
+
+
+def user_channels(user):
+    """Foydalanuvchi obuna bo'ladigan kanallar (so'rov ichida keshlangan guruhlardan)."""
+    channels = [ORDERS_CHANNEL, user_channel(user.pk)]
+    channels += [group_channel(name) for name in sorted(get_group_names(user))]
+    if user.is_superuser:
+        channels.append(group_channel('Glavniy Admin'))
+    return channels
+
+
+# ======================== BROKERLAR ========================
+
+class InProcessSubscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, channel, event):
+        # publish() istalgan oqimdan chaqiriladi: navbatga faqat o'z event loop i orqali yozamiz
+        self.loop.call_soon_threadsafe(self._put, (channel, event))
+
+    def _put(self, item):
+        if self.queue.full():
+            # Sekin mijoz: eng eski hodisa tashlanadi, yangilari muhimroq
+            self.queue.get_nowait()
+        self.queue.put_nowait(item)
+
+    async def get(self, timeout=None):
+        """(kanal, hodisa) yoki timeout bo'lsa None."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Bitta jarayon ichidagi pub/sub (runserver, bitta worker li deploy va testlar)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def publish(self, channel, event):
+        with self.lock:
+            subscriptions = [s for s in self.subscriptions if channel in s.channels]
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(channel, event)
+            except RuntimeError:
+                # Event loop yopilgan (mijoz uzilgan)
+                self.unsubscribe(subscription)
+
+    async def subscribe(self, channels):
+        subscription = InProcessSubscription(self, channels)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return message['channel'].decode(), json.loads(message['data'])
+
+    async def close(self):
+        await self.pubsub.close()
+        await self.client.close()
+
+
+class RedisBroker:
+    """Redis PUBLISH/SUBSCRIBE orqali jarayonlar orasida umumiy broker."""
+
+    def __init__(self, url=None):
+        import redis  # ixtiyoriy bog'liqlik: faqat shu broker tanlanganda kerak
+
+        self.url = url or getattr(settings, 'LIVE_REDIS_URL', 'redis://localhost:6379/0')
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, event):
+        self.client.publish(channel, json.dumps(event, default=str))
+
+    async def subscribe(self, channels):
+        from redis import asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*channels)
+        return RedisSubscription(client, pubsub)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'LIVE_BROKER', 'orders.live.InProcessBroker')
+    return import_string(path)()
+
+
+# ======================== E'LON QILISH ========================
+
+def publish(channels, event):
+    """Hodisani kanallarga tranzaksiya commit bo'lgandan keyin e'lon qiladi."""
+    if isinstance(channels, str):
+        channels = [channels]
+    channels = list(channels)
+
+    def send():
+        broker = get_broker()
+        for channel in channels:
+            broker.publish(channel, event)
+
+    transaction.on_commit(send)
+
+
+def order_event_data(order):
+    """
+    Umumiy kanal uchun minimal ma'lumot: narx, mijoz va boshqa maxfiy
+    maydonlar yuborilmaydi (ustalar boshqalarning buyurtmasini ko'rmaydi).
+    """
+    return {
+        'id': order.pk,
+        'order_number': order.order_number,
+        'stage': order.stage,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'parent_order_id': order.parent_order_id,
+    }
+
+
+def publish_order(order, event_type='order.status'):
+    publish(ORDERS_CHANNEL, {'type': event_type, 'order': order_event_data(order)})
+
+
+def publish_notifications(notifications, targets=None):
+    """
+    Shaxsiy xabarlar qabul qiluvchining kanaliga, guruh xabarlari esa
+    guruh kanallariga (targets - guruh nomlari) e'lon qilinadi.
+    """
+    for notification in notifications:
+        event = {
+            'type': 'notification',
+            'id': notification.pk,
+            'message': notification.message,
+            'order_id': notification.order_id,
+            'created_at': notification.created_at.isoformat(),
+        }
+        if notification.user_id:
+            publish(user_channel(notification.user_id), event)
+        else:
+            publish([group_channel(name) for name in targets or []], event)
+
+
+def publish_gate_event(order, action, when):
+    """Qorovul darvozada kirish/chiqishni tasdiqladi."""
+    publish(ORDERS_CHANNEL, {
+        'type': 'gate',
+        'action': action,
+        'at': when.isoformat(),
+        'order': order_event_data(order),
+    })
+
+
+def format_sse(event):
+    return f"event: {event.get('type', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+# ======================== SIGNALLAR ========================
+
+@receiver(post_save, sender=Order)
+def order_status_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        publish_order(instance, 'order.created')
+    elif (update_fields is None or 'status' in update_fields) and instance.has_changed('status'):
+        publish_order(instance)
+
+
+@receiver(stage_orders_spawned)
+def stage_orders_created(sender, children, **kwargs):
+    # bulk_create post_save yubormaydi; bu signal allaqachon commit dan keyin keladi
+    broker = get_broker()
+    for child in children:
+        broker.publish(ORDERS_CHANNEL, {'type': 'order.created', 'order': order_event_data(child)})
@@ -0,0 +1,72 @@
+# orders/management/commands/backfill_order_audit.py
+
+from django.contrib.admin.models import ADDITION, CHANGE, DELETION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+
+from orders.audit import STATUS_CHANGE_RE
+from orders.exports import batched
+from orders.models import Order, OrderAuditEvent
+
+BATCH_SIZE = 1000
+
+
+def event_from_log(log, orders):
+    """LogEntry ni OrderAuditEvent ga aylantiradi (statuslar change_message dan olinadi)."""
+    order = orders.get(int(log.object_id)) if log.object_id.isdigit() else None
+    action, from_status, to_status = 'CHANGE', '', ''
+    if log.action_flag == ADDITION:
+        action = 'CREATE'
+    elif log.action_flag == DELETION:
+        action = 'DELETE'
+    elif log.action_flag == CHANGE:
+        match = STATUS_CHANGE_RE.search(log.change_message or '')
+        if match:
+            action = 'STATUS'
+            from_status, to_status = match.groups()
+    return OrderAuditEvent(
+        order=order if action != 'DELETE' else None,
+        order_number=order.order_number if order else (log.object_repr or '')[:50],
+        actor_id=log.user_id,
+        action=action,
+        from_status=from_status,
+        to_status=to_status,
+        message=log.change_message or '',
+        created_at=log.action_time,
+        log_entry_id=log.pk,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Eski admin jurnalidagi (LogEntry) buyurtma yozuvlarini OrderAuditEvent jadvaliga ko'chiradi. "
+        "Qayta ishga tushirilsa takrorlanmaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Yangi jurnal ishga tushgandan keyingi LogEntry yozuvlarini ham ko'chirish",
+        )
+
+    def handle(self, *args, **options):
+        logs = LogEntry.objects.filter(content_type=ContentType.objects.get_for_model(Order)).order_by('pk')
+        if not options['all']:
+            # Jurnal ishga tushgandan keyin viewlar LogEntry ga ham yozadi: ular takrorlanmasin
+            first_live = (
+                OrderAuditEvent.objects.filter(log_entry_id__isnull=True)
+                .order_by('created_at').values_list('created_at', flat=True).first()
+            )
+            if first_live:
+                logs = logs.filter(action_time__lt=first_live)
+
+        created = 0
+        for batch in batched(logs.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+            order_ids = {int(log.object_id) for log in batch if log.object_id.isdigit()}
+            orders = Order.objects.only('pk', 'order_number').in_bulk(order_ids)
+            events = OrderAuditEvent.objects.bulk_create(
+                [event_from_log(log, orders) for log in batch], ignore_conflicts=True,
+            )
+            created += len(events)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Jurnal ko'chirildi: {created} ta LogEntry yozuvi ko'rib chiqildi."))
@@ -0,0 +1,41 @@
+# orders/management/commands/close_shift.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from orders.chain import IN_PROGRESS_STATUSES, NEXT_STAGE, finish_orders, spawn_next_stage
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Smenani yopish: ustada turgan buyurtmalarni USTA_TUGATDI qiladi va keyingi "
+        "bosqich buyurtmalarini bitta tranzaksiyada ochadi. --orders berilmasa, faqat "
+        "child i ochilmay qolgan USTA_TUGATDI buyurtmalari uchun bosqich yaratiladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, nargs='+', help="Yakunlanadigan buyurtma ID lari.")
+        parser.add_argument('--worker-type', choices=sorted(NEXT_STAGE), help="Shu turdagi barcha faol buyurtmalarni yakunlash.")
+
+    def handle(self, *args, **options):
+        if options['orders'] or options['worker_type']:
+            queryset = Order.objects.filter(status__in=IN_PROGRESS_STATUSES)
+            if options['orders']:
+                queryset = queryset.filter(pk__in=options['orders'])
+            if options['worker_type']:
+                queryset = queryset.filter(worker_type=options['worker_type'])
+            finished, children = finish_orders(queryset.values_list('pk', flat=True))
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {len(finished)} ta buyurtma yakunlandi, {len(children)} ta keyingi bosqich ochildi."
+            ))
+            return
+
+        pending = list(
+            Order.objects.filter(status='USTA_TUGATDI', worker_type__in=list(NEXT_STAGE))
+            .exclude(Exists(Order.objects.filter(parent_order=OuterRef('pk'))))
+        )
+        children = spawn_next_stage(pending)
+        if children:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(children)} ta ochilmay qolgan bosqich yaratildi."))
+        self.stdout.write(self.style.SUCCESS("✅ Tayyor."))
@@ -0,0 +1,71 @@
+# orders/management/commands/explain_order_queries.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from orders.dashboard import (
+    ARCHIVE_STATUSES, CHILD_Q, MAIN_Q, PANEL_Q,
+    date_range_q, status_filter_q,
+)
+from orders.models import Order
+
+
+def hot_queries():
+    """Eng ko'p ishlatiladigan sahifalardagi Order so'rovlari (nomi, queryset)."""
+    now = timezone.now()
+    today = timezone.localdate()
+    active = Order.objects.exclude(status__in=ARCHIVE_STATUSES)
+
+    return [
+        ('order_list: asosiy', active.filter(MAIN_Q).order_by('-created_at')),
+        ('order_list: panel', active.filter(PANEL_Q).order_by('-created_at')),
+        ('order_list: muddati o\'tgan', active.filter(MAIN_Q, status_filter_q('overdue', now))),
+        ('order_archive', Order.objects.filter(MAIN_Q, status__in=ARCHIVE_STATUSES).order_by('-created_at')),
+        ('order_archive: child', Order.objects.filter(CHILD_Q, status__in=ARCHIVE_STATUSES).order_by('-created_at')),
+        ('sales_report_view', Order.objects.filter(
+            MAIN_Q, date_range_q(today - timedelta(days=30), today),
+        ).order_by('-created_at')),
+        ('warehouse_dashboard', Order.objects.filter(
+            status='USTA_TUGATDI', parent_order__isnull=True,
+        ).order_by('-work_finished_at')),
+        ('guard_dashboard', Order.objects.filter(
+            status__in=['TAYYOR', 'BAJARILDI'], parent_order__isnull=True,
+        ).order_by('-created_at')),
+        ('customer_rating', Order.objects.filter(
+            customer_unique_id='C-1', stage='ASOSIY',
+        ).order_by('-created_at')),
+        ('debt_report', Order.objects.filter(
+            total_price__gt=F('prepayment'),
+        ).exclude(status='BEKOR_QILINDI').order_by('-created_at')),
+        ('Order.active: muddat', Order.active.filter(deadline__lt=now).order_by('deadline')),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Order jadvalidagi asosiy so'rovlarning EXPLAIN rejasini chiqaradi (indekslarni tekshirish uchun)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help="PostgreSQL da EXPLAIN ANALYZE (so'rov haqiqatan bajariladi).",
+        )
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor == 'postgresql':
+                explain_options['analyze'] = True
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"--analyze faqat PostgreSQL uchun, {connection.vendor} da oddiy EXPLAIN chiqariladi."
+                ))
+
+        self.stdout.write(self.style.SUCCESS(f"Baza: {connection.vendor}"))
+        for name, queryset in hot_queries():
+            self.stdout.write(self.style.WARNING(f"\n=== {name} ==="))
+            self.stdout.write(queryset.explain(**explain_options))
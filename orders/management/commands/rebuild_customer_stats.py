@@ -0,0 +1,13 @@
+# orders/management/commands/rebuild_customer_stats.py
+
+from django.core.management.base import BaseCommand
+
+from orders.customers import rebuild_customer_stats
+
+
+class Command(BaseCommand):
+    help = "Mijozlar statistikasini (CustomerStats) asosiy buyurtmalardan qaytadan hisoblaydi."
+
+    def handle(self, *args, **options):
+        count = rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(f"✅ Mijozlar statistikasi yangilandi: {count} ta mijoz."))
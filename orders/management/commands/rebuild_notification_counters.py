@@ -0,0 +1,13 @@
+# orders/management/commands/rebuild_notification_counters.py
+
+from django.core.management.base import BaseCommand
+
+from orders.notifications import rebuild_unread_counters
+
+
+class Command(BaseCommand):
+    help = "O'qilmagan xabarlar hisoblagichlarini Notification jadvalidan qaytadan hisoblaydi."
+
+    def handle(self, *args, **options):
+        count = rebuild_unread_counters()
+        self.stdout.write(self.style.SUCCESS(f"✅ Hisoblagichlar yangilandi: {count} ta foydalanuvchi."))
@@ -0,0 +1,13 @@
+# orders/management/commands/rebuild_order_search.py
+
+from django.core.management.base import BaseCommand
+
+from orders.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Buyurtmalar qidiruv indeksini (SQLite FTS5) orders_order jadvalidan qaytadan to'ldiradi."
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Qidiruv indeksi yangilandi: {count} ta buyurtma."))
@@ -0,0 +1,16 @@
+# orders/management/commands/rebuild_report_stats.py
+
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild_order_stats, rebuild_worker_stats
+
+
+class Command(BaseCommand):
+    help = "Hisobotlar uchun kunlik yig'ma jadvallarni (OrderDailyStats, WorkerDailyStats) Order dan qaytadan quradi."
+
+    def handle(self, *args, **options):
+        order_rows = rebuild_order_stats()
+        worker_rows = rebuild_worker_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Hisobot jadvallari yangilandi: {order_rows} ta buyurtma qatori, {worker_rows} ta usta qatori."
+        ))
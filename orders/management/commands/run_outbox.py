@@ -0,0 +1,52 @@
+# orders/management/commands/run_outbox.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from orders.telegram import ChatRateLimiter, TelegramClient, deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Telegram navbatidagi (outbox) xabarlarni yuboradi. Doimiy ishlaydigan bitta jarayon sifatida ishga tushiring."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2.0, help="Navbat bo'sh bo'lganda kutish (soniya).")
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--once', action='store_true', help="Navbatni bir marta ko'rib chiqib chiqib ketish.")
+
+    def handle(self, *args, **options):
+        if not settings.TELEGRAM_BOT_TOKEN:
+            # Xabarlar navbatda (PENDING) qoladi va token berilgach yuboriladi
+            self.stdout.write(self.style.WARNING(
+                "⚠️ TELEGRAM_BOT_TOKEN sozlanmagan: navbatdagi xabarlar yuborilmaydi."
+            ))
+            return
+        if not settings.TELEGRAM_CHAT_ID:
+            self.stdout.write(self.style.WARNING(
+                "⚠️ TELEGRAM_CHAT_ID sozlanmagan: chat ko'rsatilmagan xabarlar navbatda kutadi."
+            ))
+
+        client = TelegramClient()
+        limiter = ChatRateLimiter()
+
+        try:
+            while True:
+                close_old_connections()
+                sent, retried, failed = deliver_pending(client, limiter, batch_size=options['batch_size'])
+                if sent or retried or failed:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✅ Yuborildi: {sent}, qayta urinish: {retried}, xato: {failed}"
+                    ))
+
+                if options['once']:
+                    return
+                # Partiya to'la bo'lsa darhol davom etamiz, aks holda biroz kutamiz
+                if sent + retried + failed < options['batch_size']:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("To'xtatildi."))
+        finally:
+            client.session.close()
@@ -0,0 +1,37 @@
+# orders/management/commands/run_overdue_alerts.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from orders.alerts import process_overdue_orders
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan buyurtmalar haqida adminlarga xabar yaratadi (doimiy ishlaydigan jarayon)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=60, help="Tekshiruvlar orasidagi vaqt (soniya).")
+        parser.add_argument('--once', action='store_true', help="Bir marta tekshirib chiqib ketish.")
+
+    def handle(self, *args, **options):
+        interval = max(options['interval'], 1)
+
+        while True:
+            close_old_connections()
+            orders, notifications = process_overdue_orders()
+            if orders:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️ {orders} ta muddat o'tgan buyurtma: {notifications} ta xabar yaratildi."
+                ))
+
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS("✅ Tekshiruv tugadi."))
+                return
+
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.SUCCESS("To'xtatildi."))
+                return
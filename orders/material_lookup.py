@@ -0,0 +1,180 @@
+# orders/material_lookup.py
+"""
+Skanerlangan kod -> material.
+
+Kod `Material.normalize_code` bilan normallashtiriladi (bo'shliqsiz, katta
+harf) va indekslangan ikki ustun bo'yicha qidiriladi: `code` (QR/shtrix kod)
+va `product_code` (product_name ning normallashtirilgan nusxasi). Avvalgi
+`product_name__iexact` butun jadvalni skanerlardi.
+
+Natijalar jarayon ichidagi LRU keshda saqlanadi (kalit - normallashtirilgan
+kod), shuning uchun issiq keshda skaner so'rovi bazaga bormaydi. Topilmagan
+kodlar ham qisqa muddat (MATERIAL_LOOKUP_MISS_TTL) eslab qolinadi. Material
+saqlanganda yoki o'chirilganda kesh shu jarayonda tozalanadi; boshqa
+jarayonlarda yozuvlar MATERIAL_LOOKUP_TTL dan keyin eskiradi. Keshda qoldiq
+saqlanmaydi - faqat o'zgarmas ma'lumotlar (id, nom, kod, birlik).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Material
+
+normalize_code = Material.normalize_code
+
+
+@dataclass(frozen=True)
+class MaterialRef:
+    """Keshdagi material: skaner javobi uchun yetarli, o'zgarmas maydonlar."""
+    id: int
+    name: str
+    code: str
+    product_name: str
+    unit: str
+
+    @classmethod
+    def from_material(cls, material):
+        return cls(material.pk, material.name, material.code or '', material.product_name or '', material.unit)
+
+
+_MISS = object()
+
+
+class LookupCache:
+    """Ipga xavfsiz LRU kesh: normallashtirilgan kod -> (MaterialRef yoki _MISS, tugash vaqti)."""
+
+    def __init__(self, maxsize=2048, ttl=300, miss_ttl=5, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # clear() da oshadi: bazadan o'qish paytida kesh tozalangan bo'lsa eski natija yozilmaydi
+        self.generation = 0
+        self.hits = self.misses = self.negative_hits = self.evictions = 0
+
+    def get(self, key):
+        """(topildi, qiymat): qiymat MaterialRef yoki None (topilmagani keshlangan)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < self.clock():
+                self._data.pop(key, None)
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            if item[0] is _MISS:
+                self.negative_hits += 1
+                return True, None
+            self.hits += 1
+            return True, item[0]
+
+    def set(self, key, ref, generation=None):
+        ttl = self.ttl if ref is not None else self.miss_ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (ref if ref is not None else _MISS, self.clock() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+cache = LookupCache(
+    maxsize=getattr(settings, 'MATERIAL_LOOKUP_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'MATERIAL_LOOKUP_TTL', 300),
+    miss_ttl=getattr(settings, 'MATERIAL_LOOKUP_MISS_TTL', 5),
+)
+
+
+def resolve_codes(codes):
+    """
+    Kodlarni bitta so'rov bilan materiallarga bog'laydi (keshsiz): {asl kod: Material}.
+    `code` ustuni mosligi `product_code` dan ustun.
+    """
+    codes = {code for code in codes if code}
+    normalized = {normalize_code(code) for code in codes} - {''}
+    if not normalized:
+        return {}
+    by_code, by_product = {}, {}
+    for material in Material.objects.filter(Q(code__in=codes | normalized) | Q(product_code__in=normalized)).order_by():
+        if material.code:
+            by_code[normalize_code(material.code)] = material
+        if material.product_code:
+            by_product.setdefault(material.product_code, material)
+    found = {}
+    for code in codes:
+        key = normalize_code(code)
+        material = by_code.get(key) or by_product.get(key)
+        if material is not None:
+            found[code] = material
+    return found
+
+
+def lookup(code):
+    """Kod bo'yicha MaterialRef yoki None (kesh orqali)."""
+    key = normalize_code(code)
+    if not key:
+        return None
+    generation = cache.generation
+    cached, ref = cache.get(key)
+    if cached:
+        return ref
+    material = resolve_codes([code]).get(code)
+    ref = MaterialRef.from_material(material) if material else None
+    cache.set(key, ref, generation)
+    return ref
+
+
+def get_or_create_for_code(code):
+    """
+    Skaner uchun: topilmasa yangi material ochiladi. (MaterialRef, yangi_mi) qaytaradi.
+    Bir vaqtda ikki skaner bir xil yangi kodni yuborsa, ikkinchisi birinchisining materialini oladi.
+    """
+    ref = lookup(code)
+    if ref is not None:
+        return ref, False
+    try:
+        with transaction.atomic():
+            material = Material.objects.create(
+                name=f"Yangi Material (Kod: {code})",
+                product_name=code,
+                unit='son',
+                quantity=0,
+                price_per_unit=0,
+            )
+    except IntegrityError:
+        return MaterialRef.from_material(Material.objects.get(name=f"Yangi Material (Kod: {code})")), False
+    return MaterialRef.from_material(material), True
+
+
+# ======================== KESHNI BEKOR QILISH ========================
+
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+def material_changed(sender, **kwargs):
+    # Kod o'zgarganda eski va yangi kalitlar, topilmaganlar ham eskiradi: butun kesh tozalanadi
+    cache.clear()
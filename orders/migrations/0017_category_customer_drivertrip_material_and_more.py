@@ -0,0 +1,370 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:11
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0016_order_telegram_notified_overdue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Kategoriya Nomi')),
+                ('description', models.TextField(blank=True, verbose_name='Izoh')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Kategoriya',
+                'verbose_name_plural': 'Kategoriyalar',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('unique_id', models.CharField(editable=False, max_length=10, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DriverTrip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('car_number', models.CharField(max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('start_time', models.DateTimeField(auto_now_add=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Material',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Material nomi')),
+                ('product_name', models.CharField(blank=True, help_text="Ushbu materialdan tayyorlanadigan yoki bog'liq maxsulot nomi", max_length=255, null=True, verbose_name='Maxsulot nomi')),
+                ('unit', models.CharField(choices=[('kg', 'Kilogramm (kg)'), ('m2', 'Kvadrat Metr (m²)'), ('son', 'Dona / Son (ta)'), ('m', 'Metr (m)'), ('litr', 'Litr')], default='son', max_length=10, verbose_name="O'lchov birligi")),
+                ('quantity', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=10, verbose_name='Ombordagi joriy qoldiq')),
+                ('price_per_unit', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Birlik narxi')),
+                ('min_stock_level', models.DecimalField(decimal_places=3, default=Decimal('0.000'), max_digits=10, verbose_name='Minimal qoldiq')),
+                ('max_stock_level', models.DecimalField(blank=True, decimal_places=3, default=0, max_digits=10, null=True, verbose_name='Maksimal qoldiq')),
+                ('code', models.CharField(blank=True, max_length=50, null=True, unique=True, verbose_name='QR/Shtrix Kod')),
+                ('last_updated', models.DateTimeField(auto_now=True, verbose_name='Oxirgi yangilanish')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='orders.category', verbose_name='Material Kategoriyasi')),
+            ],
+            options={
+                'verbose_name': 'Material',
+                'verbose_name_plural': 'Materiallar (Omborxona)',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='order',
+            options={},
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='delayed_assignment_alert_sent',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='finish_image_uploaded_at',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='start_image_uploaded_at',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='telegram_notified_overdue',
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='balandligi',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='customer_unique_id',
+            field=models.CharField(default='', help_text="Ko'p martalik mijoz identifikatori", max_length=50, verbose_name='Mijoz ID'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_img_1',
+            field=models.ImageField(blank=True, null=True, upload_to='order_photos/delivery/'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_img_2',
+            field=models.ImageField(blank=True, null=True, upload_to='order_photos/delivery/'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_img_3',
+            field=models.ImageField(blank=True, null=True, upload_to='order_photos/delivery/'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='eni',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='eshik_turi',
+            field=models.CharField(blank=True, choices=[('F1', 'F1'), ('F2', 'F2'), ('F3', 'F3'), ('F4', 'F4'), ('F5', 'F5'), ('F6', 'F6'), ('F7', 'F7'), ('F8', 'F8')], max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='eshik_yonalishi',
+            field=models.CharField(blank=True, choices=[('ONG', "O'ng"), ('CHAP', 'Chap')], max_length=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='finish_confirmed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='finish_telegram_sent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='finished_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='finished_orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='needs_manager_approval',
+            field=models.BooleanField(default=False, verbose_name="Menejer tasdig'i kerak"),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='panel_subtype',
+            field=models.CharField(blank=True, choices=[('TOM', 'Tom'), ('SECRETPIR', 'SecretPir'), ('SOVUTGICH', 'PIR Sovutgich')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='panel_thickness',
+            field=models.CharField(blank=True, choices=[('5', '5 sm'), ('8', '8 sm'), ('10', '10 sm'), ('15', '15 sm')], max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='panel_type',
+            field=models.CharField(blank=True, choices=[('PIR', 'PIR Panel'), ('PUR', 'PUR Panel')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='parent_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sub_orders', to='orders.order'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='parog_turi',
+            field=models.CharField(blank=True, choices=[('PAROGLI', 'Parogli'), ('PAROGSIZ', 'Parogsiz')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='prepayment',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=15, verbose_name="Zalog (Oldindan to'lov)"),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='start_confirmed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='start_telegram_sent',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='started_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='started_orders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='work_finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='work_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='worker_type',
+            field=models.CharField(choices=[('LIST', 'List Ustasi'), ('ESHIK', 'Eshik Ustasi'), ('LIST_ESHIK', 'List va Eshik Ustasi'), ('PANEL', 'Panel Ustasi'), ('UGOL', 'Ugol Ustasi')], default='LIST', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='zamokli_eshik',
+            field=models.BooleanField(default=False, verbose_name='Zamokli'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='assigned_workers',
+            field=models.ManyToManyField(blank=True, related_name='assigned_orders', to='orders.worker'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='comment',
+            field=models.TextField(blank=True, null=True, verbose_name='Admin izohi'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='customer_name',
+            field=models.CharField(max_length=150, verbose_name='Xaridor Nomi'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Tugallanish muddati'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='finish_image',
+            field=models.ImageField(blank=True, null=True, upload_to='order_photos/finish/'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='order_number',
+            field=models.CharField(editable=False, max_length=50, unique=True, verbose_name='Buyurtma Raqami'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='panel_kvadrat',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='pdf_file',
+            field=models.FileField(blank=True, null=True, upload_to='order_pdfs/', verbose_name='PDF Chizma'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='product_name',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Mahsulot nomi'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='start_image',
+            field=models.ImageField(blank=True, null=True, upload_to='order_photos/start/'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('KIRITILDI', '1. Kiritildi (Admin)'), ('TASDIQLANDI', '2. Tasdiqlandi (Menejer)'), ('RAD_ETILDI', '2. Rad Etildi (Menejer)'), ('USTA_QABUL_QILDI', '3. Usta Qabul Qildi'), ('USTA_BOSHLA', '4. Usta Boshladi'), ('ISHDA', '5. Ishlab Chiqarishda'), ('USTA_TUGATDI', '6. Usta Yakunladi'), ('TAYYOR', '7. Tayyor'), ('BAJARILDI', '8. Bajarildi')], default='KIRITILDI', max_length=30),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=15, verbose_name='Umumiy Narx'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='worker_comment',
+            field=models.TextField(blank=True, null=True, verbose_name='Usta izohi'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='worker_finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Ish yakunlangan vaqt'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='worker_started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Ish boshlangan vaqt'),
+        ),
+        migrations.AlterField(
+            model_name='worker',
+            name='role',
+            field=models.CharField(choices=[('PANEL', 'Panel Ustasi'), ('LIST', 'List Ustasi'), ('ESHIK', 'Eshik Ustasi'), ('UGOL', 'Ugol Ustasi'), ('LIST_ESHIK', 'List va Eshik ustalari')], max_length=50, verbose_name='Usta Roli'),
+        ),
+        migrations.CreateModel(
+            name='TripPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('is_stop', models.BooleanField(default=False)),
+                ('stop_duration', models.DurationField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points', to='orders.drivertrip')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=100)),
+                ('product_type', models.CharField(max_length=50)),
+                ('length', models.FloatField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('area', models.FloatField(default=0)),
+                ('price', models.FloatField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.order')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MaterialTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('IN', 'Kirim (Omborga kirish)'), ('OUT', 'Chiqim (Ombordan chiqish/Sarflanish)')], max_length=3, verbose_name='Harakat turi')),
+                ('quantity_change', models.DecimalField(decimal_places=3, max_digits=10, verbose_name="Miqdordagi o'zgarish")),
+                ('transaction_barcode', models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='Partiya Barcode')),
+                ('received_by', models.CharField(blank=True, max_length=255, null=True, verbose_name='Qabul qiluvchi shaxs/ustaxona')),
+                ('timestamp', models.DateTimeField(auto_now_add=True, verbose_name='Vaqti')),
+                ('notes', models.TextField(blank=True, null=True, verbose_name='Izoh/Sabab')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='orders.material', verbose_name='Material nomi')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='orders.order', verbose_name="Bog'liq buyurtma")),
+                ('performed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Amalga oshirdi')),
+            ],
+            options={
+                'verbose_name': 'Material harakati',
+                'verbose_name_plural': 'Material harakatlari (Tranzaksiyalar)',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GuardPatrol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkpoint_name', models.CharField(max_length=100)),
+                ('patrol_time_slot', models.CharField(max_length=50)),
+                ('image1', models.ImageField(upload_to='patrol/%Y/%m/%d/')),
+                ('image2', models.ImageField(upload_to='patrol/%Y/%m/%d/')),
+                ('image3', models.ImageField(upload_to='patrol/%Y/%m/%d/')),
+                ('image4', models.ImageField(blank=True, null=True, upload_to='patrol/')),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('guard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0017_category_customer_drivertrip_material_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stage',
+            field=models.CharField(choices=[('ASOSIY', 'Asosiy buyurtma'), ('PANEL', 'Panel bosqichi'), ('UGOL', 'Ugol bosqichi'), ('BOSHQA', 'Boshqa bosqich')], db_index=True, default='ASOSIY', max_length=10, verbose_name='Ishlab chiqarish bosqichi'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:12
+
+from django.db import migrations
+from django.db.models import Q
+
+
+PANEL_NAME_Q = (
+    Q(product_name__icontains='panel') |
+    Q(product_name__icontains='панель') |
+    Q(product_name__icontains='панел')
+)
+UGOL_NAME_Q = (
+    Q(product_name__icontains='ugul') |
+    Q(product_name__icontains='ugol') |
+    Q(product_name__icontains='угол') |
+    Q(product_name__icontains='уголь')
+)
+
+
+def backfill_stage(apps, schema_editor):
+    """Mavjud child buyurtmalarga bosqichni worker_type va product_name bo'yicha yozish."""
+    Order = apps.get_model('orders', 'Order')
+    children = Order.objects.filter(parent_order__isnull=False)
+
+    # Keyingi yangilashlar oldingisini ustidan yozadi: worker_type eng ishonchli manba
+    children.update(stage='BOSHQA')
+    children.filter(UGOL_NAME_Q).update(stage='UGOL')
+    children.filter(PANEL_NAME_Q).update(stage='PANEL')
+    children.filter(worker_type='UGOL').update(stage='UGOL')
+    children.filter(worker_type='PANEL').update(stage='PANEL')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0018_order_stage'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stage, migrations.RunPython.noop),
+    ]
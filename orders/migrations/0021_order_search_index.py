@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+SEARCH_FIELDS = (
+    'order_number', 'customer_name', 'customer_unique_id',
+    'product_name', 'comment', 'worker_comment',
+)
+
+PG_SEARCH_VECTOR = "to_tsvector('simple', {})".format(
+    " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+)
+
+
+def create_search_index(apps, schema_editor):
+    """SQLite da FTS5 jadvali, PostgreSQL da GIN indeksi."""
+    vendor = schema_editor.connection.vendor
+    columns = ', '.join(SEARCH_FIELDS)
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS orders_order_fts "
+            f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        source = ', '.join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+        schema_editor.execute(
+            f"INSERT INTO orders_order_fts (rowid, {columns}) SELECT id, {source} FROM orders_order"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS order_search_gin_idx ON orders_order USING GIN ({PG_SEARCH_VECTOR})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS orders_order_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS order_search_gin_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0020_order_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
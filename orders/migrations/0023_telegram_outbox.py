@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0022_order_deadline_breach_alert_sent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.CharField(max_length=64, verbose_name='Chat ID')),
+                ('method', models.CharField(choices=[('sendMessage', 'Matn'), ('sendPhoto', 'Rasm'), ('sendMediaGroup', 'Albom')], default='sendMessage', max_length=20)),
+                ('text', models.TextField(blank=True, verbose_name='Matn / izoh')),
+                ('parse_mode', models.CharField(blank=True, max_length=20)),
+                ('photos', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('PENDING', 'Navbatda'), ('SENT', 'Yuborildi'), ('FAILED', 'Xato (yuborilmadi)')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Telegram xabari',
+                'verbose_name_plural': 'Telegram navbati',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+    ]
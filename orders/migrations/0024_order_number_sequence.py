@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:27
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Har bir yil ketma-ketligi mavjud eng katta ORD-YYYY-NNNN raqamidan davom etadi."""
+    Order = apps.get_model('orders', 'Order')
+    OrderNumberSequence = apps.get_model('orders', 'OrderNumberSequence')
+    pattern = re.compile(r'^ORD-(\d{4})-(\d+)$')
+
+    seeds = {}
+    for number in Order.objects.filter(order_number__startswith='ORD-').values_list('order_number', flat=True).iterator():
+        match = pattern.match(number)
+        if match:
+            year, value = int(match.group(1)), int(match.group(2))
+            seeds[year] = max(seeds.get(year, 0), value)
+
+    OrderNumberSequence.objects.bulk_create([
+        OrderNumberSequence(year=year, last_value=value) for year, value in seeds.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0023_telegram_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('year', models.PositiveSmallIntegerField(primary_key=True, serialize=False, verbose_name='Yil')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Oxirgi berilgan raqam')),
+            ],
+            options={
+                'verbose_name': 'Buyurtma raqami ketma-ketligi',
+                'verbose_name_plural': 'Buyurtma raqami ketma-ketliklari',
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    """Mavjud o'qilmagan xabarlardan hisoblagichlarni to'ldiradi."""
+    Notification = apps.get_model('orders', 'Notification')
+    NotificationCounter = apps.get_model('orders', 'NotificationCounter')
+    rows = Notification.objects.filter(is_read=False).values('user_id').annotate(total=Count('id'))
+    NotificationCounter.objects.bulk_create([
+        NotificationCounter(user_id=row['user_id'], unread=row['total']) for row in rows
+    ])
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('orders', '0024_order_number_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name="O'qilmagan xabarlar")),
+            ],
+            options={
+                'verbose_name': 'Xabarlar hisoblagichi',
+                'verbose_name_plural': 'Xabarlar hisoblagichlari',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0025_notification_unread_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': "O'qilganlik belgisi",
+                'verbose_name_plural': "O'qilganlik belgilari",
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group_name', models.CharField(max_length=150, verbose_name='Guruh nomi')),
+            ],
+            options={
+                'verbose_name': 'Xabar guruhi',
+                'verbose_name_plural': 'Xabar guruhlari',
+            },
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Qabul qiluvchi foydalanuvchi'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('user__isnull', True)), fields=['-created_at'], name='notif_group_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificationtarget',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='targets', to='orders.notification'),
+        ),
+        migrations.AddField(
+            model_name='notificationreceipt',
+            name='notification',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='orders.notification'),
+        ),
+        migrations.AddField(
+            model_name='notificationreceipt',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_receipts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='notificationtarget',
+            index=models.Index(fields=['group_name', 'notification'], name='notif_target_group_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationtarget',
+            constraint=models.UniqueConstraint(fields=('notification', 'group_name'), name='notif_target_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationreceipt',
+            constraint=models.UniqueConstraint(fields=('notification', 'user'), name='notif_receipt_unique'),
+        ),
+    ]
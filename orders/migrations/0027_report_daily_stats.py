@@ -0,0 +1,109 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:42
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    """Mavjud buyurtmalardan kunlik yig'ma jadvallarni to'ldiradi (rebuild_report_stats bilan bir xil)."""
+    Order = apps.get_model('orders', 'Order')
+    OrderDailyStats = apps.get_model('orders', 'OrderDailyStats')
+    WorkerDailyStats = apps.get_model('orders', 'WorkerDailyStats')
+    tz = timezone.get_current_timezone()
+    zero = Decimal('0')
+
+    rows = (
+        Order.objects.annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness')
+        .annotate(
+            order_count=Count('id'),
+            kvadrat_sum=Coalesce(Sum('panel_kvadrat'), zero),
+            revenue_sum=Coalesce(Sum('total_price'), zero),
+            prepayment_sum=Coalesce(Sum('prepayment'), zero),
+        )
+        .order_by()
+    )
+    stats = defaultdict(lambda: [0, zero, zero, zero])
+    for row in rows:
+        key = (row['day'], row['stage'], row['worker_type'], row['status'],
+               row['panel_type'] or '', row['panel_thickness'] or '')
+        for i, name in enumerate(('order_count', 'kvadrat_sum', 'revenue_sum', 'prepayment_sum')):
+            stats[key][i] += row[name]
+    OrderDailyStats.objects.bulk_create([
+        OrderDailyStats(
+            day=day, stage=stage, worker_type=worker_type, status=status,
+            panel_type=panel_type, panel_thickness=panel_thickness,
+            order_count=count, kvadrat_sum=kvadrat, revenue_sum=revenue, prepayment_sum=prepayment,
+        )
+        for (day, stage, worker_type, status, panel_type, panel_thickness), (count, kvadrat, revenue, prepayment)
+        in stats.items()
+    ], batch_size=500)
+
+    worker_rows = (
+        Order.assigned_workers.through.objects
+        .filter(order__status__in=['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR'], order__worker_finished_at__isnull=False)
+        .annotate(day=TruncDate('order__worker_finished_at', tzinfo=tz))
+        .values('day', 'worker_id')
+        .annotate(order_count=Count('order_id'), kvadrat_sum=Coalesce(Sum('order__panel_kvadrat'), zero))
+        .order_by()
+    )
+    WorkerDailyStats.objects.bulk_create([WorkerDailyStats(**row) for row in worker_rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0026_group_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Sana')),
+                ('stage', models.CharField(max_length=10, verbose_name='Bosqich')),
+                ('worker_type', models.CharField(max_length=15, verbose_name='Usta turi')),
+                ('status', models.CharField(max_length=30, verbose_name='Status')),
+                ('panel_type', models.CharField(blank=True, default='', max_length=10, verbose_name='Panel turi')),
+                ('panel_thickness', models.CharField(blank=True, default='', max_length=3, verbose_name='Qalinlik')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Buyurtmalar soni')),
+                ('kvadrat_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Kvadrat (m²)')),
+                ('revenue_sum', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Summa')),
+                ('prepayment_sum', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Zalog')),
+            ],
+            options={
+                'verbose_name': 'Kunlik buyurtma statistikasi',
+                'verbose_name_plural': 'Kunlik buyurtma statistikasi',
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Sana')),
+                ('order_count', models.IntegerField(default=0, verbose_name='Bajarilgan buyurtmalar')),
+                ('kvadrat_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Kvadrat (m²)')),
+                ('worker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='orders.worker', verbose_name='Usta')),
+            ],
+            options={
+                'verbose_name': 'Ustaning kunlik statistikasi',
+                'verbose_name_plural': 'Ustalarning kunlik statistikasi',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailystats',
+            constraint=models.UniqueConstraint(fields=('day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness'), name='order_daily_stats_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='workerdailystats',
+            constraint=models.UniqueConstraint(fields=('day', 'worker'), name='worker_daily_stats_unique'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:46
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_customer_stats(apps, schema_editor):
+    """Mavjud asosiy buyurtmalardan mijozlar statistikasini to'ldiradi (rebuild_customer_stats bilan bir xil)."""
+    Order = apps.get_model('orders', 'Order')
+    CustomerStats = apps.get_model('orders', 'CustomerStats')
+    zero = Decimal('0')
+    rows = (
+        Order.objects.filter(stage='ASOSIY')
+        .values('customer_unique_id')
+        .annotate(
+            display_name=Max('customer_name'),
+            order_count=Count('id'),
+            first_order_at=Min('created_at'),
+            last_order_at=Max('created_at'),
+            total_m2=Coalesce(Sum('panel_kvadrat'), zero),
+            total_billed=Coalesce(Sum('total_price'), zero),
+            total_paid=Coalesce(Sum('prepayment'), zero),
+        )
+        .order_by()
+    )
+    stats = []
+    for row in rows:
+        ratio = float(row['total_paid'] * 100 / row['total_billed']) if row['total_billed'] > 0 else 0.0
+        if row['order_count'] > 5 and ratio > 80:
+            score = 'A'
+        elif row['order_count'] > 2 and ratio > 60:
+            score = 'B'
+        else:
+            score = 'C'
+        stats.append(CustomerStats(payment_ratio=ratio, loyalty_score=score, **row))
+    CustomerStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0027_report_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerStats',
+            fields=[
+                ('customer_unique_id', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Mijoz ID')),
+                ('display_name', models.CharField(blank=True, max_length=150, verbose_name='Xaridor Nomi')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Buyurtmalar soni')),
+                ('first_order_at', models.DateTimeField(blank=True, null=True, verbose_name='Birinchi buyurtma')),
+                ('last_order_at', models.DateTimeField(blank=True, null=True, verbose_name='Oxirgi buyurtma')),
+                ('total_m2', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Jami kvadrat (m²)')),
+                ('total_billed', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Jami summa')),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name="To'langan")),
+                ('payment_ratio', models.FloatField(default=0, verbose_name="To'lov foizi")),
+                ('loyalty_score', models.CharField(choices=[('A', 'Sodiq'), ('B', 'Doimiy'), ('C', 'Oddiy')], default='C', max_length=1, verbose_name='Sodiqlik')),
+            ],
+            options={
+                'verbose_name': 'Mijoz statistikasi',
+                'verbose_name_plural': 'Mijozlar statistikasi',
+                'indexes': [models.Index(fields=['-total_m2'], name='customer_stats_m2_idx'), models.Index(fields=['-total_paid'], name='customer_stats_paid_idx'), models.Index(fields=['-order_count'], name='customer_stats_count_idx'), models.Index(fields=['loyalty_score', '-total_paid'], name='customer_stats_loyalty_idx')],
+            },
+        ),
+        migrations.RunPython(fill_customer_stats, migrations.RunPython.noop),
+    ]
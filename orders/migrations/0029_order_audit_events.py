@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0028_customer_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderAuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_number', models.CharField(blank=True, max_length=50, verbose_name='Buyurtma Raqami')),
+                ('action', models.CharField(choices=[('CREATE', 'Yaratildi'), ('STATUS', "Status o'zgardi"), ('CHANGE', 'Tahrirlandi'), ('DELETE', "O'chirildi")], max_length=10, verbose_name='Amal')),
+                ('from_status', models.CharField(blank=True, max_length=30, verbose_name='Oldingi status')),
+                ('to_status', models.CharField(blank=True, max_length=30, verbose_name='Yangi status')),
+                ('message', models.TextField(blank=True, verbose_name='Tafsilot')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Vaqt')),
+                ('log_entry_id', models.PositiveIntegerField(blank=True, null=True, unique=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_audit_events', to=settings.AUTH_USER_MODEL, verbose_name='Foydalanuvchi')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_events', to='orders.order', verbose_name='Buyurtma')),
+            ],
+            options={
+                'verbose_name': 'Buyurtma jurnali yozuvi',
+                'verbose_name_plural': 'Buyurtmalar jurnali',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['order', 'created_at'], name='audit_order_time_idx'), models.Index(fields=['created_at'], name='audit_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0029_order_audit_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialtransaction',
+            name='client_scan_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Skaner ID'),
+        ),
+    ]
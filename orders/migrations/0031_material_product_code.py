@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+def fill_product_code(apps, schema_editor):
+    """Mavjud materiallar uchun product_code (Material.normalize_code bilan bir xil)."""
+    Material = apps.get_model('orders', 'Material')
+    materials = list(Material.objects.exclude(product_name__isnull=True).exclude(product_name=''))
+    for material in materials:
+        material.product_code = ''.join(material.product_name.split()).upper()
+    Material.objects.bulk_update(materials, ['product_code'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0030_material_transaction_client_scan_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='material',
+            name='product_code',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_product_code, migrations.RunPython.noop),
+    ]
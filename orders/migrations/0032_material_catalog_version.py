@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0031_material_product_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialCatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Joriy versiya')),
+                ('reset_version', models.PositiveBigIntegerField(default=0, verbose_name="To'liq yangilash versiyasi")),
+            ],
+            options={
+                'verbose_name': 'Material katalogi versiyasi',
+                'verbose_name_plural': 'Material katalogi versiyasi',
+            },
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
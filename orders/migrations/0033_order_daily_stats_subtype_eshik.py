@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:16
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def rebuild_order_stats(apps, schema_editor):
+    """OrderDailyStats ni yangi kalitlar bilan qayta quradi (rollups.rebuild_order_stats bilan bir xil)."""
+    Order = apps.get_model('orders', 'Order')
+    OrderDailyStats = apps.get_model('orders', 'OrderDailyStats')
+    tz = timezone.get_current_timezone()
+    zero = Decimal('0')
+    key_fields = (
+        'day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness', 'panel_subtype', 'eshik_turi',
+    )
+    sum_fields = ('order_count', 'kvadrat_sum', 'revenue_sum', 'prepayment_sum')
+
+    rows = (
+        Order.objects.annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values(*key_fields)
+        .annotate(
+            order_count=Count('id'),
+            kvadrat_sum=Coalesce(Sum('panel_kvadrat'), zero),
+            revenue_sum=Coalesce(Sum('total_price'), zero),
+            prepayment_sum=Coalesce(Sum('prepayment'), zero),
+        )
+        .order_by()
+    )
+    stats = defaultdict(lambda: [0, zero, zero, zero])
+    for row in rows:
+        key = (row['day'], row['stage'], row['worker_type'], row['status'],
+               row['panel_type'] or '', row['panel_thickness'] or '',
+               row['panel_subtype'] or '', row['eshik_turi'] or '')
+        for i, name in enumerate(sum_fields):
+            stats[key][i] += row[name]
+    OrderDailyStats.objects.all().delete()
+    OrderDailyStats.objects.bulk_create([
+        OrderDailyStats(**dict(zip(key_fields, key)), **dict(zip(sum_fields, values)))
+        for key, values in stats.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0032_material_catalog_version'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='orderdailystats',
+            name='order_daily_stats_unique',
+        ),
+        migrations.AddField(
+            model_name='orderdailystats',
+            name='eshik_turi',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Eshik turi'),
+        ),
+        migrations.AddField(
+            model_name='orderdailystats',
+            name='panel_subtype',
+            field=models.CharField(blank=True, default='', max_length=20, verbose_name='Panel kichik turi'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailystats',
+            constraint=models.UniqueConstraint(fields=('day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness', 'panel_subtype', 'eshik_turi'), name='order_daily_stats_unique'),
+        ),
+        migrations.RunPython(rebuild_order_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:30
+
+from django.db import migrations
+
+
+def create_active_index(apps, schema_editor):
+    """ActiveOrderManager uchun qisman indeks - faqat PostgreSQL (SQLite uni ishlatmaydi)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS order_active_deadline_idx "
+        "ON orders_order (deadline, created_at) "
+        "WHERE status NOT IN ('BAJARILDI', 'TAYYOR')"
+    )
+
+
+def drop_active_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS order_active_deadline_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0033_order_daily_stats_subtype_eshik'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_active_deadline_idx',
+        ),
+        migrations.RunPython(create_active_index, drop_active_index),
+    ]
@@ -114,6 +114,10 @@ class Material(models.Model):
         verbose_name="Maksimal qoldiq"
     )
     code = models.CharField(max_length=50, unique=True, null=True, blank=True, verbose_name="QR/Shtrix Kod")
+    # product_name ning skaner uchun normallashtirilgan (bo'shliqsiz, katta harfli) nusxasi
+    product_code = models.CharField(max_length=255, blank=True, default='', db_index=True, editable=False)
+    # Katalog versiyasi (orders.catalog): material yoki uning kategoriyasi oxirgi marta o'zgargandagi raqam
+    catalog_version = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
     last_updated = models.DateTimeField(auto_now=True, verbose_name="Oxirgi yangilanish")
 
     class Meta:
@@ -121,6 +125,18 @@ class Material(models.Model):
         verbose_name_plural = "Materiallar (Omborxona)"
         ordering = ['name']
 
+    @staticmethod
+    def normalize_code(value):
+        """Skanerlangan kodni solishtirish uchun: bo'shliqlar olib tashlanadi, katta harf."""
+        return ''.join((value or '').split()).upper()
+
+    def save(self, *args, **kwargs):
+        self.product_code = self.normalize_code(self.product_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'product_name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'product_code'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         base_str = f"{self.name}"
         if self.product_name:
@@ -190,6 +206,15 @@ class Order(models.Model):
         ('10', '10 sm'),
         ('15', '15 sm')
     ]
+
+    # Ishlab chiqarish zanjiridagi bosqich (LIST/ESHIK -> PANEL -> UGOL)
+    STAGE_CHOICES = [
+        ('ASOSIY', 'Asosiy buyurtma'),
+        ('PANEL', 'Panel bosqichi'),
+        ('UGOL', 'Ugol bosqichi'),
+        ('BOSHQA', 'Boshqa bosqich'),
+    ]
+    CHILD_STAGES = ['PANEL', 'UGOL', 'BOSHQA']
     @property
     def remaining_amount(self):
         """
@@ -215,6 +240,10 @@ class Order(models.Model):
     customer_name = models.CharField(max_length=150, verbose_name="Xaridor Nomi")
     
     worker_type = models.CharField(max_length=15, choices=WORKER_TYPE_CHOICES, default='LIST')
+    stage = models.CharField(
+        max_length=10, choices=STAGE_CHOICES, default='ASOSIY', db_index=True,
+        verbose_name="Ishlab chiqarish bosqichi"
+    )
     status = models.CharField(max_length=30, choices=STATUS_CHOICES, default='KIRITILDI')
     
     # Eshik parametrlari
@@ -260,9 +289,77 @@ class Order(models.Model):
     # Optional: agar kerak bo‘lsa log uchun
     start_telegram_sent = models.BooleanField(default=False)
     finish_telegram_sent = models.BooleanField(default=False)
+    # Muddat buzilishi haqida adminlarga xabar yuborilganmi (run_overdue_alerts)
+    deadline_breach_alert_sent = models.BooleanField(default=False, verbose_name="Muddat Buzilganligi Ogohlantirish Yuborildi")
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
+    class Meta:
+        indexes = [
+            # order_list / order_archive: bosqich + status, yangi buyurtmalar birinchi
+            models.Index(fields=['stage', 'status', '-created_at'], name='order_stage_status_idx'),
+            # sales_report_view: bosqich + sana oralig'i
+            models.Index(fields=['stage', 'created_at'], name='order_stage_created_idx'),
+            # warehouse_dashboard / guard_dashboard: status + asosiy buyurtma
+            models.Index(fields=['status', 'parent_order'], name='order_status_parent_idx'),
+            # Muddati o'tganlarni topish (status + deadline)
+            models.Index(fields=['status', 'deadline'], name='order_status_deadline_idx'),
+            # customer_rating / get_customer_orders: mijoz bo'yicha guruhlash
+            models.Index(fields=['customer_unique_id', 'created_at'], name='order_customer_created_idx'),
+            # run_overdue_alerts: hali ogohlantirilmagan buyurtmalar (qisman indeks)
+            models.Index(
+                fields=['deadline'],
+                name='order_breach_pending_idx',
+                condition=models.Q(deadline_breach_alert_sent=False),
+            ),
+            # ActiveOrderManager uchun qisman indeks (order_active_deadline_idx) faqat PostgreSQL da,
+            # migratsiya 0034 da yaratiladi: SQLite parametrli `status IN (?, ?)` ni indeks shartiga moslay olmaydi
+        ]
+
+    # ------------------------------------------------------------------
+    # O'ZGARGAN MAYDONLARNI KUZATISH
+    # Bazadan yuklangan qiymatlar from_db da eslab qolinadi, shuning uchun
+    # save() va signallar eski statusni bilish uchun qayta SELECT qilmaydi.
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _remember_values(self, fields=None):
+        """Joriy qiymatlarni "bazadagi" deb belgilaydi (save/refresh dan keyin)."""
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                loaded[field.attname] = getattr(self, field.attname)
+
+    def is_tracked(self, field_name):
+        """Maydonning bazadagi qiymati ma'lummi (yangi obyekt ham hisoblanadi)."""
+        attname = self._meta.get_field(field_name).attname
+        return self._state.adding or attname in getattr(self, '_loaded_values', {})
+
+    def previous(self, field_name):
+        """Maydonning bazadan yuklangan (oxirgi saqlangan) qiymati; yangi obyekt uchun None."""
+        attname = self._meta.get_field(field_name).attname
+        return getattr(self, '_loaded_values', {}).get(attname)
+
+    def has_changed(self, field_name):
+        attname = self._meta.get_field(field_name).attname
+        if self._state.adding:
+            return getattr(self, attname) is not None
+        loaded = getattr(self, '_loaded_values', {})
+        if attname not in loaded:
+            return True
+        return loaded[attname] != getattr(self, attname)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
     def clean(self):
         super().clean()
         
@@ -303,61 +400,35 @@ class Order(models.Model):
     def save(self, *args, **kwargs):
         # 1. Order Number yaratish
         if not self.order_number:
-            today = timezone.now()
-            year_prefix = today.strftime("%Y")
-            last_order = Order.objects.filter(order_number__startswith=f"ORD-{year_prefix}").order_by('-id').first()
-            num = (int(last_order.order_number.split('-')[-1]) + 1) if last_order else 1
-            self.order_number = f"ORD-{year_prefix}-{num:04d}"
-
-        old_status = Order.objects.filter(pk=self.pk).values_list('status', flat=True).first() if self.pk else None
-        should_create_next = (self.status == 'USTA_TUGATDI' and old_status != 'USTA_TUGATDI')
+            # Yillik ketma-ketlikdan atomar olinadi (prefiks bo'yicha qidiruvsiz, poygasiz)
+            from .numbering import next_order_number
+            self.order_number = next_order_number()
+
+        # Bosqichni yaratilish paytida aniqlash (child buyurtmalar uchun)
+        if self._state.adding and self.parent_order_id and self.stage == 'ASOSIY':
+            self.stage = self.worker_type if self.worker_type in ('PANEL', 'UGOL') else 'BOSHQA'
+
+        # Keyingi bosqich faqat status haqiqatan USTA_TUGATDI ga o'tganda yaratiladi
+        update_fields = kwargs.get('update_fields')
+        should_create_next = (
+            self.status == 'USTA_TUGATDI'
+            and (update_fields is None or 'status' in update_fields)
+        )
+        if should_create_next:
+            if self.is_tracked('status'):
+                should_create_next = self.has_changed('status')
+            else:
+                # Obyekt bazadan yuklanmagan (yoki status kechiktirilgan): eski usul
+                old_status = Order.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+                should_create_next = old_status != 'USTA_TUGATDI'
 
         super().save(*args, **kwargs)
+        self._remember_values(update_fields)
 
-        if should_create_next and not Order.objects.filter(parent_order=self).exists():
-            next_worker_type = None
-            if self.worker_type in ['LIST', 'ESHIK', 'LIST_ESHIK']:
-                next_worker_type = 'PANEL'
-            elif self.worker_type == 'PANEL':
-                next_worker_type = 'UGOL'
-
-            if next_worker_type:
-                from .models import Worker
-                
-                # 1. Yangi sub-order (child) yaratish
-                new_order = Order.objects.create(
-                    customer_unique_id=self.customer_unique_id,
-                    customer_name=self.customer_name,
-                    product_name=f"{self.product_name} ({next_worker_type})",
-                    worker_type=next_worker_type,
-                    parent_order=self,
-                    panel_type=self.panel_type,
-                    panel_subtype=self.panel_subtype,
-                    panel_thickness=self.panel_thickness,
-                    panel_kvadrat=self.panel_kvadrat,
-                    eshik_turi=self.eshik_turi,
-                    pdf_file=self.pdf_file,
-                    # SHU YERNI O'ZGARTIRDIK:
-                    status='TASDIQLANDI',  # Child uchun menejer tasdig'i shart emas
-                    created_by=self.created_by
-                )
-
-                # 2. Ustalarni topish va biriktirish
-                target_workers = Worker.objects.filter(role=next_worker_type)
-                
-                if target_workers.exists():
-                    new_order.assigned_workers.add(*target_workers)
-                    
-                    # 3. Child ustalarga bildirishnoma yuborish (ixtiyoriy)
-                    # Bu orqali usta o'z telefoniga yoki paneliga xabar oladi
-                    for worker in target_workers:
-                        if worker.user:
-                            from .models import Notification # Agar model boshqa joyda bo'lsa
-                            Notification.objects.create(
-                                user=worker.user,
-                                order=new_order,
-                                message=f"Yangi vazifa: №{new_order.order_number} ({next_worker_type}). Ishni boshlashingiz mumkin!"
-                            )
+        if should_create_next:
+            # Keyingi bosqich (child buyurtma, ustalar, bildirishnomalar) bitta tranzaksiyada
+            from .chain import spawn_next_stage
+            spawn_next_stage([self])
 
 from django.db import models
 from django.contrib.auth.models import User
@@ -435,6 +506,14 @@ class MaterialTransaction(models.Model):
         blank=True, 
         verbose_name="Izoh/Sabab"
     )
+    # Skaner ilovasi har bir skan uchun yaratadigan ID: qayta yuborilgan paket ikki marta yozilmaydi
+    client_scan_id = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Skaner ID"
+    )
 
     class Meta:
         verbose_name = "Material harakati"
@@ -443,6 +522,15 @@ class MaterialTransaction(models.Model):
 
     def save(self, *args, **kwargs):
         # 1. Barcode faqat bo'sh bo'lsa va faqat KIRIM bo'lsa yaratilishi kerak
+        self.assign_barcode()
+        
+        # 2. Agar Chiqim (OUT) bo'lsa, barcodeni null saqlash yoki 
+        # chiqim qilingan partiya kodini qo'lda kiritishni talab qilish mumkin.
+        
+        super().save(*args, **kwargs)
+
+    def assign_barcode(self):
+        """KIRIM uchun partiya barcode (bulk_create da save() chaqirilmaydi, shuning uchun alohida)."""
         if not self.transaction_barcode and self.transaction_type == 'IN':
             # Material nomidan xavfsiz foydalanish (probel va belgilarni tozalash)
             import re
@@ -451,11 +539,6 @@ class MaterialTransaction(models.Model):
             # Unikal id qo'shish
             unique_id = uuid.uuid4().hex[:6].upper()
             self.transaction_barcode = f"{prefix}-{unique_id}"
-        
-        # 2. Agar Chiqim (OUT) bo'lsa, barcodeni null saqlash yoki 
-        # chiqim qilingan partiya kodini qo'lda kiritishni talab qilish mumkin.
-        
-        super().save(*args, **kwargs)
 
     def __str__(self):
         # Miqdor yoniga birligini ham qo'shib qo'ysak, adminga oson bo'ladi
@@ -466,7 +549,9 @@ class MaterialTransaction(models.Model):
 # 6. NOTIFICATION MODELI
 # =======================================================================
 class Notification(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', verbose_name="Qabul qiluvchi foydalanuvchi")
+    # user bo'sh bo'lsa - guruh xabari: qabul qiluvchilar NotificationTarget da,
+    # o'qilganlik esa har bir foydalanuvchi uchun NotificationReceipt da saqlanadi
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications', verbose_name="Qabul qiluvchi foydalanuvchi")
     order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Tegishli buyurtma")
     message = models.CharField(max_length=255, verbose_name="Xabar matni")
     is_read = models.BooleanField(default=False, verbose_name="O'qilgan")
@@ -476,10 +561,283 @@ class Notification(models.Model):
         ordering = ['-created_at']
         verbose_name = "Xabarnoma"
         verbose_name_plural = "Xabarnomalar"
+        indexes = [
+            # Foydalanuvchining o'qilmagan xabarlari, yangilari birinchi
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+            # Guruh xabarlari, yangilari birinchi (qisman indeks)
+            models.Index(fields=['-created_at'], name='notif_group_created_idx', condition=models.Q(user__isnull=True)),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}: {self.message[:30]}..."
-    
+        recipient = self.user.username if self.user_id else "Guruh"
+        return f"{recipient}: {self.message[:30]}..."
+
+
+class NotificationTarget(models.Model):
+    """Guruh xabari qaysi guruh(rol)ga tegishli. Xabar bir marta yoziladi, a'zolar soniga bog'liq emas."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='targets')
+    group_name = models.CharField(max_length=150, verbose_name="Guruh nomi")
+
+    class Meta:
+        verbose_name = "Xabar guruhi"
+        verbose_name_plural = "Xabar guruhlari"
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'group_name'], name='notif_target_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['group_name', 'notification'], name='notif_target_group_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group_name} <- {self.notification_id}"
+
+
+class NotificationReceipt(models.Model):
+    """Guruh xabarini foydalanuvchi o'qiganini bildiradi (faqat o'qilganda yoziladi)."""
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='receipts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_receipts')
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "O'qilganlik belgisi"
+        verbose_name_plural = "O'qilganlik belgilari"
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'user'], name='notif_receipt_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} o'qidi {self.notification_id}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Foydalanuvchining o'qilmagan xabarlari soni (denormalizatsiya).
+    Xabar yaratilganda / o'qilganda orders.notifications orqali yangilanadi,
+    shuning uchun belgi (badge) Notification jadvalini sanamaydi.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0, verbose_name="O'qilmagan xabarlar")
+
+    class Meta:
+        verbose_name = "Xabarlar hisoblagichi"
+        verbose_name_plural = "Xabarlar hisoblagichlari"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
+
+
+# =======================================================================
+# TELEGRAM OUTBOX (xabarlar navbati, run_outbox yuboradi)
+# =======================================================================
+class TelegramOutbox(models.Model):
+    METHOD_CHOICES = [
+        ('sendMessage', 'Matn'),
+        ('sendPhoto', 'Rasm'),
+        ('sendMediaGroup', 'Albom'),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', 'Navbatda'),
+        ('SENT', 'Yuborildi'),
+        ('FAILED', 'Xato (yuborilmadi)'),
+    ]
+
+    chat_id = models.CharField(max_length=64, verbose_name="Chat ID")
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='sendMessage')
+    text = models.TextField(blank=True, verbose_name="Matn / izoh")
+    parse_mode = models.CharField(max_length=20, blank=True)
+    # Rasmlar: default storage dagi fayl nomlari (ImageField.name)
+    photos = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Telegram xabari"
+        verbose_name_plural = "Telegram navbati"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_method_display()} -> {self.chat_id} ({self.get_status_display()})"
+
+
+# =======================================================================
+# BUYURTMA RAQAMLARI KETMA-KETLIGI (har yil uchun bitta qator)
+# =======================================================================
+class OrderNumberSequence(models.Model):
+    year = models.PositiveSmallIntegerField(primary_key=True, verbose_name="Yil")
+    last_value = models.PositiveIntegerField(default=0, verbose_name="Oxirgi berilgan raqam")
+
+    class Meta:
+        verbose_name = "Buyurtma raqami ketma-ketligi"
+        verbose_name_plural = "Buyurtma raqami ketma-ketliklari"
+
+    def __str__(self):
+        return f"ORD-{self.year}: {self.last_value}"
+
+
+class MaterialCatalogVersion(models.Model):
+    """Material katalogining joriy versiyasi (bitta qator, orders.catalog oshiradi)."""
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Joriy versiya")
+    # Material o'chirilgandagi versiya: bundan eski versiyali mijozlar katalogni to'liq qayta oladi
+    reset_version = models.PositiveBigIntegerField(default=0, verbose_name="To'liq yangilash versiyasi")
+
+    class Meta:
+        verbose_name = "Material katalogi versiyasi"
+        verbose_name_plural = "Material katalogi versiyasi"
+
+    def __str__(self):
+        return f"Katalog v{self.version}"
+
+
+# =======================================================================
+# HISOBOTLAR UCHUN KUNLIK YIG'MA JADVALLAR (orders.rollups yangilaydi)
+# =======================================================================
+class OrderDailyStats(models.Model):
+    """Kun (yaratilgan sana) × bosqich × usta turi × status × panel × eshik turi bo'yicha yig'indilar."""
+    day = models.DateField(verbose_name="Sana")
+    stage = models.CharField(max_length=10, verbose_name="Bosqich")
+    worker_type = models.CharField(max_length=15, verbose_name="Usta turi")
+    status = models.CharField(max_length=30, verbose_name="Status")
+    panel_type = models.CharField(max_length=10, blank=True, default='', verbose_name="Panel turi")
+    panel_thickness = models.CharField(max_length=3, blank=True, default='', verbose_name="Qalinlik")
+    panel_subtype = models.CharField(max_length=20, blank=True, default='', verbose_name="Panel kichik turi")
+    eshik_turi = models.CharField(max_length=255, blank=True, default='', verbose_name="Eshik turi")
+    order_count = models.IntegerField(default=0, verbose_name="Buyurtmalar soni")
+    kvadrat_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Kvadrat (m²)")
+    revenue_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Summa")
+    prepayment_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Zalog")
+
+    class Meta:
+        verbose_name = "Kunlik buyurtma statistikasi"
+        verbose_name_plural = "Kunlik buyurtma statistikasi"
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness',
+                    'panel_subtype', 'eshik_turi',
+                ],
+                name='order_daily_stats_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.stage}/{self.status}: {self.order_count}"
+
+
+class WorkerDailyStats(models.Model):
+    """Usta × kun (ish yakunlangan sana) bo'yicha bajarilgan buyurtmalar soni va kvadrati."""
+    day = models.DateField(verbose_name="Sana")
+    worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='daily_stats', verbose_name="Usta")
+    order_count = models.IntegerField(default=0, verbose_name="Bajarilgan buyurtmalar")
+    kvadrat_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Kvadrat (m²)")
+
+    class Meta:
+        verbose_name = "Ustaning kunlik statistikasi"
+        verbose_name_plural = "Ustalarning kunlik statistikasi"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'worker'], name='worker_daily_stats_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.worker_id}: {self.order_count}"
+
+
+class OrderAuditEvent(models.Model):
+    """
+    Buyurtma jurnali: yaratish, status o'tishlari va o'chirish. LogEntry dan
+    farqli o'laroq buyurtmaga butun sonli FK bilan bog'langan va (order, vaqt),
+    (vaqt) bo'yicha indekslangan. orders.audit yozadi.
+    """
+    ACTION_CHOICES = [
+        ('CREATE', 'Yaratildi'),
+        ('STATUS', "Status o'zgardi"),
+        ('CHANGE', 'Tahrirlandi'),
+        ('DELETE', "O'chirildi"),
+    ]
+
+    # Buyurtma o'chirilsa ham jurnal qoladi (raqami order_number da)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_events', verbose_name="Buyurtma")
+    order_number = models.CharField(max_length=50, blank=True, verbose_name="Buyurtma Raqami")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_audit_events', verbose_name="Foydalanuvchi")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name="Amal")
+    from_status = models.CharField(max_length=30, blank=True, verbose_name="Oldingi status")
+    to_status = models.CharField(max_length=30, blank=True, verbose_name="Yangi status")
+    message = models.TextField(blank=True, verbose_name="Tafsilot")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Vaqt")
+    # LogEntry dan ko'chirilgan yozuvlar (backfill_order_audit qayta ishga tushirilsa takrorlanmaydi)
+    log_entry_id = models.PositiveIntegerField(null=True, blank=True, unique=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = "Buyurtma jurnali yozuvi"
+        verbose_name_plural = "Buyurtmalar jurnali"
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='audit_order_time_idx'),
+            models.Index(fields=['created_at'], name='audit_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_number} {self.get_action_display()} ({self.created_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def from_status_display(self):
+        return dict(Order.STATUS_CHOICES).get(self.from_status, self.from_status)
+
+    @property
+    def to_status_display(self):
+        return dict(Order.STATUS_CHOICES).get(self.to_status, self.to_status)
+
+
+class CustomerStats(models.Model):
+    """
+    Mijoz bo'yicha asosiy buyurtmalar yig'indisi (mijozlar reytingi uchun).
+    orders.customers Order saqlanganda / o'chirilganda shu mijoz qatorini qayta hisoblaydi.
+    """
+    LOYALTY_CHOICES = [
+        ('A', 'Sodiq'),
+        ('B', 'Doimiy'),
+        ('C', 'Oddiy'),
+    ]
+
+    customer_unique_id = models.CharField(max_length=50, primary_key=True, verbose_name="Mijoz ID")
+    display_name = models.CharField(max_length=150, blank=True, verbose_name="Xaridor Nomi")
+    order_count = models.PositiveIntegerField(default=0, verbose_name="Buyurtmalar soni")
+    first_order_at = models.DateTimeField(null=True, blank=True, verbose_name="Birinchi buyurtma")
+    last_order_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi buyurtma")
+    total_m2 = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Jami kvadrat (m²)")
+    total_billed = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Jami summa")
+    total_paid = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="To'langan")
+    payment_ratio = models.FloatField(default=0, verbose_name="To'lov foizi")
+    loyalty_score = models.CharField(max_length=1, choices=LOYALTY_CHOICES, default='C', verbose_name="Sodiqlik")
+
+    class Meta:
+        verbose_name = "Mijoz statistikasi"
+        verbose_name_plural = "Mijozlar statistikasi"
+        indexes = [
+            # Reyting sahifasidagi TOP-N ro'yxatlar
+            models.Index(fields=['-total_m2'], name='customer_stats_m2_idx'),
+            models.Index(fields=['-total_paid'], name='customer_stats_paid_idx'),
+            models.Index(fields=['-order_count'], name='customer_stats_count_idx'),
+            models.Index(fields=['loyalty_score', '-total_paid'], name='customer_stats_loyalty_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.display_name or self.customer_unique_id}: {self.order_count}"
+
+    @property
+    def avg_order_value(self):
+        return self.total_billed / self.order_count if self.order_count else 0
+
+    @property
+    def m2_per_order(self):
+        return self.total_m2 / self.order_count if self.order_count else 0
+
 
 
 from django.db import models
@@ -0,0 +1,358 @@
+# orders/notifications.py
+"""
+Bildirishnomalarni ommaviy yuborish.
+
+Ikki xil xabar bor:
+
+- shaxsiy (Notification.user to'ldirilgan) - o'qilganlik `is_read` da;
+- guruh xabari (user bo'sh) - bir marta yoziladi, qaysi guruh(rol)larga
+  tegishliligi NotificationTarget da, har bir foydalanuvchi o'qiganda esa
+  NotificationReceipt qatori qo'shiladi. Menejerlar yoki adminlar guruhiga
+  yuborilgan xabar a'zolar soniga qarab ko'paymaydi.
+
+notify() guruh nomlari / Group larni guruh xabariga, qolgan qabul
+qiluvchilarni (foydalanuvchilar, ustalar) shaxsiy xabarlarga aylantiradi.
+Guruh a'zosi bo'lgan foydalanuvchi shaxsiy nusxa olmaydi.
+
+Har bir foydalanuvchining o'qilmagan xabarlari soni NotificationCounter da
+saqlanadi: xabar yaratilganda oshiriladi, o'qilganda kamaytiriladi. Shuning
+uchun belgi (badge) uchun Notification jadvalida COUNT bajarilmaydi.
+Foydalanuvchi guruhga qo'shilganda yoki chiqarilganda uning hisoblagichi
+qayta hisoblanadi (guruhning eski xabarlari inboxda paydo bo'ladi / yo'qoladi).
+Xabarlarni faqat shu moduldagi funksiyalar orqali yaratish / o'qish kerak
+(bitta-bitta .create() / .delete() signal orqali hisobga olinadi; admin
+orqali qo'lda tahrirlangandan keyin `rebuild_notification_counters`).
+"""
+from collections import Counter
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    Notification, NotificationCounter, NotificationReceipt, NotificationTarget, Worker,
+)
+from .roles import get_group_names
+
+LATEST_LIMIT = 5
+
+# Superuser bu guruhda bo'lmasa ham uning xabarlarini oladi (is_in_group bilan bir xil)
+SUPERUSER_GROUP = 'Glavniy Admin'
+
+
+def resolve_recipient_ids(targets):
+    """
+    Qabul qiluvchilarni foydalanuvchi id lari to'plamiga aylantiradi.
+
+    targets elementlari: User, user id (int), guruh nomi (str), Group,
+    Worker yoki User/Worker QuerySet. Guruhlar va querysetlar bitta
+    so'rovda ochiladi; faqat User/id berilsa, bazaga murojaat qilinmaydi.
+    """
+    if targets is None or isinstance(targets, (User, Group, Worker, QuerySet, str, int)):
+        targets = [targets] if targets is not None else []
+
+    user_ids = set()
+    lookup = Q()
+    for target in targets:
+        if target is None:
+            continue
+        if isinstance(target, User):
+            user_ids.add(target.pk)
+        elif isinstance(target, int):
+            user_ids.add(target)
+        elif isinstance(target, Worker):
+            if target.user_id:
+                user_ids.add(target.user_id)
+        elif isinstance(target, str):
+            lookup |= Q(groups__name=target)
+        elif isinstance(target, Group):
+            lookup |= Q(groups=target)
+        elif isinstance(target, QuerySet) and target.model is Worker:
+            lookup |= Q(worker_profile__in=target)
+        elif isinstance(target, QuerySet) and target.model is User:
+            lookup |= Q(pk__in=target)
+        else:
+            raise TypeError(f"Noma'lum qabul qiluvchi turi: {type(target).__name__}")
+
+    if lookup:
+        user_ids.update(User.objects.filter(lookup).values_list('pk', flat=True).distinct())
+    return user_ids
+
+
+def split_group_targets(targets):
+    """targets ni (guruh nomlari, qolgan qabul qiluvchilar) ga ajratadi."""
+    if targets is None or isinstance(targets, (User, Group, Worker, QuerySet, str, int)):
+        targets = [targets] if targets is not None else []
+
+    group_names, others = set(), []
+    for target in targets:
+        if isinstance(target, str):
+            group_names.add(target)
+        elif isinstance(target, Group):
+            group_names.add(target.name)
+        else:
+            others.append(target)
+    return sorted(group_names), others
+
+
+def group_member_ids(group_names):
+    """Guruh(lar)ning faol a'zolari id lari (bitta so'rov)."""
+    if not group_names:
+        return set()
+    lookup = Q(groups__name__in=group_names)
+    if SUPERUSER_GROUP in group_names:
+        lookup |= Q(is_superuser=True)
+    return set(User.objects.filter(lookup, is_active=True).values_list('pk', flat=True).distinct())
+
+
+def inbox_group_names(user):
+    """Foydalanuvchi ko'radigan guruh xabarlari nomlari (so'rov ichida keshlangan)."""
+    names = set(get_group_names(user))
+    if user.is_superuser:
+        names.add(SUPERUSER_GROUP)
+    return sorted(names)
+
+
+def notify(users_or_groups, order, message, exclude=None):
+    """
+    Guruhlarga bitta guruh xabari, qolganlarga bittadan shaxsiy xabar yozadi
+    (bir nechta guruhda bo'lsa ham har kim xabarni bir marta ko'radi).
+    Yaratilgan Notification lar ro'yxatini qaytaradi; qabul qiluvchi
+    topilmasa bo'sh ro'yxat.
+    """
+    group_names, others = split_group_targets(users_or_groups)
+    user_ids = resolve_recipient_ids(others)
+    excluded = resolve_recipient_ids(exclude) if exclude else set()
+
+    with transaction.atomic():
+        created, members = create_group_notifications([(order, message)], group_names, exclude=excluded)
+        user_ids -= members | excluded
+        created += create_notifications([
+            Notification(user_id=user_id, order=order, message=message)
+            for user_id in sorted(user_ids)
+        ])
+    return created
+
+
+# ======================== YARATISH VA HISOBLAGICH ========================
+
+def create_notifications(notifications, batch_size=None):
+    """Shaxsiy xabarlarni bulk_create bilan yozadi va hisoblagichlarni oshiradi (bitta tranzaksiya)."""
+    if not notifications:
+        return []
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        bump_unread(Counter(n.user_id for n in created if not n.is_read))
+
+    from .live import publish_notifications
+    publish_notifications(created)
+    return created
+
+
+def create_group_notifications(items, group_names, exclude=(), batch_size=None):
+    """
+    items: [(order, message), ...]. Har biri uchun bitta guruh xabari yoziladi.
+    exclude dagi a'zolar uchun xabar darhol o'qilgan deb belgilanadi.
+    (yaratilgan xabarlar, xabarni oladigan a'zolar id lari) qaytaradi.
+    """
+    members = group_member_ids(group_names)
+    if not items or not members:
+        return [], set()
+    excluded = members & set(exclude)
+    members -= excluded
+
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(
+            [Notification(order=order, message=message) for order, message in items], batch_size=batch_size,
+        )
+        NotificationTarget.objects.bulk_create([
+            NotificationTarget(notification=notification, group_name=name)
+            for notification in created
+            for name in group_names
+        ], batch_size=batch_size)
+        if excluded:
+            NotificationReceipt.objects.bulk_create([
+                NotificationReceipt(notification=notification, user_id=user_id)
+                for notification in created
+                for user_id in excluded
+            ], batch_size=batch_size)
+        bump_unread({user_id: len(created) for user_id in members})
+
+    from .live import publish_notifications
+    publish_notifications(created, group_names)
+    return created, members
+
+
+def bump_unread(counts):
+    """counts: {user_id: qo'shiladigan son}. Yo'q hisoblagichlar yaratiladi, keyin UPDATE."""
+    counts = {user_id: n for user_id, n in counts.items() if n}
+    if not counts:
+        return
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in counts], ignore_conflicts=True,
+    )
+    # Odatda hamma bir xil son oladi: har bir xil qiymat uchun bitta UPDATE
+    by_amount = {}
+    for user_id, n in counts.items():
+        by_amount.setdefault(n, []).append(user_id)
+    for n, user_ids in by_amount.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + n)
+
+
+def _decrement_unread(user_ids, n=1):
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=Greatest(F('unread') - n, 0))
+
+
+def unread_count(user):
+    """O'qilmagan xabarlar soni - bitta PK bo'yicha o'qish."""
+    if user is None or not user.is_authenticated:
+        return 0
+    return NotificationCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first() or 0
+
+
+# ======================== INBOX VA O'QISH ========================
+
+def group_inbox(user, unread_only=False):
+    """Foydalanuvchi guruhlariga yuborilgan xabarlar (read_by_me izohi bilan)."""
+    queryset = (
+        Notification.objects.filter(user__isnull=True)
+        .filter(Exists(NotificationTarget.objects.filter(
+            notification=OuterRef('pk'), group_name__in=inbox_group_names(user),
+        )))
+        .annotate(read_by_me=Exists(NotificationReceipt.objects.filter(notification=OuterRef('pk'), user=user)))
+    )
+    if unread_only:
+        queryset = queryset.filter(read_by_me=False)
+    return queryset
+
+
+def latest_notifications(user, limit=LATEST_LIMIT, unread_only=True):
+    """
+    Oxirgi xabarlar: shaxsiy va guruh xabarlari alohida (har biri o'z
+    indeksidan, `limit` tadan) olinib, vaqt bo'yicha birlashtiriladi.
+    Guruh xabarlarida is_read foydalanuvchining o'qiganlik belgisidan olinadi.
+    """
+    direct = Notification.objects.filter(user=user)
+    if unread_only:
+        direct = direct.filter(is_read=False)
+    direct = list(direct.select_related('order').order_by('-created_at', '-id')[:limit])
+
+    grouped = list(
+        group_inbox(user, unread_only).select_related('order').order_by('-created_at', '-id')[:limit]
+    )
+    for notification in grouped:
+        notification.is_read = notification.read_by_me
+
+    merged = sorted(direct + grouped, key=lambda n: (n.created_at, n.pk), reverse=True)
+    return merged[:limit]
+
+
+def mark_read(user, notification_id):
+    """Bitta xabarni o'qilgan qiladi. Haqiqatan o'zgargan bo'lsa True."""
+    with transaction.atomic():
+        updated = Notification.objects.filter(pk=notification_id, user=user, is_read=False).update(is_read=True)
+        if not updated:
+            if not group_inbox(user).filter(pk=notification_id).exists():
+                return False
+            _, updated = NotificationReceipt.objects.get_or_create(notification_id=notification_id, user=user)
+        if updated:
+            _decrement_unread([user.pk])
+    return bool(updated)
+
+
+def mark_all_read(user):
+    """
+    Shaxsiy xabarlar bitta UPDATE bilan, guruh xabarlari bitta o'qilganlik
+    belgilari INSERT i bilan o'qilgan qilinadi. O'zgargan xabarlar soni.
+    """
+    with transaction.atomic():
+        updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+        group_ids = list(group_inbox(user, unread_only=True).values_list('pk', flat=True))
+        NotificationReceipt.objects.bulk_create(
+            [NotificationReceipt(notification_id=pk, user=user) for pk in group_ids], ignore_conflicts=True,
+        )
+        NotificationCounter.objects.filter(user_id=user.pk).update(unread=0)
+    return updated + len(group_ids)
+
+
+def rebuild_unread_counters():
+    """Hisoblagichlarni xabarlar jadvalidan qayta hisoblaydi. Foydalanuvchilar sonini qaytaradi."""
+    with transaction.atomic():
+        NotificationCounter.objects.all().delete()
+        counts = Counter({
+            row['user_id']: row['total']
+            for row in Notification.objects.filter(user__isnull=False, is_read=False)
+            .values('user_id').annotate(total=Count('id'))
+        })
+        # Guruh xabarlari: har bir a'zo uchun alohida so'rov (texnik xizmat buyrug'i)
+        group_names = list(NotificationTarget.objects.values_list('group_name', flat=True).distinct())
+        for user in User.objects.filter(pk__in=group_member_ids(group_names)):
+            counts[user.pk] += group_inbox(user, unread_only=True).count()
+        counters = NotificationCounter.objects.bulk_create([
+            NotificationCounter(user_id=user_id, unread=n) for user_id, n in counts.items() if n
+        ])
+    return len(counters)
+
+
+def refresh_unread_counters(user_ids):
+    """Berilgan foydalanuvchilar hisoblagichlarini xabarlar jadvalidan qayta hisoblaydi."""
+    users = list(User.objects.filter(pk__in=user_ids))
+    if not users:
+        return
+    direct = dict(
+        Notification.objects.filter(user__in=users, is_read=False)
+        .values('user_id').annotate(total=Count('id')).values_list('user_id', 'total')
+    )
+    with transaction.atomic():
+        for user in users:
+            unread = direct.get(user.pk, 0) + group_inbox(user, unread_only=True).count()
+            NotificationCounter.objects.update_or_create(user_id=user.pk, defaults={'unread': unread})
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Guruh keshi orders.roles da bekor qilinadi (u oldin ulangan), bu yerda faqat hisoblagich
+    if action == 'pre_clear' and reverse:
+        # group.user_set.clear(): post_clear da pk_set bo'sh, a'zolarni oldindan eslab qolamiz
+        instance._cleared_member_ids = set(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == 'post_clear':
+        user_ids = instance.__dict__.pop('_cleared_member_ids', ())
+    else:
+        user_ids = pk_set
+    refresh_unread_counters(user_ids)
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, raw=False, **kwargs):
+    # bulk_create signal yubormaydi - ular create_notifications da hisoblanadi
+    if created and not raw and instance.user_id and not instance.is_read:
+        bump_unread({instance.user_id: 1})
+
+        from .live import publish_notifications
+        publish_notifications([instance])
+
+
+@receiver(pre_delete, sender=Notification)
+def group_notification_deleting(sender, instance, **kwargs):
+    # Guruhlar va belgilar kaskad bilan o'chmasidan oldin o'qimagan a'zolarni topamiz
+    if instance.user_id:
+        return
+    members = group_member_ids(list(instance.targets.values_list('group_name', flat=True)))
+    members -= set(instance.receipts.values_list('user_id', flat=True))
+    if members:
+        _decrement_unread(members)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if instance.user_id and not instance.is_read:
+        _decrement_unread([instance.user_id])
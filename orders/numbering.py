@@ -0,0 +1,56 @@
+# orders/numbering.py
+"""
+Buyurtma raqamlarini (ORD-YYYY-NNNN) berish.
+
+Har bir yil uchun OrderNumberSequence jadvalida bitta qator bor. Raqam
+olish - bitta `UPDATE ... SET last_value = last_value + N` so'rovi: baza
+qatorni tranzaksiya oxirigacha qulflaydi, shuning uchun parallel
+order_create chaqiruvlari bir xil raqam ololmaydi. Oxirgi buyurtmani
+prefiks bo'yicha qidirish ham kerak emas.
+
+Bir nechta buyurtma birdaniga yaratilsa (bulk_create), `reserve_order_numbers`
+bitta so'rov bilan N ta ketma-ket raqamni band qiladi.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OrderNumberSequence
+
+
+def format_order_number(year, value):
+    return f"ORD-{year}-{value:04d}"
+
+
+def reserve_order_numbers(count=1, year=None):
+    """`count` ta ketma-ket buyurtma raqamini band qiladi va ro'yxat qilib qaytaradi."""
+    if count < 1:
+        return []
+    year = year or timezone.localdate().year
+
+    with transaction.atomic():
+        updated = OrderNumberSequence.objects.filter(year=year).update(last_value=F('last_value') + count)
+        if not updated:
+            # Yilning birinchi buyurtmasi: qatorni yaratamiz, parallel jarayon
+            # bizdan oldin yaratgan bo'lsa, oddiy UPDATE ga qaytamiz
+            try:
+                with transaction.atomic():
+                    OrderNumberSequence.objects.create(year=year, last_value=count)
+            except IntegrityError:
+                OrderNumberSequence.objects.filter(year=year).update(last_value=F('last_value') + count)
+        last_value = OrderNumberSequence.objects.filter(year=year).values_list('last_value', flat=True).get()
+
+    return [format_order_number(year, value) for value in range(last_value - count + 1, last_value + 1)]
+
+
+def next_order_number(year=None):
+    return reserve_order_numbers(1, year)[0]
+
+
+def assign_order_numbers(orders):
+    """bulk_create dan oldin raqamsiz buyurtmalarga raqam beradi (save() chaqirilmaydi)."""
+    pending = [order for order in orders if not order.order_number]
+    for order, number in zip(pending, reserve_order_numbers(len(pending))):
+        order.order_number = number
+    return orders
+
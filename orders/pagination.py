@@ -0,0 +1,83 @@
+# orders/pagination.py
+"""
+Buyurtmalar ro'yxatlari uchun kursorli (keyset) sahifalash.
+
+OFFSET o'rniga oxirgi ko'rsatilgan qatorning (created_at, id) juftligidan
+keyingi qatorlar olinadi, shuning uchun arxiv qanchalik katta bo'lmasin,
+har bir sahifa (created_at) indeksidan bir xil tezlikda o'qiladi.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db.models import Q
+
+PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+KEYSET_ORDERING = ('-created_at', '-id')
+
+
+@dataclass
+class KeysetPage:
+    rows: list = field(default_factory=list)
+    next_cursor: str = ''
+
+    @property
+    def has_more(self):
+        return bool(self.next_cursor)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+
+def encode_cursor(obj):
+    """Qatorning (created_at, id) juftligini URL uchun xavfsiz satrga aylantiradi."""
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Kursorni (created_at, id) ga qaytaradi. Noto'g'ri kursor uchun None."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_page_size(value, default=PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_paginate(queryset, cursor=None, page_size=PAGE_SIZE):
+    """
+    Querysetdan kursordan keyingi `page_size` ta qatorni qaytaradi.
+    Bitta qo'shimcha qator olinadi: u mavjud bo'lsa keyingi sahifa bor.
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    position = decode_cursor(cursor)
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return KeysetPage(rows, encode_cursor(rows[-1]))
+    return KeysetPage(rows)
@@ -0,0 +1,114 @@
+# orders/roles.py
+"""
+Foydalanuvchi guruhlari (rollari) ni so'rov davomida bir marta yuklash.
+
+GroupNamesMiddleware foydalanuvchining guruh nomlarini bitta so'rov bilan
+`request.user.group_names` (frozenset) ga yozadi, `is_in_group` esa shu
+to'plamdan foydalanadi. Shunday qilib sahifadagi 5-10 ta rol tekshiruvi
+bazaga qo'shimcha so'rov yubormaydi.
+
+settings.ROLE_CACHE_TIMEOUT > 0 bo'lsa, guruhlar so'rovlar orasida ham
+keshda saqlanadi (bir nechta jarayon bo'lsa umumiy kesh, masalan Redis,
+kerak). User.groups o'zgarganda (m2m_changed) yoki Group saqlanganda /
+o'chirilganda kesh bekor qilinadi.
+"""
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+GROUP_NAMES_ATTR = 'group_names'
+CACHE_VERSION_KEY = 'roles:groups:version'
+
+
+def _cache_timeout():
+    return getattr(settings, 'ROLE_CACHE_TIMEOUT', 0)
+
+
+def _cache_key(user_id):
+    version = cache.get_or_set(CACHE_VERSION_KEY, 1, None)
+    return f'roles:groups:{version}:{user_id}'
+
+
+def get_group_names(user):
+    """Foydalanuvchi guruhlari nomlari (frozenset). Bir foydalanuvchi obyekti uchun bir marta so'raladi."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    names = getattr(user, GROUP_NAMES_ATTR, None)
+    if names is not None:
+        return names
+
+    timeout = _cache_timeout()
+    key = _cache_key(user.pk) if timeout else None
+    if key:
+        names = cache.get(key)
+
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        if key:
+            cache.set(key, names, timeout)
+
+    setattr(user, GROUP_NAMES_ATTR, names)
+    return names
+
+
+def is_in_group(user, group_name):
+    """Foydalanuvchi berilgan guruhda mavjudligini tekshiradi."""
+    if user is None or user.is_anonymous:
+        return False
+
+    if user.is_superuser and group_name == 'Glavniy Admin':
+        return True
+
+    return group_name in get_group_names(user)
+
+
+def invalidate_user_groups(user_id):
+    if _cache_timeout():
+        cache.delete(_cache_key(user_id))
+
+
+def invalidate_all_groups():
+    """Barcha foydalanuvchilar keshini versiyani oshirish orqali bekor qiladi."""
+    if _cache_timeout():
+        try:
+            cache.incr(CACHE_VERSION_KEY)
+        except ValueError:
+            cache.set(CACHE_VERSION_KEY, 1, None)
+
+
+class GroupNamesMiddleware:
+    """Kirgan foydalanuvchining guruhlarini `request.user.group_names` ga yuklaydi."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            get_group_names(user)
+        return self.get_response(request)
+
+
+# ======================== KESHNI BEKOR QILISH ========================
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        # group.user_set.add(...) - bir nechta foydalanuvchi o'zgaradi
+        invalidate_all_groups()
+    else:
+        invalidate_user_groups(instance.pk)
+        # Shu obyektdagi so'rov ichidagi nusxa ham eskirgan
+        instance.__dict__.pop(GROUP_NAMES_ATTR, None)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    invalidate_all_groups()
@@ -0,0 +1,352 @@
+# orders/rollups.py
+"""
+Hisobotlar uchun kunlik yig'ma (rollup) jadvallar.
+
+OrderDailyStats  - kun (created_at, mahalliy sana) × bosqich × usta turi ×
+                   status × panel turi/qalinligi/kichik turi × eshik turi:
+                   soni, m², summa, zalog.
+WorkerDailyStats - usta × kun (worker_finished_at): bajarilgan buyurtmalar
+                   (ARCHIVE_STATUSES) soni va m².
+
+Jadvallar Order o'zgarishlaridan farq (delta) bilan yangilanadi: buyurtmaning
+eski hissasi ayriladi, yangisi qo'shiladi. Har bir kalit uchun bitta
+`UPDATE ... SET x = x + d`, qator hali bo'lmasa INSERT. Eski qiymatlar
+Order._loaded_values dan olinadi, shuning uchun qo'shimcha SELECT yo'q.
+Signal yubormaydigan joylar (bulk_create, queryset.update) `apply_changes`
+ni o'zlari chaqiradi (orders.chain).
+
+Hisobotlar bir yillik oraliq uchun ham bir necha yuz qatorni o'qiydi.
+Jadvallar Order dan `manage.py rebuild_report_stats` bilan qayta quriladi
+(masalan, bazaga qo'lda o'zgartirish kiritilgandan keyin).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .dashboard import ARCHIVE_STATUSES
+from .models import Order, OrderDailyStats, WorkerDailyStats
+
+# Yig'indilarga ta'sir qiluvchi Order maydonlari
+ORDER_FIELDS = (
+    'created_at', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness',
+    'panel_subtype', 'eshik_turi', 'panel_kvadrat', 'total_price', 'prepayment', 'worker_finished_at',
+)
+ORDER_KEY_FIELDS = (
+    'day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness', 'panel_subtype', 'eshik_turi',
+)
+ORDER_SUM_FIELDS = ('order_count', 'kvadrat_sum', 'revenue_sum', 'prepayment_sum')
+WORKER_SUM_FIELDS = ('order_count', 'kvadrat_sum')
+
+ZERO = Decimal('0')
+
+
+def _decimal(value):
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+# ======================== BUYURTMA HISSASI ========================
+
+def snapshot(order):
+    """Buyurtmaning joriy (saqlanadigan) qiymatlari."""
+    return {name: getattr(order, name) for name in ORDER_FIELDS}
+
+
+def previous_snapshot(order):
+    """
+    Bazadagi qiymatlar: from_db da eslab qolinganlar, aks holda bitta SELECT.
+    Bazada hali yo'q obyekt uchun None.
+    """
+    if order.pk is None:
+        return None
+    if not order._state.adding and all(order.is_tracked(name) for name in ORDER_FIELDS):
+        return {name: order.previous(name) for name in ORDER_FIELDS}
+    # Order(pk=...) kabi qo'lda yasalgan obyekt: qator bazada bo'lishi mumkin
+    return Order.objects.filter(pk=order.pk).values(*ORDER_FIELDS).first()
+
+
+def _order_key(values):
+    return (
+        timezone.localdate(values['created_at']),
+        values['stage'],
+        values['worker_type'],
+        values['status'],
+        values['panel_type'] or '',
+        values['panel_thickness'] or '',
+        values['panel_subtype'] or '',
+        values['eshik_turi'] or '',
+    )
+
+
+def _order_amounts(values):
+    return (
+        1,
+        _decimal(values['panel_kvadrat']),
+        _decimal(values['total_price']),
+        _decimal(values['prepayment']),
+    )
+
+
+def _worker_entry(values):
+    """Ustalar hisobotiga tushadigan bo'lsa (kun, m²), aks holda None."""
+    if values is None or values['status'] not in ARCHIVE_STATUSES or not values['worker_finished_at']:
+        return None
+    return timezone.localdate(values['worker_finished_at']), _decimal(values['panel_kvadrat'])
+
+
+# ======================== YANGILASH ========================
+
+def _add(model, lookup, increments):
+    """Qatorga qiymatlarni qo'shadi (UPDATE F + d), qator bo'lmasa yaratadi."""
+    if not any(increments.values()):
+        return
+    updates = {name: F(name) + value for name, value in increments.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **increments)
+    except IntegrityError:
+        # Parallel so'rov shu qatorni hozirgina yaratdi
+        model.objects.filter(**lookup).update(**updates)
+
+
+def _assigned_worker_ids(order_ids):
+    workers = defaultdict(list)
+    rows = Order.assigned_workers.through.objects.filter(order_id__in=order_ids).values_list('order_id', 'worker_id')
+    for order_id, worker_id in rows:
+        workers[order_id].append(worker_id)
+    return workers
+
+
+def _add_worker_entries(entries):
+    """entries: (worker_id, (kun, m²), ishora) lar - kalit bo'yicha yig'ib yoziladi."""
+    deltas = defaultdict(lambda: [0, ZERO])
+    for worker_id, (day, kvadrat), sign in entries:
+        delta = deltas[(day, worker_id)]
+        delta[0] += sign
+        delta[1] += sign * kvadrat
+    for (day, worker_id), values in deltas.items():
+        _add(WorkerDailyStats, {'day': day, 'worker_id': worker_id}, dict(zip(WORKER_SUM_FIELDS, values)))
+
+
+def apply_changes(changes):
+    """
+    changes: (order_id, eski, yangi) uchliklari; eski/yangi - snapshot() yoki
+    None (buyurtma yaratildi / o'chirildi). Farqlar kalit bo'yicha yig'iladi,
+    shuning uchun ko'p buyurtma o'zgarsa ham har bir kalitga bitta UPDATE ketadi.
+    """
+    order_deltas = defaultdict(lambda: [0, ZERO, ZERO, ZERO])
+    worker_changes = []
+    for order_id, old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            delta = order_deltas[_order_key(values)]
+            for i, amount in enumerate(_order_amounts(values)):
+                delta[i] += sign * amount
+        old_entry, new_entry = _worker_entry(old), _worker_entry(new)
+        if old_entry != new_entry:
+            worker_changes.append((order_id, old_entry, new_entry))
+
+    for key, values in order_deltas.items():
+        _add(OrderDailyStats, dict(zip(ORDER_KEY_FIELDS, key)), dict(zip(ORDER_SUM_FIELDS, values)))
+
+    if worker_changes:
+        workers = _assigned_worker_ids([order_id for order_id, _, _ in worker_changes])
+        entries = []
+        for order_id, old_entry, new_entry in worker_changes:
+            for worker_id in workers.get(order_id, ()):
+                if old_entry:
+                    entries.append((worker_id, old_entry, -1))
+                if new_entry:
+                    entries.append((worker_id, new_entry, 1))
+        _add_worker_entries(entries)
+
+
+def record_created(orders):
+    """bulk_create qilingan buyurtmalarni hisobga oladi."""
+    apply_changes([(order.pk, None, snapshot(order)) for order in orders])
+
+
+# ======================== QAYTA QURISH ========================
+
+def rebuild_order_stats():
+    """OrderDailyStats ni Order jadvalidan qaytadan hisoblaydi. Yozilgan qatorlar sonini qaytaradi."""
+    tz = timezone.get_current_timezone()
+    rows = (
+        Order.objects
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values(*ORDER_KEY_FIELDS)
+        .annotate(
+            order_count=Count('id'),
+            kvadrat_sum=Coalesce(Sum('panel_kvadrat'), ZERO),
+            revenue_sum=Coalesce(Sum('total_price'), ZERO),
+            prepayment_sum=Coalesce(Sum('prepayment'), ZERO),
+        )
+        .order_by()
+    )
+    stats = defaultdict(lambda: [0, ZERO, ZERO, ZERO])
+    for row in rows:
+        # NULL va '' panel / eshik turlari bitta kalitga tushadi
+        key = (row['day'], row['stage'], row['worker_type'], row['status'],
+               row['panel_type'] or '', row['panel_thickness'] or '',
+               row['panel_subtype'] or '', row['eshik_turi'] or '')
+        for i, name in enumerate(ORDER_SUM_FIELDS):
+            stats[key][i] += row[name]
+
+    with transaction.atomic():
+        OrderDailyStats.objects.all().delete()
+        OrderDailyStats.objects.bulk_create([
+            OrderDailyStats(**dict(zip(ORDER_KEY_FIELDS, key)), **dict(zip(ORDER_SUM_FIELDS, values)))
+            for key, values in stats.items()
+        ], batch_size=500)
+    return len(stats)
+
+
+def rebuild_worker_stats():
+    """WorkerDailyStats ni Order va assigned_workers dan qaytadan hisoblaydi."""
+    tz = timezone.get_current_timezone()
+    Through = Order.assigned_workers.through
+    rows = (
+        Through.objects
+        .filter(order__status__in=ARCHIVE_STATUSES, order__worker_finished_at__isnull=False)
+        .annotate(day=TruncDate('order__worker_finished_at', tzinfo=tz))
+        .values('day', 'worker_id')
+        .annotate(order_count=Count('order_id'), kvadrat_sum=Coalesce(Sum('order__panel_kvadrat'), ZERO))
+        .order_by()
+    )
+    with transaction.atomic():
+        WorkerDailyStats.objects.all().delete()
+        created = WorkerDailyStats.objects.bulk_create([WorkerDailyStats(**row) for row in rows], batch_size=500)
+    return len(created)
+
+
+# ======================== HISOBOTLAR UCHUN O'QISH ========================
+
+def order_totals(start_date=None, end_date=None, stages=None, statuses=None):
+    """Oraliq bo'yicha jami: order_count, kvadrat_sum, revenue_sum, prepayment_sum."""
+    stats = OrderDailyStats.objects.all()
+    if start_date:
+        stats = stats.filter(day__gte=start_date)
+    if end_date:
+        stats = stats.filter(day__lte=end_date)
+    if stages is not None:
+        stats = stats.filter(stage__in=stages)
+    if statuses is not None:
+        stats = stats.filter(status__in=statuses)
+    totals = stats.aggregate(
+        order_count=Coalesce(Sum('order_count'), 0),
+        kvadrat_sum=Coalesce(Sum('kvadrat_sum'), ZERO),
+        revenue_sum=Coalesce(Sum('revenue_sum'), ZERO),
+        prepayment_sum=Coalesce(Sum('prepayment_sum'), ZERO),
+    )
+    return totals
+
+
+def daily_rows(start_date, end_date, stages=None):
+    """Har bir kun uchun buyurtmalar soni, m² va summa (sana bo'yicha tartiblangan)."""
+    stats = OrderDailyStats.objects.filter(day__gte=start_date, day__lte=end_date)
+    if stages is not None:
+        stats = stats.filter(stage__in=stages)
+    return list(
+        stats.values('day')
+        .annotate(
+            order_count=Sum('order_count'),
+            kvadrat_sum=Sum('kvadrat_sum'),
+            revenue_sum=Sum('revenue_sum'),
+        )
+        .filter(order_count__gt=0)
+        .order_by('day')
+    )
+
+
+def worker_activity_rows(start_date=None, end_date=None):
+    """Ustalar bo'yicha bajarilgan buyurtmalar soni va m² (ko'pidan kamiga)."""
+    stats = WorkerDailyStats.objects.all()
+    if start_date:
+        stats = stats.filter(day__gte=start_date)
+    if end_date:
+        stats = stats.filter(day__lte=end_date)
+    return list(
+        stats.values('worker_id')
+        .annotate(
+            first_name=F('worker__user__first_name'),
+            last_name=F('worker__user__last_name'),
+            username=F('worker__user__username'),
+            total_order_count=Sum('order_count'),
+            total_finished_kvadrat=Sum('kvadrat_sum'),
+        )
+        .filter(total_order_count__gt=0)
+        .order_by('-total_finished_kvadrat', 'worker_id')
+    )
+
+
+# ======================== SIGNALLAR ========================
+
+@receiver(pre_save, sender=Order)
+def remember_previous_stats(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not set(update_fields) & set(ORDER_FIELDS)):
+        return
+    instance._stats_previous = previous_snapshot(instance)
+
+
+@receiver(post_save, sender=Order)
+def update_order_stats(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not hasattr(instance, '_stats_previous'):
+        return
+    old = instance.__dict__.pop('_stats_previous')
+    if created or old is None:
+        new = snapshot(instance)
+    else:
+        # update_fields da yo'q maydonlar bazada o'zgarmagan
+        new = {
+            name: getattr(instance, name) if update_fields is None or name in update_fields else old[name]
+            for name in ORDER_FIELDS
+        }
+    apply_changes([(instance.pk, None if created else old, new)])
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_stats(sender, instance, **kwargs):
+    # assigned_workers qatorlari hali o'chmagan - ustalar hissasi ham ayiriladi
+    old = previous_snapshot(instance)
+    if old is not None:
+        apply_changes([(instance.pk, old, None)])
+
+
+@receiver(m2m_changed, sender=Order.assigned_workers.through)
+def assigned_workers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Bajarilgan buyurtmaga usta qo'shilsa / olib tashlansa uning statistikasi ham o'zgaradi."""
+    if action not in ('post_add', 'pre_remove', 'pre_clear'):
+        return
+
+    if action == 'post_add':
+        # pk_set da faqat haqiqatan qo'shilganlar bo'ladi
+        links = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set or ()]
+    else:
+        # remove() / clear(): faqat mavjud bog'lanishlar ayiriladi
+        links = sender.objects.filter(**{'worker_id' if reverse else 'order_id': instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{'order_id__in' if reverse else 'worker_id__in': pk_set or ()})
+        links = list(links.values_list('order_id', 'worker_id'))
+    if not links:
+        return
+
+    rows = Order.objects.filter(
+        pk__in={order_id for order_id, _ in links},
+        status__in=ARCHIVE_STATUSES,
+        worker_finished_at__isnull=False,
+    ).values('pk', 'status', 'worker_finished_at', 'panel_kvadrat')
+    entries = {row['pk']: _worker_entry(row) for row in rows}
+    sign = 1 if action == 'post_add' else -1
+    _add_worker_entries([
+        (worker_id, entries[order_id], sign) for order_id, worker_id in links if order_id in entries
+    ])
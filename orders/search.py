@@ -0,0 +1,133 @@
+# orders/search.py
+"""
+Buyurtmalar bo'yicha to'liq matnli qidiruv.
+
+Qidiriladigan maydonlar: order_number, customer_name, customer_unique_id,
+product_name, comment, worker_comment.
+
+- SQLite: `orders_order_fts` FTS5 virtual jadvali (rowid = order.id).
+  Jadval Order post_save / post_delete signallari orqali yangilanadi.
+- PostgreSQL: orders_order ustidagi GIN (to_tsvector) ifoda indeksi,
+  baza uni o'zi yangilaydi.
+- Boshqa bazalar: oddiy icontains (indekssiz).
+
+Jadval va indeks 0021_order_search_index migratsiyasida yaratiladi,
+`manage.py rebuild_order_search` ularni qaytadan to'ldiradi.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Order
+
+SEARCH_FIELDS = (
+    'order_number', 'customer_name', 'customer_unique_id',
+    'product_name', 'comment', 'worker_comment',
+)
+
+FTS_TABLE = 'orders_order_fts'
+
+# PostgreSQL: indeks ifodasi bilan aynan bir xil bo'lishi kerak, aks holda indeks ishlatilmaydi
+PG_SEARCH_VECTOR = "to_tsvector('simple', {})".format(
+    " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+)
+
+MAX_TERMS = 8
+
+
+def search_terms(query):
+    """Qidiruv satrini so'zlarga ajratadi (tinish belgilari tashlab yuboriladi)."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def search_orders(queryset, query):
+    """
+    Querysetni qidiruv bo'yicha filtrlaydi. Har bir so'z prefiks sifatida
+    mos kelishi kerak (AND), shuning uchun typeahead uchun ham yaraydi.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match],
+        ))
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT id FROM orders_order WHERE {PG_SEARCH_VECTOR} @@ to_tsquery('simple', %s)", [tsquery],
+        ))
+
+    for term in terms:
+        term_q = Q()
+        for field in SEARCH_FIELDS:
+            term_q |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(term_q)
+    return queryset
+
+
+# ======================== INDEKSNI YANGILASH (SQLite) ========================
+
+def index_order(order):
+    """Bitta buyurtmaning FTS qatorini yangilaydi."""
+    if connection.vendor != 'sqlite':
+        return
+    values = [getattr(order, field) or '' for field in SEARCH_FIELDS]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [order.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+            [order.pk, *values],
+        )
+
+
+def index_orders(orders):
+    """Yangi (bulk_create qilingan) buyurtmalarni indeksga bitta executemany bilan qo'shadi."""
+    if connection.vendor != 'sqlite' or not orders:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+            [[order.pk, *(getattr(order, field) or '' for field in SEARCH_FIELDS)] for order in orders],
+        )
+
+
+def rebuild_search_index():
+    """FTS jadvalini orders_order dan to'liq qayta to'ldiradi. Qatorlar sonini qaytaradi."""
+    if connection.vendor != 'sqlite':
+        return Order.objects.count()
+    columns = ', '.join(SEARCH_FIELDS)
+    source = ', '.join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) SELECT id, {source} FROM orders_order"
+        )
+        return cursor.rowcount
+
+
+@receiver(post_save, sender=Order)
+def update_order_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Faqat qidirilmaydigan maydonlar saqlangan bo'lsa (status, vaqtlar...) indeksga tegmaymiz
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_order(instance)
+
+
+@receiver(post_delete, sender=Order)
+def remove_order_search_index(sender, instance, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [instance.pk])
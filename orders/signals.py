@@ -11,9 +11,6 @@ from django.conf import settings
 @receiver(post_save, sender=Order)
 def order_notification_handler(sender, instance, created, **kwargs):
     
-    # DEBUG UCHUN: Signal ishga tushganini tasdiqlash
-    print(f"--- [DEBUG] SIGNAL ISHGA TUSHDI. Yangi buyurtma: {created}, ID: {instance.id} ---") 
-    
     # Umumiy admin havola
     order_url = f"http://127.0.0.1:8000/admin/orders/order/{instance.id}/change/"
     
@@ -25,8 +22,8 @@ def order_notification_handler(sender, instance, created, **kwargs):
                    f"Mijoz: {instance.customer_name}\n" 
                    f"Kvadratura: {instance.panel_kvadrat} m²\n"
                    # ✅ deadline ga tuzatildi (deadline_date o'rniga)
-                   f"Deadline: {instance.deadline.strftime('%Y-%m-%d')}") 
-        send_telegram_notification(message)
+                   f"Deadline: {instance.deadline.strftime('%Y-%m-%d') if instance.deadline else '-'}") 
+        send_telegram_notification(message)  # faqat navbatga qo'yadi (run_outbox yuboradi)
         return
 
     # 2. STATUS 'BAJARILDI' GA O'TISHINI TEKSHIRISH
@@ -42,28 +39,5 @@ def order_notification_handler(sender, instance, created, **kwargs):
                    f"Yakunlandi: {instance.worker_finished_at.strftime('%Y-%m-%d %H:%M')}")
         send_telegram_notification(message)
 
-# orders/signals.py
-
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.db import transaction
-from .models import Material, MaterialTransaction
-
-@receiver(post_save, sender=MaterialTransaction)
-def update_material_stock(sender, instance, created, **kwargs):
-    """Yangi tranzaksiya yaratilganda Materialning qoldig'ini yangilaydi."""
-    if created:
-        material = instance.material
-        quantity_change = instance.quantity_change
-        transaction_type = instance.transaction_type
-
-        with transaction.atomic():
-            # Material ob'ektini DB dan qayta yuklaymiz (raqobatlarni oldini olish uchun)
-            material = Material.objects.select_for_update().get(pk=material.pk)
-            
-            if transaction_type == 'IN':
-                material.quantity += quantity_change
-            elif transaction_type == 'OUT':
-                material.quantity -= quantity_change
-                
-            material.save()
+# Material qoldig'i bu yerda o'zgartirilmaydi: barcha kirim/chiqimlar orders.stock orqali
+# (tranzaksiya yozuvi bilan birga), aks holda qoldiq ikki marta hisoblanadi.
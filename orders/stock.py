@@ -0,0 +1,219 @@
+# orders/stock.py
+"""
+Ombor qoldig'i: Material.quantity ni o'zgartiradigan yagona joy.
+
+Har bir kirim/chiqim shartli UPDATE bilan qo'llanadi:
+
+    UPDATE material SET quantity = quantity - x WHERE id = ... AND quantity >= x
+
+Qoldiqni Pythonda o'qib, o'zgartirib, qayta saqlash (read-modify-write)
+yo'q, shuning uchun parallel skanerlar bir-birining o'zgarishini yo'qotmaydi
+va qator qulfi uchun navbat hosil bo'lmaydi. Yetarli qoldiq bo'lmasa UPDATE
+hech bir qatorga tegmaydi va InsufficientStock ko'tariladi. MaterialTransaction
+yozuvi shu tranzaksiyaning o'zida yaratiladi yoki o'chiriladi.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .material_lookup import resolve_codes
+from .models import Material, MaterialTransaction, Order
+
+
+class InsufficientStock(ValueError):
+    """Chiqim uchun omborda yetarli qoldiq yo'q."""
+
+    def __init__(self, material, available, requested):
+        self.material = material
+        self.available = available
+        self.requested = requested
+        super().__init__(
+            f"Omborda yetarli qoldiq yo'q! Mavjud: {available} {material.unit}, So'ralgan: {requested}"
+        )
+
+
+def _delta(transaction_type, quantity):
+    quantity = Decimal(str(quantity))
+    if quantity <= 0:
+        raise ValueError("Miqdor musbat bo'lishi kerak.")
+    if transaction_type == 'IN':
+        return quantity
+    if transaction_type == 'OUT':
+        return -quantity
+    raise ValueError(f"Noma'lum harakat turi: {transaction_type}")
+
+
+def apply_delta(material_id, delta, with_balance=True):
+    """
+    Qoldiqqa `delta` ni qo'shadi (manfiy bo'lsa ayiradi) va yangi qoldiqni
+    qaytaradi (with_balance=False bo'lsa qaytarmaydi). Qoldiq manfiy bo'lib qolsa hech narsa o'zgarmaydi va
+    InsufficientStock ko'tariladi. Tranzaksiya ichida chaqirilishi kerak.
+    """
+    materials = Material.objects.filter(pk=material_id)
+    if delta < 0:
+        materials = materials.filter(quantity__gte=-delta)
+    # last_updated (auto_now) queryset.update() da o'zi yangilanmaydi
+    updated = materials.update(quantity=F('quantity') + delta, last_updated=timezone.now())
+    if not updated:
+        material = Material.objects.only('pk', 'unit', 'quantity').get(pk=material_id)
+        raise InsufficientStock(material, material.quantity, -delta)
+    if not with_balance:
+        return None
+    return Material.objects.filter(pk=material_id).values_list('quantity', flat=True).get()
+
+
+def record_movement(material, transaction_type, quantity, **fields):
+    """
+    Kirim/chiqimni qo'llaydi va MaterialTransaction yozadi (bitta tranzaksiya).
+    `fields` - received_by, notes, order, performed_by, transaction_barcode.
+    (tranzaksiya, yangi qoldiq) qaytaradi; `material.quantity` ham yangilanadi.
+    """
+    delta = _delta(transaction_type, quantity)
+    with transaction.atomic():
+        balance = apply_delta(material.pk, delta)
+        movement = MaterialTransaction.objects.create(
+            material=material,
+            transaction_type=transaction_type,
+            quantity_change=abs(delta),
+            **fields,
+        )
+    material.quantity = balance
+    return movement, balance
+
+
+def reverse_movement(movement):
+    """
+    Harakatni bekor qiladi: qoldiqni qaytaradi va yozuvni o'chiradi.
+    Sarflangan kirimni o'chirib bo'lmaydi (InsufficientStock). Yangi qoldiqni qaytaradi.
+    """
+    delta = _delta(movement.transaction_type, movement.quantity_change)
+    with transaction.atomic():
+        balance = apply_delta(movement.material_id, -delta)
+        movement.delete()
+    return balance
+
+
+# ======================== SKANER PAKETLARI ========================
+
+MAX_SCAN_BATCH = 500
+
+
+def _parse_scan(item):
+    """Paket elementini tekshiradi: (kod, tur, miqdor, client_scan_id, order_id) yoki ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("Noto'g'ri element.")
+    code = str(item.get('code') or '').strip()
+    if not code:
+        raise ValueError("Kod kiritilmadi.")
+    transaction_type = str(item.get('type') or '').upper()
+    try:
+        quantity = Decimal(str(item.get('qty')))
+        delta = _delta(transaction_type, quantity)
+    except InvalidOperation:
+        raise ValueError("Miqdor noto'g'ri formatda.")
+    order_id = item.get('order_id') or None
+    if order_id is not None:
+        try:
+            order_id = int(order_id)
+        except (TypeError, ValueError):
+            raise ValueError("Buyurtma ID noto'g'ri.")
+    client_scan_id = str(item.get('client_scan_id') or '').strip()[:64] or None
+    return code, transaction_type, delta, client_scan_id, order_id
+
+
+def ingest_scans(items, user=None):
+    """
+    Skaner paketini saqlaydi va har bir element uchun natija qaytaradi
+    (status: saved / duplicate / error).
+
+    Avval yozilgan client_scan_id lar "duplicate" bo'lib qaytadi, shuning uchun
+    tarmoq uzilib paket qayta yuborilsa qoldiq ikki marta o'zgarmaydi. Kodlar,
+    buyurtmalar va mavjud skanlar bittadan IN so'rovi bilan olinadi; har bir
+    material uchun bitta yig'ma shartli UPDATE, yozuvlar bitta bulk_create.
+    Materialning yig'ma chiqimi qoldiqdan oshsa, shu materialning barcha
+    elementlari rad etiladi, qolganlari saqlanadi.
+    """
+    results = [None] * len(items)
+    parsed = []
+    for index, item in enumerate(items):
+        client_scan_id = item.get('client_scan_id') if isinstance(item, dict) else None
+        try:
+            parsed.append((index, *_parse_scan(item)))
+        except ValueError as e:
+            results[index] = {'client_scan_id': client_scan_id, 'status': 'error', 'error': str(e)}
+
+    try:
+        return _ingest(parsed, results, user)
+    except IntegrityError:
+        # Xuddi shu paket parallel so'rovda yozib bo'lindi: endi ular "duplicate" bo'ladi
+        return _ingest(parsed, results, user)
+
+
+def _ingest(parsed, results, user):
+    results = list(results)
+    with transaction.atomic():
+        scan_ids = [row[4] for row in parsed if row[4]]
+        existing = dict(
+            MaterialTransaction.objects.filter(client_scan_id__in=scan_ids).values_list('client_scan_id', 'pk')
+        )
+        materials = resolve_codes({row[1] for row in parsed})
+        order_ids = set(
+            Order.objects.filter(pk__in={row[5] for row in parsed if row[5]}).values_list('pk', flat=True)
+        )
+
+        accepted, seen = [], set()
+        for index, code, transaction_type, delta, client_scan_id, order_id in parsed:
+            result = {'client_scan_id': client_scan_id}
+            if client_scan_id in existing or client_scan_id in seen:
+                result.update(status='duplicate', transaction_id=existing.get(client_scan_id))
+            elif code not in materials:
+                result.update(status='error', error=f"Material topilmadi: {code}")
+            elif order_id and order_id not in order_ids:
+                result.update(status='error', error=f"Buyurtma topilmadi: {order_id}")
+            else:
+                if client_scan_id:
+                    seen.add(client_scan_id)
+                accepted.append((index, materials[code], transaction_type, delta, client_scan_id, order_id))
+            results[index] = result
+
+        totals = defaultdict(Decimal)
+        for _, material, _, delta, _, _ in accepted:
+            totals[material.pk] += delta
+        rejected = set()
+        for material_id, delta in totals.items():
+            try:
+                apply_delta(material_id, delta, with_balance=False)
+            except InsufficientStock as e:
+                rejected.add(material_id)
+                for index, material, *_ in accepted:
+                    if material.pk == material_id:
+                        results[index].update(status='error', error=str(e))
+        accepted = [row for row in accepted if row[1].pk not in rejected]
+
+        balances = dict(Material.objects.filter(pk__in={row[1].pk for row in accepted}).values_list('pk', 'quantity'))
+        movements = []
+        for index, material, transaction_type, delta, client_scan_id, order_id in accepted:
+            movement = MaterialTransaction(
+                material=material,
+                transaction_type=transaction_type,
+                quantity_change=abs(delta),
+                client_scan_id=client_scan_id,
+                order_id=order_id,
+                performed_by=user,
+                notes="Tezkor skaner",
+            )
+            movement.assign_barcode()
+            movements.append(movement)
+        MaterialTransaction.objects.bulk_create(movements)
+
+        for (index, material, *_), movement in zip(accepted, movements):
+            results[index].update(
+                status='saved',
+                transaction_id=movement.pk,
+                material_id=material.pk,
+                balance=balances[material.pk],
+            )
+    return results
@@ -0,0 +1,236 @@
+# orders/telegram.py
+"""
+Telegram xabarlarini navbat (outbox) orqali yuborish.
+
+Viewlar va signallar faqat `enqueue_message` / `enqueue_photos` chaqiradi:
+xabar TelegramOutbox jadvaliga yoziladi va so'rov darhol javob qaytaradi.
+Haqiqiy yuborishni `manage.py run_outbox` jarayoni bajaradi:
+
+- bitta requests.Session (ulanishlar qayta ishlatiladi);
+- har bir chat uchun tezlik cheklovi (Telegram: chatga ~1 xabar/soniya,
+  guruhga 20 xabar/daqiqa);
+- tarmoq / 5xx xatolarida eksponensial kutish bilan qayta urinish,
+  429 da Telegram aytgan `retry_after` ga amal qilinadi;
+- 4xx (noto'g'ri so'rov) xatolari qayta urinilmaydi.
+"""
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import TelegramOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5          # soniya
+BACKOFF_MAX = 60 * 60     # soniya
+MAX_ALBUM_SIZE = 10       # Telegram sendMediaGroup cheklovi
+
+
+def default_chat_id():
+    return settings.TELEGRAM_CHAT_ID
+
+
+# ======================== NAVBATGA QO'YISH ========================
+
+def enqueue_message(text, chat_id=None, parse_mode='HTML'):
+    """Matnli xabarni navbatga qo'yadi."""
+    return TelegramOutbox.objects.create(
+        chat_id=chat_id or default_chat_id(),
+        method='sendMessage',
+        text=text,
+        parse_mode=parse_mode,
+    )
+
+
+def enqueue_photos(photo_names, caption='', chat_id=None, parse_mode=''):
+    """
+    Rasm(lar)ni navbatga qo'yadi. photo_names - default storage dagi fayl
+    nomlari; bitta rasm sendPhoto, bir nechtasi albom (sendMediaGroup) bo'ladi.
+    """
+    photos = [name for name in photo_names if name][:MAX_ALBUM_SIZE]
+    if not photos:
+        return None
+    return TelegramOutbox.objects.create(
+        chat_id=chat_id or default_chat_id(),
+        method='sendPhoto' if len(photos) == 1 else 'sendMediaGroup',
+        text=caption,
+        parse_mode=parse_mode,
+        photos=photos,
+    )
+
+
+# ======================== YUBORISH ========================
+
+class PermanentError(Exception):
+    """Qayta urinish foyda bermaydigan xato (masalan, 400 Bad Request)."""
+
+
+class RetryLater(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ChatRateLimiter:
+    """Har bir chat uchun oxirgi yuborishlar vaqtini kuzatib, kerakli kutish vaqtini hisoblaydi."""
+
+    def __init__(self, min_interval=1.0, per_minute=20, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.per_minute = per_minute
+        self.clock = clock
+        self.sent = defaultdict(deque)
+
+    def wait_time(self, chat_id):
+        now = self.clock()
+        history = self.sent[chat_id]
+        while history and now - history[0] >= 60:
+            history.popleft()
+        wait = 0.0
+        if history:
+            wait = max(wait, self.min_interval - (now - history[-1]))
+        if len(history) >= self.per_minute:
+            wait = max(wait, 60 - (now - history[0]))
+        return max(wait, 0.0)
+
+    def record(self, chat_id):
+        self.sent[chat_id].append(self.clock())
+
+
+class TelegramClient:
+    """Bot API ga so'rovlar; bitta Session orqali ulanishlar qayta ishlatiladi."""
+
+    def __init__(self, token=None, api_url=None, session=None, timeout=(5, 30)):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip('/')
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def send(self, item):
+        url = f"{self.api_url}/bot{self.token}/{item.method}"
+        # Chat ko'rsatilmay navbatga qo'yilgan xabar joriy TELEGRAM_CHAT_ID ga ketadi
+        data = {'chat_id': item.chat_id or default_chat_id()}
+        files = {}
+
+        try:
+            if item.method == 'sendMessage':
+                data['text'] = item.text
+                if item.parse_mode:
+                    data['parse_mode'] = item.parse_mode
+            elif item.method == 'sendPhoto':
+                files['photo'] = default_storage.open(item.photos[0], 'rb')
+                data['caption'] = item.text
+                if item.parse_mode:
+                    data['parse_mode'] = item.parse_mode
+            else:
+                media = []
+                for i, name in enumerate(item.photos, 1):
+                    files[f'pic{i}'] = default_storage.open(name, 'rb')
+                    entry = {'type': 'photo', 'media': f'attach://pic{i}'}
+                    if i == 1 and item.text:
+                        entry['caption'] = item.text
+                        if item.parse_mode:
+                            entry['parse_mode'] = item.parse_mode
+                    media.append(entry)
+                data['media'] = json.dumps(media)
+        except FileNotFoundError as e:
+            self._close(files)
+            raise PermanentError(f"Rasm topilmadi: {e}")
+
+        try:
+            response = self.session.post(url, data=data, files=files or None, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise RetryLater(f"Tarmoq xatosi: {e}")
+        finally:
+            self._close(files)
+
+        return self._check(response)
+
+    @staticmethod
+    def _close(files):
+        for f in files.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _check(response):
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+
+        if response.status_code == 200 and payload.get('ok', True):
+            return payload
+        description = payload.get('description') or response.text[:200]
+        if response.status_code == 429:
+            retry_after = (payload.get('parameters') or {}).get('retry_after')
+            raise RetryLater(f"429: {description}", retry_after=retry_after)
+        if response.status_code >= 500:
+            raise RetryLater(f"{response.status_code}: {description}")
+        raise PermanentError(f"{response.status_code}: {description}")
+
+
+def backoff_delay(attempts):
+    """attempts - shu paytgacha bo'lgan urinishlar soni (1 dan boshlab)."""
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+
+def deliver_pending(client, limiter=None, batch_size=50, sleep=time.sleep):
+    """
+    Vaqti kelgan xabarlarni yuboradi. (yuborilgan, qayta urinishga qoldirilgan,
+    butunlay xato) sonlarini qaytaradi. Bitta jarayon sifatida ishlatiladi.
+    """
+    limiter = limiter or ChatRateLimiter()
+    sent = retried = failed = 0
+
+    due = TelegramOutbox.objects.filter(
+        status='PENDING', next_attempt_at__lte=timezone.now(),
+    )
+    if not default_chat_id():
+        # TELEGRAM_CHAT_ID berilmaguncha chatsiz xabarlar navbatda kutadi
+        due = due.exclude(chat_id='')
+    due = due.order_by('next_attempt_at', 'id')[:batch_size]
+
+    for item in due:
+        wait = limiter.wait_time(item.chat_id)
+        if wait:
+            sleep(wait)
+
+        item.attempts += 1
+        try:
+            client.send(item)
+        except RetryLater as e:
+            limiter.record(item.chat_id)
+            item.last_error = str(e)
+            if item.attempts >= MAX_ATTEMPTS:
+                item.status = 'FAILED'
+                failed += 1
+            else:
+                delay = e.retry_after or backoff_delay(item.attempts)
+                item.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                retried += 1
+        except PermanentError as e:
+            item.last_error = str(e)
+            item.status = 'FAILED'
+            failed += 1
+        else:
+            limiter.record(item.chat_id)
+            item.status = 'SENT'
+            item.sent_at = timezone.now()
+            item.last_error = ''
+            sent += 1
+
+        if item.status == 'FAILED':
+            logger.warning("Telegram xabari #%s yuborilmadi: %s", item.pk, item.last_error)
+        item.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+
+    return sent, retried, failed
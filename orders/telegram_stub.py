@@ -0,0 +1,80 @@
+# orders/telegram_stub.py
+"""
+Testlar va lokal ishlab chiqish uchun Telegram Bot API soxta serveri.
+
+    with TelegramStubServer() as stub:
+        with override_settings(TELEGRAM_API_URL=stub.url):
+            ...
+        stub.requests  # [{'method': 'sendMessage', 'data': {...}, 'files': [...]}, ...]
+
+`stub.responses` ro'yxatiga (status, json) qo'shib, keyingi javoblarni
+belgilash mumkin (masalan 429 yoki 500); bo'sh bo'lsa 200 {"ok": true}.
+"""
+import json
+import threading
+from email import message_from_bytes
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+def parse_form(content_type, body):
+    """multipart/form-data yoki urlencoded tanani (maydonlar, fayl nomlari) ga ajratadi."""
+    if content_type.startswith('multipart/form-data'):
+        message = message_from_bytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body, policy=HTTP,
+        )
+        data, files = {}, []
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                files.append(name)
+            else:
+                data[name] = part.get_content().strip() if part.get_content_type() == 'text/plain' else part.get_payload()
+        return data, files
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}, []
+
+
+class TelegramStubServer:
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                data, files = parse_form(self.headers.get('Content-Type', ''), self.rfile.read(length))
+                with stub.lock:
+                    stub.requests.append({
+                        'method': self.path.rsplit('/', 1)[-1],
+                        'data': data,
+                        'files': files,
+                    })
+                    status, payload = stub.responses.pop(0) if stub.responses else (200, {'ok': True, 'result': {}})
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
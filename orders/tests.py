@@ -1,3 +1,1545 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import Group, User
+from django.db import connection, connections
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .alerts import process_overdue_orders
+from .audit import acting_as
+from . import live, material_lookup
+from .chain import finish_orders, spawn_next_stage, stage_orders_spawned
+from .customers import rebuild_customer_stats
+from .dashboard import get_order_list_stats
+from .forms import MaterialTransactionForm
+from .models import (
+    Category, CustomerStats, Material, MaterialCatalogVersion, MaterialTransaction, Notification, NotificationCounter, NotificationReceipt, Order, OrderAuditEvent, OrderDailyStats,
+    OrderNumberSequence, TelegramOutbox, Worker, WorkerDailyStats,
+)
+from .notifications import latest_notifications, mark_read, notify, unread_count
+from .numbering import assign_order_numbers, reserve_order_numbers
+from .pagination import keyset_paginate
+from .roles import is_in_group
+from .rollups import order_totals, rebuild_order_stats, rebuild_worker_stats, worker_activity_rows
+from .search import search_orders
+from .stock import InsufficientStock, record_movement, reverse_movement
+from .telegram import ChatRateLimiter, TelegramClient, deliver_pending, enqueue_message
+from .telegram_stub import TelegramStubServer
+
+
+def make_order(**kwargs):
+    data = {
+        'customer_unique_id': 'C-1',
+        'customer_name': 'Mijoz',
+        'product_name': 'Sendvich panel',
+        'status': 'TASDIQLANDI',
+    }
+    data.update(kwargs)
+    return Order.objects.create(**data)
+
+
+class OrderListQueryCountTests(TestCase):
+    """order_list sahifasi qatorlar soniga bog'liq bo'lmagan miqdorda so'rov yuborishi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        usta_group = Group.objects.create(name='Usta')
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+        cls.worker_user = User.objects.create_user('usta1', password='x')
+        cls.worker_user.groups.add(usta_group)
+        cls.worker = Worker.objects.create(user=cls.worker_user, role='LIST')
+
+        other_user = User.objects.create_user('usta2', password='x')
+        other_user.groups.add(usta_group)
+        cls.other_worker = Worker.objects.create(user=other_user, role='PANEL')
+
+    def add_rows(self, count):
+        for i in range(count):
+            parent = make_order(customer_unique_id=f'C-{i}')
+            parent.assigned_workers.add(self.worker, self.other_worker)
+            child = make_order(
+                customer_unique_id=f'C-{i}',
+                product_name=f'Sendvich panel {i} (PANEL)',
+                parent_order=parent,
+            )
+            child.assigned_workers.add(self.other_worker)
+            child.assigned_workers.add(self.worker)
+
+    def count_queries(self, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('order_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for user in (self.admin, self.worker_user):
+            with self.subTest(user=user.username):
+                Order.objects.all().delete()
+                self.add_rows(2)
+                few = self.count_queries(user)
+
+                self.add_rows(8)
+                many = self.count_queries(user)
+
+                self.assertEqual(few, many)
+
+    def test_is_mine_marks_only_assigned_orders(self):
+        mine = make_order()
+        mine.assigned_workers.add(self.worker)
+        others = make_order()
+        others.assigned_workers.add(self.other_worker)
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('order_list'))
+        flags = {o.pk: o.is_mine for o in response.context['main_orders']}
+        self.assertEqual(flags, {mine.pk: False, others.pk: False})
+
+        self.client.force_login(self.worker_user)
+        response = self.client.get(reverse('order_list'))
+        rows = list(response.context['main_orders'])
+        self.assertEqual([o.pk for o in rows], [mine.pk])
+        self.assertTrue(rows[0].is_mine)
+        self.assertEqual(rows[0].prefetched_workers, [self.worker])
+
+
+class OrderListStatsTests(TestCase):
+    """order_list hisoblagichlari bitta agregatsiya so'rovida va to'g'ri hisoblanadi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='x')
+        cls.worker = Worker.objects.create(user=User.objects.create_user('usta1', password='x'), role='LIST')
+        cls.worker.user.groups.add(Group.objects.create(name='Usta'))
+        now = timezone.now()
+
+        cls.in_progress = make_order(customer_unique_id='C-1', deadline=now + timedelta(days=3),
+                                     total_price='100.00', prepayment='40.00')
+        make_order(customer_unique_id='C-2', status='ISHDA', deadline=now - timedelta(days=1),
+                   total_price='50.00', prepayment='50.00')
+        make_order(customer_unique_id='C-2', status='BAJARILDI')
+        rejected = make_order(customer_unique_id='C-3', status='RAD_ETILDI', total_price='30.00')
+        panel = make_order(parent_order=cls.in_progress, stage='PANEL', total_price='500.00')
+        make_order(parent_order=cls.in_progress, stage='UGOL', status='ISHDA')
+        make_order(parent_order=cls.in_progress, stage='BOSHQA', status='KIRITILDI')
+        for order in (cls.in_progress, rejected, panel):
+            order.assigned_workers.add(cls.worker)
+
+    def test_all_counters_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = get_order_list_stats(self.admin, include_unpaid=True)
+        self.assertEqual(stats, {
+            'archived_count': 1,
+            'customers_count': Order.objects.values('customer_unique_id').distinct().count(),
+            'total_orders': 3,
+            'completed_orders': 0,
+            'in_progress_orders': 1,
+            'overdue_orders_count': 1,
+            'all_child_orders_count': 3,
+            'panel_child_count': 1,
+            'ugul_child_count': 1,
+            'other_child_count': 1,
+            'panel_completed': 0,
+            'ugul_completed': 0,
+            'other_completed': 0,
+            'panel_in_progress': 1,
+            'ugul_in_progress': 1,
+            'other_in_progress': 1,
+            'unpaid_orders_count': 2,
+            'total_unpaid_amount': Decimal('90.00'),
+            'debts_count': 3,
+            'panel_progress_percentage': 0,
+            'ugul_progress_percentage': 0,
+            'other_progress_percentage': 0,
+        })
+        self.assertEqual(stats['customers_count'], 3)
+
+    def test_worker_scope_and_filter(self):
+        stats = get_order_list_stats(self.worker.user, worker_scope=True)
+        self.assertEqual(
+            (stats['total_orders'], stats['in_progress_orders'], stats['overdue_orders_count']), (1, 1, 0),
+        )
+        self.assertEqual((stats['panel_child_count'], stats['ugul_child_count'], stats['other_child_count']), (1, 0, 0))
+        self.assertEqual((stats['unpaid_orders_count'], stats['total_unpaid_amount']), (0, 0))
+
+        stats = get_order_list_stats(self.admin, filter_type='overdue')
+        self.assertEqual((stats['total_orders'], stats['overdue_orders_count'], stats['panel_child_count']), (1, 1, 0))
+
+    def test_stats_api(self):
+        self.client.force_login(self.admin)
+        data = self.client.get(reverse('dashboard_stats_api')).json()
+        self.assertTrue(data['success'])
+        self.assertEqual((data['stats']['total_orders'], data['stats']['total_unpaid_amount']), (3, 90.0))
+
+        # Usta faqat o'ziga tayinlanganlarni ko'radi, qarzdorlik hisoblanmaydi
+        self.client.force_login(self.worker.user)
+        stats = self.client.get(reverse('dashboard_stats_api')).json()['stats']
+        self.assertEqual((stats['total_orders'], stats['unpaid_orders_count']), (1, 0))
+
+    def test_stats_api_requires_order_list_role(self):
+        self.client.force_login(User.objects.create_user('begona', password='x'))
+        response = self.client.get(reverse('dashboard_stats_api'))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.json()['success'])
+
+
+class OrderStageTests(TestCase):
+    """Zanjirdagi child buyurtmalar `stage` ustuni bilan yaratilishi kerak."""
+
+    def test_chain_children_get_stage(self):
+        order = make_order(worker_type='LIST')
+        self.assertEqual(order.stage, 'ASOSIY')
+
+        order.status = 'USTA_TUGATDI'
+        order.save()
+        panel = order.sub_orders.get()
+        self.assertEqual(panel.stage, 'PANEL')
+
+        panel.status = 'USTA_TUGATDI'
+        panel.save()
+        self.assertEqual(panel.sub_orders.get().stage, 'UGOL')
+
+    def test_child_without_known_stage_is_other(self):
+        parent = make_order()
+        child = make_order(parent_order=parent, worker_type='LIST')
+        self.assertEqual(child.stage, 'BOSHQA')
+
+    def test_order_list_renders_ugol_and_other_children(self):
+        parent = make_order()
+        ugol = make_order(parent_order=parent, product_name='Tom (PANEL) (UGOL)', stage='UGOL')
+        other = make_order(parent_order=parent, product_name='Qo\'shimcha ish', worker_type='LIST')
+
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        response = self.client.get(reverse('order_list'))
+        self.assertEqual([o.pk for o in response.context['ugul_child_orders']], [ugol.pk])
+        self.assertEqual([o.pk for o in response.context['other_child_orders']], [other.pk])
+        self.assertContains(response, 'Tom (PANEL) (UGOL)')
+        self.assertContains(response, 'id="ugol-orders-grid"')
+
+
+class KeysetPaginationTests(TestCase):
+    """Kursorli sahifalash qatorlarni takrorlamasdan va o'tkazib yubormasdan berishi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='x')
+        cls.orders = [make_order(customer_unique_id=f'C-{i}') for i in range(7)]
+        # Bir xil created_at: tartib id bo'yicha ajratilishi kerak
+        Order.objects.filter(pk__in=[o.pk for o in cls.orders[2:5]]).update(
+            created_at=cls.orders[2].created_at,
+        )
+
+    def test_pages_cover_all_rows_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = keyset_paginate(Order.objects.all(), cursor, page_size=3)
+            seen.extend(o.pk for o in page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        page = keyset_paginate(Order.objects.all(), 'buzilgan-kursor', page_size=3)
+        self.assertEqual(len(page), 3)
+
+    def test_load_more_endpoint(self):
+        self.client.force_login(self.admin)
+        first = self.client.get(reverse('order_list_more'), {'limit': 4, 'format': 'json'}).json()
+        self.assertEqual(len(first['orders']), 4)
+
+        rest = self.client.get(reverse('order_list_more'), {'cursor': first['next_cursor']}).json()
+        self.assertTrue(rest['success'])
+        self.assertEqual(rest['next_cursor'], '')
+        self.assertIn('order-card', rest['html'])
+
+    def test_load_more_ugol_section(self):
+        parent = self.orders[0]
+        ugol = [make_order(parent_order=parent, product_name=f'Tom {i} (UGOL)', stage='UGOL') for i in range(3)]
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('order_list'))
+        self.assertEqual(len(response.context['ugul_child_orders']), 3)
+
+        page = self.client.get(reverse('order_list_more'), {'section': 'ugol', 'limit': 2}).json()
+        self.assertIn('Tom 2 (UGOL)', page['html'])
+        self.assertIn('Tom 1 (UGOL)', page['html'])
+        rest = self.client.get(reverse('order_list_more'), {'section': 'ugol', 'cursor': page['next_cursor'], 'format': 'json'}).json()
+        self.assertEqual([o['id'] for o in rest['orders']], [ugol[0].pk])
+        self.assertEqual([o['stage'] for o in rest['orders']], ['UGOL'])
+
+    def test_archive_renders_first_page(self):
+        Order.objects.update(status='BAJARILDI')
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('order_archive'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['main_count'], 7)
+
+
+class ExplainOrderQueriesTests(TestCase):
+    """explain_order_queries har bir asosiy so'rovning rejasini chiqaradi."""
+
+    def test_command_prints_plan_for_each_query(self):
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('explain_order_queries', stdout=out)
+        output = out.getvalue()
+        self.assertIn(f"Baza: {connection.vendor}", output)
+        for name in ('order_list: asosiy', 'sales_report_view', 'debt_report', 'Order.active: muddat'):
+            self.assertIn(f"=== {name} ===", output)
+        if connection.vendor == 'sqlite':
+            self.assertIn('order_stage_created_idx', output)
+            self.assertNotIn('order_active_deadline_idx', output)
+
+
+class OrderSearchTests(TestCase):
+    """Qidiruv indeksi Order saqlanganda/o'chirilganda yangilanishi kerak."""
+
+    def search(self, query):
+        return list(search_orders(Order.objects.all(), query).values_list('pk', flat=True))
+
+    def test_prefix_search_over_fields(self):
+        order = make_order(customer_name='Anvar Karimov', comment='Tezkor yetkazish')
+        make_order(customer_name='Boshqa mijoz')
+
+        self.assertEqual(self.search('anv'), [order.pk])
+        self.assertEqual(self.search('karimov tezk'), [order.pk])
+        self.assertEqual(self.search(order.order_number), [order.pk])
+        self.assertEqual(self.search('topilmaydi'), [])
+
+    def test_index_follows_save_and_delete(self):
+        order = make_order(product_name='Eshik')
+        order.worker_comment = 'Qora rangli'
+        order.save()
+        self.assertEqual(self.search('qora'), [order.pk])
+
+        order.delete()
+        self.assertEqual(self.search('qora'), [])
+
+    def test_typeahead_endpoint(self):
+        order = make_order(customer_name='Dilshod')
+        self.client.force_login(User.objects.create_user('menejer', password='x'))
+        data = self.client.get(reverse('order_search_api'), {'q': 'dil'}).json()
+        self.assertEqual([r['id'] for r in data['results']], [order.pk])
+
+
+class RoleCacheTests(TestCase):
+    """Guruhlar so'rov davomida bir marta yuklanishi va o'zgarganda yangilanishi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(name='Kuzatuvchi')
+        cls.user = User.objects.create_user('kuzatuvchi', password='x')
+        cls.user.groups.add(cls.group)
+
+    def test_order_list_loads_groups_once(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('order_list'))
+        self.assertEqual(response.status_code, 200)
+        group_queries = [q for q in ctx.captured_queries if '"auth_group"' in q['sql']]
+        self.assertEqual(len(group_queries), 1)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60)
+    def test_cross_request_cache_is_invalidated_on_group_change(self):
+        self.assertTrue(is_in_group(User.objects.get(pk=self.user.pk), 'Kuzatuvchi'))
+
+        # Yangi so'rovdagi foydalanuvchi obyekti guruhlarni keshdan oladi
+        fresh = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_in_group(fresh, 'Kuzatuvchi'))
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(is_in_group(User.objects.get(pk=self.user.pk), 'Kuzatuvchi'))
+
+
+class OverdueAlertTests(TestCase):
+    """Muddat ogohlantirishlari fon buyrug'ida, partiyalab yaratilishi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', password='x')
+        boss = User.objects.create_user('boshliq', password='x')
+        boss.groups.add(Group.objects.create(name="Ishlab Chiqarish Boshlig'i"))
+        cls.past = timezone.now() - timedelta(days=1)
+
+    def test_batch_creates_alerts_once(self):
+        late = [make_order(deadline=self.past) for _ in range(3)]
+        make_order(deadline=self.past, status='BAJARILDI')
+        make_order(deadline=timezone.now() + timedelta(days=1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            orders, notifications = process_overdue_orders()
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # SELECT buyurtmalar, SELECT adminlar, INSERT xabarlar, INSERT guruhlar,
+        # 2 ta hisoblagich so'rovi, UPDATE buyurtmalar
+        self.assertEqual(len(statements), 7)
+        # Har bir buyurtma uchun bitta guruh xabari (adminlar soniga bog'liq emas)
+        self.assertEqual((orders, notifications), (3, 3))
+        self.assertEqual(Notification.objects.filter(order__in=late, user__isnull=True).count(), 3)
+        self.assertEqual(NotificationCounter.objects.get(user=self.admin).unread, 3)
+        self.assertFalse(Order.objects.filter(pk__in=[o.pk for o in late], deadline_breach_alert_sent=False).exists())
+
+        self.assertEqual(process_overdue_orders(), (0, 0))
+
+    def test_order_list_does_not_write(self):
+        make_order(deadline=self.past)
+        self.client.force_login(self.admin)
+        self.client.get(reverse('order_list'))
+        self.assertFalse(Notification.objects.exists())
+
+
+class NotifyServiceTests(TestCase):
+    """notify() qabul qiluvchilarni bitta so'rovda topib, takrorlarsiz yozishi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.managers = Group.objects.create(name='Menejer/Tasdiqlovchi')
+        cls.bosses = Group.objects.create(name="Ishlab Chiqarish Boshlig'i")
+        cls.both = User.objects.create_user('ikkalasi', password='x')
+        cls.both.groups.add(cls.managers, cls.bosses)
+        cls.manager = User.objects.create_user('menejer', password='x')
+        cls.manager.groups.add(cls.managers)
+
+    def test_recipients_in_several_groups_get_one_row(self):
+        order = make_order()
+        with CaptureQueriesContext(connection) as ctx:
+            created = notify(['Menejer/Tasdiqlovchi', self.bosses, self.manager], order, 'Salom')
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        # SELECT a'zolar, INSERT xabar, INSERT guruhlar, INSERT/UPDATE hisoblagichlar
+        self.assertEqual(len(statements), 5)
+        # Guruh a'zosi bo'lgan menejer alohida shaxsiy nusxa olmaydi
+        self.assertEqual(len(created), 1)
+        self.assertIsNone(created[0].user_id)
+        for user in (self.both, self.manager):
+            self.assertEqual([n.pk for n in latest_notifications(user)], [created[0].pk])
+            self.assertEqual(unread_count(user), 1)
+
+    def test_order_confirm_queries_do_not_grow_with_workers(self):
+        def confirm(worker_count):
+            order = make_order(status='KIRITILDI', created_by=self.manager)
+            for i in range(worker_count):
+                user = User.objects.create_user(f'usta{order.pk}-{i}', password='x')
+                order.assigned_workers.add(Worker.objects.create(user=user, role='LIST'))
+            self.client.force_login(self.manager)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('order_confirm', args=[order.pk]))
+            self.assertEqual(Notification.objects.filter(order=order).count(), worker_count + 2)
+            return len(ctx.captured_queries)
+
+        confirm(1)  # ContentType keshini isitish
+        self.assertEqual(confirm(2), confirm(6))
+
+
+@override_settings(TELEGRAM_CHAT_ID='-1001')
+class TelegramOutboxTests(TestCase):
+    """Xabarlar navbatga yoziladi va run_outbox ularni soxta serverga yuboradi."""
+
+    def deliver(self, stub):
+        client = TelegramClient(token='test', api_url=stub.url)
+        return deliver_pending(client, ChatRateLimiter(min_interval=0), sleep=lambda seconds: None)
+
+    def test_enqueue_does_not_call_telegram(self):
+        with TelegramStubServer() as stub:
+            item = enqueue_message('Salom')
+        self.assertEqual(stub.requests, [])
+        self.assertEqual(item.status, 'PENDING')
+
+    def test_pending_message_is_sent(self):
+        item = enqueue_message('<b>Salom</b>', chat_id='-100')
+        with TelegramStubServer() as stub:
+            self.assertEqual(self.deliver(stub), (1, 0, 0))
+        self.assertEqual(stub.requests[0]['method'], 'sendMessage')
+        self.assertEqual(stub.requests[0]['data']['chat_id'], '-100')
+        self.assertEqual(stub.requests[0]['data']['parse_mode'], 'HTML')
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'SENT')
+        self.assertEqual(item.attempts, 1)
+
+    def test_rate_limited_message_is_retried_later(self):
+        item = enqueue_message('Salom')
+        with TelegramStubServer() as stub:
+            stub.responses.append((429, {'ok': False, 'parameters': {'retry_after': 30}}))
+            before = timezone.now()
+            self.assertEqual(self.deliver(stub), (0, 1, 0))
+            # Vaqti hali kelmagan, ikkinchi o'tishda yuborilmaydi
+            self.assertEqual(self.deliver(stub), (0, 0, 0))
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'PENDING')
+        self.assertGreaterEqual(item.next_attempt_at, before + timedelta(seconds=30))
+
+    def test_server_error_backs_off_and_bad_request_fails(self):
+        retry = enqueue_message('Birinchi')
+        broken = enqueue_message('Ikkinchi')
+        with TelegramStubServer() as stub:
+            stub.responses.extend([(500, {'ok': False}), (400, {'ok': False, 'description': 'Bad Request'})])
+            self.assertEqual(self.deliver(stub), (0, 1, 1))
+        retry.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((retry.status, retry.attempts), ('PENDING', 1))
+        self.assertGreater(retry.next_attempt_at, timezone.now())
+        self.assertEqual(broken.status, 'FAILED')
+        self.assertIn('Bad Request', broken.last_error)
+
+    @override_settings(TELEGRAM_BOT_TOKEN='', TELEGRAM_CHAT_ID='')
+    def test_unconfigured_outbox_keeps_messages_pending(self):
+        from django.core.management import call_command
+
+        item = enqueue_message('Salom')
+        out = StringIO()
+        call_command('run_outbox', '--once', stdout=out)
+        self.assertIn('TELEGRAM_BOT_TOKEN', out.getvalue())
+        self.assertEqual(item.chat_id, '')
+
+        # Chat ID yo'q: chatsiz xabar yuborilmaydi, chat ko'rsatilgani yuboriladi
+        enqueue_message('Guruhga', chat_id='-100')
+        with TelegramStubServer() as stub:
+            self.assertEqual(self.deliver(stub), (1, 0, 0))
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'PENDING')
+
+        with self.settings(TELEGRAM_CHAT_ID='-200'), TelegramStubServer() as stub:
+            self.assertEqual(self.deliver(stub), (1, 0, 0))
+        self.assertEqual(stub.requests[0]['data']['chat_id'], '-200')
+
+    def test_rate_limiter_spaces_messages_per_chat(self):
+        now = [0.0]
+        limiter = ChatRateLimiter(min_interval=1.0, per_minute=3, clock=lambda: now[0])
+        for _ in range(3):
+            self.assertEqual(limiter.wait_time('a'), 0)
+            limiter.record('a')
+            now[0] += 1.0
+        self.assertEqual(limiter.wait_time('a'), 57.0)
+        self.assertEqual(limiter.wait_time('b'), 0)
+        self.assertEqual(TelegramOutbox.objects.count(), 0)
+
+
+class OrderNumberSequenceTests(TestCase):
+    """Raqamlar yillik ketma-ketlikdan olinadi, oxirgi buyurtma qidirilmaydi."""
+
+    def test_numbers_follow_yearly_sequence(self):
+        year = timezone.localdate().year
+        OrderNumberSequence.objects.create(year=year, last_value=41)
+        self.assertEqual(make_order().order_number, f'ORD-{year}-0042')
+        self.assertEqual(reserve_order_numbers(3, year=2030), ['ORD-2030-0001', 'ORD-2030-0002', 'ORD-2030-0003'])
+
+    def test_child_order_gets_next_number(self):
+        order = make_order(status='TASDIQLANDI', worker_type='LIST')
+        order.status = 'USTA_TUGATDI'
+        order.save()
+        child = Order.objects.get(parent_order=order)
+        prefix, number = order.order_number.rsplit('-', 1)
+        self.assertEqual(child.order_number, f'{prefix}-{int(number) + 1:04d}')
+
+    def test_bulk_assignment_uses_one_reservation(self):
+        OrderNumberSequence.objects.create(year=timezone.localdate().year, last_value=7)
+        orders = [Order(customer_name=f'Mijoz {i}', product_name='Panel') for i in range(5)]
+        with CaptureQueriesContext(connection) as ctx:
+            assign_order_numbers(orders)
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 2)  # UPDATE + SELECT
+        self.assertEqual(len({order.order_number for order in orders}), 5)
+
+
+class OrderNumberConcurrencyTests(TransactionTestCase):
+    """Parallel oqimlar bir xil raqam olmasligi kerak."""
+
+    def test_parallel_reservations_are_unique(self):
+        results, errors = [], []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(5):
+                    results.extend(reserve_order_numbers(2, year=2031))
+            except Exception as e:  # pragma: no cover - xato bo'lsa test yiqiladi
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 80)
+        self.assertEqual(len(set(results)), 80)
+        self.assertEqual(OrderNumberSequence.objects.get(year=2031).last_value, 80)
+
+
+class OrderDirtyTrackingTests(TestCase):
+    """Order bazadan yuklangan qiymatlarni eslab qoladi, save() eski statusni so'ramaydi."""
+
+    def test_has_changed_and_previous(self):
+        order = Order.objects.get(pk=make_order(status='TASDIQLANDI').pk)
+        self.assertFalse(order.has_changed('status'))
+        order.status = 'ISHDA'
+        self.assertTrue(order.has_changed('status'))
+        self.assertEqual(order.previous('status'), 'TASDIQLANDI')
+        order.save()
+        self.assertFalse(order.has_changed('status'))
+        self.assertEqual(order.previous('status'), 'ISHDA')
+
+    def test_save_without_status_change_skips_child_lookup(self):
+        order = Order.objects.get(pk=make_order(status='USTA_TUGATDI', worker_type='LIST').pk)
+        order.deadline_breach_alert_sent = True
+        with CaptureQueriesContext(connection) as ctx:
+            order.save(update_fields=['deadline_breach_alert_sent'])
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+
+    def test_status_move_spawns_child_once(self):
+        order = Order.objects.get(pk=make_order(status='ISHDA', worker_type='LIST').pk)
+        order.status = 'USTA_TUGATDI'
+        order.save()
+        order.save()
+        self.assertEqual(Order.objects.filter(parent_order=order).count(), 1)
+
+
+class StageSpawnTests(TestCase):
+    """Keyingi bosqich buyurtmalari ommaviy, bitta tranzaksiyada yaratiladi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.panel_workers = [
+            Worker.objects.create(user=User.objects.create_user(f'panel{i}', password='x'), role='PANEL')
+            for i in range(3)
+        ]
+
+    def finished_orders(self, count):
+        orders = [make_order(status='ISHDA', worker_type='LIST') for _ in range(count)]
+        Order.objects.filter(pk__in=[o.pk for o in orders]).update(status='USTA_TUGATDI')
+        return list(Order.objects.filter(pk__in=[o.pk for o in orders]))
+
+    def spawn_queries(self, count):
+        orders = self.finished_orders(count)
+        with CaptureQueriesContext(connection) as ctx:
+            children = spawn_next_stage(orders)
+        self.assertEqual(len(children), count)
+        return len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']])
+
+    def test_queries_do_not_grow_with_orders(self):
+        # Birinchi chaqiruv hisobot qatorlarini yaratadi (UPDATE + INSERT), keyingilari faqat UPDATE
+        self.spawn_queries(1)
+        self.assertEqual(self.spawn_queries(2), self.spawn_queries(10))
+
+    def test_children_get_workers_and_notifications(self):
+        orders = self.finished_orders(2)
+        children = spawn_next_stage(orders)
+        for child in children:
+            self.assertEqual(child.stage, 'PANEL')
+            self.assertEqual(child.assigned_workers.count(), 3)
+            self.assertEqual(Notification.objects.filter(order=child).count(), 3)
+        self.assertEqual(spawn_next_stage(orders), [])
+
+    def test_signal_is_sent_after_commit(self):
+        received = []
+
+        def handler(sender, children, **kwargs):
+            received.extend(children)
+
+        stage_orders_spawned.connect(handler)
+        self.addCleanup(stage_orders_spawned.disconnect, handler)
+        with self.captureOnCommitCallbacks(execute=True):
+            children = spawn_next_stage(self.finished_orders(2))
+            self.assertEqual(received, [])
+        self.assertEqual(received, children)
+
+    def test_finish_orders_closes_shift(self):
+        orders = [make_order(status='ISHDA', worker_type='PANEL') for _ in range(3)]
+        done = make_order(status='BAJARILDI', worker_type='PANEL')
+        finished, children = finish_orders(orders + [done])
+        self.assertEqual(len(finished), 3)
+        self.assertEqual(Order.objects.filter(status='USTA_TUGATDI').count(), 3)
+        self.assertEqual({child.stage for child in children}, {'UGOL'})
+
+
+class ReportRollupTests(TestCase):
+    """Kunlik yig'ma jadvallar Order o'zgarishlari bilan birga yangilanadi va qayta qurilgani bilan bir xil."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.worker = Worker.objects.create(user=User.objects.create_user('list1', password='x'), role='LIST')
+        cls.other = Worker.objects.create(user=User.objects.create_user('list2', password='x'), role='LIST')
+
+    def stats_rows(self):
+        order_rows = set(OrderDailyStats.objects.filter(order_count__gt=0).values_list(
+            'day', 'stage', 'worker_type', 'status', 'panel_type', 'panel_thickness', 'panel_subtype', 'eshik_turi',
+            'order_count', 'kvadrat_sum', 'revenue_sum', 'prepayment_sum',
+        ))
+        worker_rows = set(WorkerDailyStats.objects.filter(order_count__gt=0).values_list(
+            'day', 'worker_id', 'order_count', 'kvadrat_sum',
+        ))
+        return order_rows, worker_rows
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats_rows()
+        rebuild_order_stats()
+        rebuild_worker_stats()
+        self.assertEqual(incremental, self.stats_rows())
+
+    def test_transitions_move_totals_between_statuses(self):
+        order = make_order(status='KIRITILDI', panel_type='PIR', panel_thickness='5',
+                           panel_kvadrat='12.50', total_price='1000.00', prepayment='200.00')
+        make_order(status='KIRITILDI', panel_kvadrat='3.00', total_price='50.00')
+
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'TASDIQLANDI'
+        order.total_price = '1200.00'
+        order.save()
+
+        today = timezone.localdate()
+        totals = order_totals(today, today, stages=['ASOSIY'])
+        self.assertEqual(totals['order_count'], 2)
+        self.assertEqual(totals['revenue_sum'], Decimal('1250.00'))
+        confirmed = OrderDailyStats.objects.get(status='TASDIQLANDI')
+        self.assertEqual((confirmed.order_count, confirmed.kvadrat_sum), (1, Decimal('12.50')))
+        self.assertMatchesRebuild()
+
+    def test_finished_orders_count_for_assigned_workers(self):
+        order = make_order(status='ISHDA', panel_kvadrat='10.00')
+        order.assigned_workers.add(self.worker, self.other)
+        finished, _ = finish_orders([order])
+        self.assertEqual(
+            {row['worker_id']: row['total_finished_kvadrat'] for row in worker_activity_rows()},
+            {self.worker.pk: Decimal('10.00'), self.other.pk: Decimal('10.00')},
+        )
+        self.assertMatchesRebuild()
+
+        order = Order.objects.get(pk=order.pk)
+        order.assigned_workers.remove(self.other)
+        self.assertEqual([row['worker_id'] for row in worker_activity_rows()], [self.worker.pk])
+        self.assertMatchesRebuild()
+
+        order.delete()
+        self.assertEqual(worker_activity_rows(), [])
+        # Faqat keyingi bosqich (PANEL) buyurtmasi qoladi
+        self.assertEqual(order_totals(stages=['ASOSIY'])['order_count'], 0)
+        self.assertEqual(order_totals()['order_count'], 1)
+        self.assertMatchesRebuild()
+
+    def test_update_fields_and_untracked_instances(self):
+        order = make_order(status='ISHDA', panel_kvadrat='4.00')
+        order.assigned_workers.add(self.worker)
+
+        stale = Order(pk=order.pk, created_at=order.created_at, stage='ASOSIY', worker_type='LIST',
+                      status='TAYYOR', panel_kvadrat=Decimal('4.00'), worker_finished_at=timezone.now())
+        stale.save(update_fields=['status', 'worker_finished_at'])
+        self.assertEqual(worker_activity_rows()[0]['total_order_count'], 1)
+        self.assertMatchesRebuild()
+
+    def test_sales_report_reads_rollup(self):
+        admin = User.objects.create_superuser('boss', password='x')
+        for _ in range(3):
+            make_order(panel_kvadrat='2.00', total_price='100.00')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('sales_report_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_orders_count'], 3)
+        self.assertEqual(response.context['total_revenue'], Decimal('300.00'))
+        self.assertFalse(any('SUM("orders_order"' in q['sql'] for q in ctx.captured_queries))
+
+        response = self.client.get(reverse('weekly_report_view'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['order_totals']['order_count'], 3)
+
+
+class CustomerStatsTests(TestCase):
+    """Mijoz statistikasi Order o'zgarishlari bilan yangilanadi, reyting sahifasi undan o'qiydi."""
+
+    def stats(self):
+        return {
+            row['customer_unique_id']: row
+            for row in CustomerStats.objects.values(
+                'customer_unique_id', 'order_count', 'total_m2', 'total_billed', 'total_paid', 'loyalty_score',
+            )
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats()
+        rebuild_customer_stats()
+        self.assertEqual(incremental, self.stats())
+
+    def test_saves_and_prepayment_changes_update_row(self):
+        orders = [make_order(customer_unique_id='C-7', panel_kvadrat='5.00', total_price='100.00') for _ in range(6)]
+        make_order(customer_unique_id='C-7', parent_order=orders[0], total_price='999.00')
+        row = self.stats()['C-7']
+        self.assertEqual((row['order_count'], row['total_billed'], row['loyalty_score']), (6, Decimal('600.00'), 'C'))
+
+        for order in orders:
+            order = Order.objects.get(pk=order.pk)
+            order.prepayment = Decimal('90.00')
+            order.save(update_fields=['prepayment'])
+        row = self.stats()['C-7']
+        self.assertEqual((row['total_paid'], row['loyalty_score']), (Decimal('540.00'), 'A'))
+        self.assertMatchesRebuild()
+
+    def test_moving_and_deleting_orders(self):
+        first = make_order(customer_unique_id='C-1', total_price='10.00')
+        make_order(customer_unique_id='C-1', total_price='20.00')
+
+        first = Order.objects.get(pk=first.pk)
+        first.customer_unique_id = 'C-2'
+        first.save()
+        self.assertEqual({cid: row['order_count'] for cid, row in self.stats().items()}, {'C-1': 1, 'C-2': 1})
+
+        first.delete()
+        self.assertEqual(set(self.stats()), {'C-1'})
+        self.assertMatchesRebuild()
+
+    def test_rating_page_reads_stats(self):
+        big = make_order(customer_unique_id='BIG', panel_kvadrat='50.00', total_price='500.00')
+        make_order(customer_unique_id='BIG', parent_order=big, stage='PANEL', product_name='Panel bosqichi')
+        make_order(customer_unique_id='SMALL', panel_kvadrat='1.00', total_price='10.00')
+        self.client.force_login(User.objects.create_superuser('boss', password='x'))
+
+        response = self.client.get(reverse('customer_rating'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c.customer_unique_id for c in response.context['m2_ratings']], ['BIG', 'SMALL'])
+        self.assertEqual(response.context['overall_stats']['total_orders'], 2)
+
+        self.assertNotIn('Panel bosqichi', [p['product_name'] for p in response.context['product_rankings']])
+
+        # Ro'yxat CustomerStats jami bilan mos: child bosqichlar kirmaydi
+        response = self.client.get(reverse('customer_rating'), {'get_orders': 'BIG'})
+        self.assertEqual(response.json()['stats']['total_area'], 50.0)
+        self.assertEqual(response.json()['stats']['total_orders'], 1)
+        self.assertEqual(len(response.json()['orders']), 1)
+
+        data = self.client.get(reverse('get_customer_orders', args=['BIG'])).json()
+        self.assertEqual(data['stats']['total_orders'], 1)
+        self.assertEqual([o['product_name'] for o in data['orders']], ['Sendvich panel'])
+
+    def test_rating_breakdowns_read_rollups(self):
+        make_order(panel_type='PIR', panel_subtype='TOM', panel_thickness='5', panel_kvadrat='10.00')
+        secret = make_order(panel_type='PIR', panel_subtype='SECRETPIR', panel_thickness='8', panel_kvadrat='4.00')
+        make_order(eshik_turi='F1', total_price='100.00')
+        make_order(eshik_turi='F1', total_price='50.00')
+        secret = Order.objects.get(pk=secret.pk)
+        secret.panel_subtype = 'TOM'
+        secret.save()
+        self.client.force_login(User.objects.create_superuser('boss', password='x'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('customer_rating'))
+        self.assertEqual(
+            [(row['panel_thickness'], row['count'], row['total_area']) for row in response.context['thickness_stat']],
+            [('5', 1, Decimal('10.00')), ('8', 1, Decimal('4.00'))],
+        )
+        pir = response.context['pir_details']
+        self.assertEqual((pir['tom_panels'], pir['secret_panels'], pir['total_pir']), (2, 0, 2))
+        self.assertEqual(
+            [(row['eshik_turi'], row['eshik_soni'], row['total_revenue']) for row in response.context['eshik_stat']],
+            [('F1', 2, Decimal('150.00'))],
+        )
+        for column in ('panel_thickness', 'panel_subtype', 'eshik_turi'):
+            self.assertFalse(any(f'"orders_order"."{column}"' in q['sql'] for q in ctx.captured_queries), column)
+
+
+class StreamingExportTests(TestCase):
+    """CSV eksportlari oqim bilan yuboriladi va qatorlar soniga qarab so'rovlar ko'paymaydi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('boss', password='x', first_name='Bosh', last_name='Admin')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def export(self, name, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name), params or {})
+            self.assertTrue(response.streaming)
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        return lines, len(ctx.captured_queries)
+
+    def test_orders_export_streams_with_constant_queries(self):
+        make_order(created_by=self.admin)
+        few_lines, few = self.export('export_orders_csv')
+        for _ in range(9):
+            make_order(created_by=self.admin)
+        many_lines, many = self.export('export_orders_csv')
+        self.assertEqual((len(few_lines), len(many_lines)), (2, 11))
+        self.assertEqual(few, many)
+        self.assertTrue(many_lines[1].endswith('Bosh Admin'))
+
+    def test_orders_export_accepts_date_range(self):
+        old = make_order()
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+        make_order()
+        start = (timezone.localdate() - timedelta(days=45)).isoformat()
+        lines, _ = self.export('export_orders_csv', {'start_date': start, 'end_date': timezone.localdate().isoformat()})
+        self.assertEqual(len(lines), 3)
+        lines, _ = self.export('export_orders_csv')
+        self.assertEqual(len(lines), 2)
+
+    def test_audit_log_export_streams_events(self):
+        with acting_as(self.admin):
+            orders = [make_order() for _ in range(5)]
+        few_lines, few = self.export('export_audit_log_csv')
+        with acting_as(self.admin):
+            for order in orders:
+                order.status = 'ISHDA'
+                order.save()
+        many_lines, many = self.export('export_audit_log_csv', {'action': 'STATUS'})
+        self.assertEqual((len(few_lines), len(many_lines)), (6, 6))
+        self.assertEqual(few, many)
+        self.assertIn('Bosh Admin', many_lines[1])
+
+    def test_worker_activity_export_streams(self):
+        lines, _ = self.export('export_worker_activity_csv')
+        self.assertEqual(lines, ['T/r,Usta F.I.Sh.,Bajarilgan Kvadratura (m²),Bajarilgan Buyurtmalar Soni'])
+
+
+class OrderAuditEventTests(TestCase):
+    """Buyurtmalar jurnali: signallar orqali yoziladi, sahifa so'rovlari qatorlar soniga bog'liq emas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('boss', password='x')
+        cls.manager = User.objects.create_user('menejer', password='x')
+        cls.manager.groups.add(Group.objects.create(name='Menejer/Tasdiqlovchi'))
+
+    def test_status_change_records_actor_from_request(self):
+        order = make_order(status='KIRITILDI')
+        self.client.force_login(self.manager)
+        self.client.get(reverse('order_confirm', args=[order.pk]))
+        event = OrderAuditEvent.objects.get(order=order, action='STATUS')
+        self.assertEqual((event.from_status, event.to_status, event.actor), ('KIRITILDI', 'TASDIQLANDI', self.manager))
+        self.assertEqual(OrderAuditEvent.objects.get(order=order, action='CREATE').actor, None)
+
+    def test_unchanged_save_and_delete(self):
+        order = make_order()
+        order.product_name = 'Boshqa'
+        order.save()
+        self.assertFalse(OrderAuditEvent.objects.filter(action='STATUS').exists())
+        number = order.order_number
+        order.delete()
+        event = OrderAuditEvent.objects.get(action='DELETE')
+        self.assertEqual((event.order_id, event.order_number), (None, number))
+
+    def test_bulk_transitions_are_recorded(self):
+        orders = [make_order(status='ISHDA', worker_type='LIST') for _ in range(2)]
+        finished, children = finish_orders(orders)
+        self.assertEqual(OrderAuditEvent.objects.filter(action='STATUS', to_status='USTA_TUGATDI').count(), 2)
+        self.assertEqual(
+            OrderAuditEvent.objects.filter(action='CREATE', order__in=children).count(), len(children),
+        )
+
+    def page_queries(self, url, params=None):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_audit_page_queries_do_not_grow(self):
+        with acting_as(self.manager):
+            make_order()
+        _, few = self.page_queries(reverse('product_audit_log_view'))
+        with acting_as(self.manager):
+            for _ in range(20):
+                make_order()
+        response, many = self.page_queries(reverse('product_audit_log_view'), {'limit': 10})
+        self.assertEqual(few, many)
+        self.assertTrue(response.context['events'].has_more)
+
+        response, _ = self.page_queries(
+            reverse('product_audit_log_more'), {'cursor': response.context['events'].next_cursor, 'limit': 10},
+        )
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['html'].count('<tr>'), 10)
+
+    def test_backfill_from_log_entries_is_idempotent(self):
+        from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+        from django.contrib.contenttypes.models import ContentType
+        from django.core.management import call_command
+
+        order = make_order()
+        OrderAuditEvent.objects.all().delete()
+        content_type = ContentType.objects.get_for_model(Order)
+        LogEntry.objects.create(
+            user=self.manager, content_type=content_type, object_id=str(order.pk), object_repr=str(order),
+            action_flag=CHANGE, change_message="Status o'zgartirildi: KIRITILDI -> TASDIQLANDI",
+        )
+        LogEntry.objects.create(
+            user=self.manager, content_type=content_type, object_id='99999', object_repr='ORD-OLD',
+            action_flag=DELETION, change_message="O'chirildi",
+        )
+        call_command('backfill_order_audit', stdout=StringIO())
+        call_command('backfill_order_audit', stdout=StringIO())
+        self.assertEqual(OrderAuditEvent.objects.count(), 2)
+        status = OrderAuditEvent.objects.get(action='STATUS')
+        self.assertEqual((status.order, status.from_status, status.to_status), (order, 'KIRITILDI', 'TASDIQLANDI'))
+        self.assertEqual(OrderAuditEvent.objects.get(action='DELETE').order_number, 'ORD-OLD')
+
+
+class StockLedgerTests(TestCase):
+    """Qoldiq faqat shartli UPDATE bilan o'zgaradi, tranzaksiya yozuvi bilan birga."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('omborchi', password='x')
+
+    def setUp(self):
+        self.material = Material.objects.create(name='Profil', unit='m', quantity=Decimal('10'))
+
+    def test_movements_return_balance(self):
+        movement, balance = record_movement(self.material, 'IN', Decimal('2.5'), performed_by=self.user)
+        self.assertEqual(balance, Decimal('12.5'))
+        _, balance = record_movement(self.material, 'OUT', 4)
+        self.assertEqual(balance, Decimal('8.5'))
+        self.assertEqual(self.material.quantity, Decimal('8.5'))
+        self.assertEqual(reverse_movement(movement), Decimal('6'))
+        self.assertEqual(MaterialTransaction.objects.count(), 1)
+
+    def test_overdraw_is_rejected_without_ledger_row(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            record_movement(self.material, 'OUT', 11)
+        self.assertEqual(ctx.exception.available, Decimal('10'))
+        self.material.refresh_from_db()
+        self.assertEqual(self.material.quantity, Decimal('10'))
+        self.assertFalse(MaterialTransaction.objects.exists())
+
+    def test_no_read_modify_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            record_movement(self.material, 'OUT', 1)
+        sql = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertTrue(sql[0].startswith('UPDATE'))
+        self.assertEqual(len(sql), 3)
+
+    def test_create_view_counts_once(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('material_transaction_create'), {
+            'transaction_type': 'OUT', 'material': self.material.pk, 'quantity_change': '3',
+        })
+        self.material.refresh_from_db()
+        self.assertEqual(self.material.quantity, Decimal('7'))
+        self.assertEqual(MaterialTransaction.objects.get().performed_by, self.user)
+
+    def test_add_view_keeps_form_fields(self):
+        order = make_order()
+        self.client.force_login(self.user)
+        self.client.post(reverse('add_transaction'), {
+            'transaction_type': 'IN', 'material': self.material.pk, 'quantity_change': '2',
+            'order': order.pk, 'new_category_name': 'Profillar', 'product_name': 'P-20', 'notes': 'Kirim',
+        })
+        movement = MaterialTransaction.objects.get()
+        self.assertEqual((movement.order, movement.notes), (order, "Maxsulot: P-20\nKirim"))
+        self.material.refresh_from_db()
+        self.assertEqual((self.material.category.name, self.material.quantity), ('Profillar', Decimal('12')))
+
+    def test_rejected_overdraw_creates_no_category(self):
+        # Forma tekshiruvidan keyin boshqa skaner qoldiqni olib qo'ydi: ledger chiqimni rad etadi
+        def drain_stock(sender, **kwargs):
+            Material.objects.filter(pk=self.material.pk).update(quantity=Decimal('1'))
+
+        post_save.connect(drain_stock, sender=Category)
+        self.addCleanup(post_save.disconnect, drain_stock, sender=Category)
+
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('material_transaction_create'), {
+            'transaction_type': 'OUT', 'material': self.material.pk, 'quantity_change': '3',
+            'new_category_name': 'Profillar',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.material.refresh_from_db()
+        self.assertEqual((self.material.category, self.material.quantity), (None, Decimal('10')))
+        self.assertFalse(Category.objects.exists())
+        self.assertFalse(MaterialTransaction.objects.exists())
+
+    def test_remove_view_uses_ledger(self):
+        self.client.force_login(self.user)
+        url = reverse('remove_transaction')
+        headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+        response = self.client.post(url, {'material_id': self.material.pk, 'quantity': '4', 'reason': 'Sex'}, **headers)
+        self.assertEqual(response.json(), {'success': True, 'message': 'Chiqim muvaffaqiyatli amalga oshirildi.', 'quantity': 6.0})
+        response = self.client.post(url, {'material_id': self.material.pk, 'quantity': '7'}, **headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MaterialTransaction.objects.get().notes, 'Sex')
+
+
+class MaterialLookupTests(TestCase):
+    """Skaner kodlari normallashtiriladi, keshlanadi va Material o'zgarganda kesh tozalanadi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('skaner', password='x')
+
+    def setUp(self):
+        material_lookup.cache.clear()
+        self.addCleanup(material_lookup.cache.clear)
+        self.material = Material.objects.create(name='Bolt', product_name='blt 42', code='QR-1', unit='son')
+
+    def test_code_and_normalized_product_name(self):
+        self.assertEqual(self.material.product_code, 'BLT42')
+        self.assertEqual(material_lookup.lookup('qr-1').id, self.material.pk)
+        self.assertEqual(material_lookup.lookup(' Blt42 ').id, self.material.pk)
+        self.assertIsNone(material_lookup.lookup('YOQ'))
+
+    def test_warm_cache_skips_database(self):
+        material_lookup.lookup('BLT42')
+        material_lookup.lookup('YOQ')
+        before = material_lookup.cache.stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(material_lookup.lookup('blt42').name, 'Bolt')
+            self.assertIsNone(material_lookup.lookup('yoq'))
+        after = material_lookup.cache.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['negative_hits'] - before['negative_hits'], 1)
+
+    def test_save_invalidates_and_misses_expire(self):
+        material_lookup.lookup('BLT42')
+        self.material.product_name = 'blt 43'
+        self.material.save()
+        self.assertIsNone(material_lookup.lookup('BLT42'))
+        self.assertEqual(material_lookup.lookup('BLT43').id, self.material.pk)
+
+        cache = material_lookup.LookupCache(maxsize=2, miss_ttl=5, clock=lambda: now[0])
+        now = [0.0]
+        cache.set('A', None)
+        self.assertEqual(cache.get('A'), (True, None))
+        now[0] = 6.0
+        self.assertEqual(cache.get('A'), (False, None))
+        for key in 'BCD':
+            cache.set(key, None)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_api_auto_creates_with_valid_unit(self):
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('find_material_api'), {'code': 'new-77'}).json()
+        self.assertTrue(data['is_new'])
+        created = Material.objects.get(pk=data['material_id'])
+        self.assertEqual((created.unit, created.product_code), ('son', 'NEW-77'))
+        data = self.client.get(reverse('find_material_api'), {'code': 'NEW-77'}).json()
+        self.assertEqual((data['is_new'], data['material_id']), (False, created.pk))
+
+
+class MaterialCatalogTests(TestCase):
+    """Katalog versiyalanadi: ETag bo'yicha 304, `since` bilan faqat o'zgarganlar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('omborchi', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name='Metall')
+        self.bolt = Material.objects.create(name='Bolt', unit='son', category=self.category)
+        self.glue = Material.objects.create(name='Yelim', unit='kg')
+
+    def get(self, **params):
+        headers = {}
+        if 'etag' in params:
+            headers['HTTP_IF_NONE_MATCH'] = params.pop('etag')
+        return self.client.get(reverse('material_catalog_api'), params, **headers)
+
+    def test_etag_and_incremental_changes(self):
+        response = self.get()
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual([m['name'] for m in data['materials']], ['Bolt', 'Yelim'])
+        self.assertEqual(data['materials'][0]['category'], 'Metall')
+        self.assertEqual(self.get(etag=response['ETag']).status_code, 304)
+
+        version = data['version']
+        self.glue.name = 'Yelim 2'
+        self.glue.save()
+        self.assertEqual(self.get(etag=response['ETag']).status_code, 200)
+        changed = self.get(since=version).json()
+        self.assertFalse(changed['full'])
+        self.assertEqual([m['name'] for m in changed['materials']], ['Yelim 2'])
+
+        self.category.name = 'Po\'lat'
+        self.category.save()
+        changed = self.get(since=changed['version']).json()
+        self.assertEqual([m['category'] for m in changed['materials']], ["Po'lat"])
+
+    def test_stock_movements_do_not_change_version(self):
+        version = MaterialCatalogVersion.objects.get().version
+        record_movement(self.bolt, 'IN', 5)
+        self.assertEqual(MaterialCatalogVersion.objects.get().version, version)
+
+    def test_delete_forces_full_reload(self):
+        version = self.get().json()['version']
+        self.glue.delete()
+        data = self.get(since=version).json()
+        self.assertTrue(data['full'])
+        self.assertEqual([m['name'] for m in data['materials']], ['Bolt'])
+
+    def test_transaction_page_does_not_embed_catalog(self):
+        response = self.client.get(reverse('material_transaction_create'))
+        self.assertNotIn('material_data_json', response.context)
+        self.assertContains(response, reverse('material_catalog_api'))
+
+
+class TransactionFormAutocompleteTests(TestCase):
+    """Kirim/chiqim formasi barcha buyurtma va materiallarni chizmaydi; tanlov qidiruv orqali."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('omborchi', password='x')
+        cls.bolt = Material.objects.create(name='Bolt', product_name='blt 42', unit='son', quantity=Decimal('5'))
+        cls.glue = Material.objects.create(name='Yelim', code='GL-1', unit='kg')
+        cls.open_order = make_order(customer_name='Anvar', status='TASDIQLANDI')
+        cls.done_order = make_order(customer_name='Anvar', status='BAJARILDI')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_form_html_does_not_grow_with_orders(self):
+        html = str(MaterialTransactionForm()['order']) + str(MaterialTransactionForm()['material'])
+        for _ in range(10):
+            make_order()
+            Material.objects.create(name=f'M-{Material.objects.count()}')
+        self.assertEqual(len(str(MaterialTransactionForm()['order']) + str(MaterialTransactionForm()['material'])), len(html))
+        self.assertIn('data-autocomplete-url', html)
+
+    def test_bound_form_renders_only_selected_and_validates_without_loading_lists(self):
+        data = {'transaction_type': 'IN', 'material': self.glue.pk, 'quantity_change': '2', 'order': self.open_order.pk}
+        form = MaterialTransactionForm(data)
+        # Maydon uchun bittadan SELECT + model validatsiyasidagi FK mavjudlik tekshiruvi
+        with self.assertNumQueries(4):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(str(form['material']).count('<option'), 2)
+        self.assertFalse(MaterialTransactionForm({**data, 'material': 'x'}).is_valid())
+
+    def test_material_search(self):
+        url = reverse('material_autocomplete_api')
+        names = lambda q: [r['id'] for r in self.client.get(url, {'q': q}).json()['results']]
+        self.assertEqual(names('bo'), [self.bolt.pk])
+        self.assertEqual(names('gl-'), [self.glue.pk])
+        self.assertEqual(names('BLT4'), [self.bolt.pk])
+        self.assertEqual(len(self.client.get(url, {'limit': 1}).json()['results']), 1)
+
+    def test_order_search_only_open_orders(self):
+        results = self.client.get(reverse('order_autocomplete_api'), {'q': 'anv'}).json()['results']
+        self.assertEqual([r['id'] for r in results], [self.open_order.pk])
+
+    def test_create_view_links_order_and_new_category(self):
+        self.client.post(reverse('material_transaction_create'), {
+            'transaction_type': 'IN', 'material': self.bolt.pk, 'quantity_change': '1',
+            'order': self.open_order.pk, 'new_category_name': 'Mahkamlagich',
+        })
+        movement = MaterialTransaction.objects.get()
+        self.assertEqual(movement.order, self.open_order)
+        self.bolt.refresh_from_db()
+        self.assertEqual((self.bolt.category.name, self.bolt.quantity), ('Mahkamlagich', Decimal('6')))
+
+
+class ScannerIngestTests(TestCase):
+    """Skaner paketi: bir necha so'rov bilan saqlanadi, qayta yuborilsa ikki marta yozilmaydi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('skaner', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.bolt = Material.objects.create(name='Bolt', code='BLT-1', unit='son', quantity=Decimal('10'))
+        self.glue = Material.objects.create(name='Yelim', product_name='GLUE-7', unit='kg', quantity=Decimal('1'))
+
+    def post(self, items):
+        return self.client.post(
+            reverse('save_scanned_transactions_api'), json.dumps({'items': items}), content_type='application/json',
+        ).json()
+
+    def test_batch_is_saved_with_aggregated_delta(self):
+        order = make_order()
+        items = [
+            {'code': 'BLT-1', 'type': 'OUT', 'qty': 2, 'client_scan_id': f's-{i}', 'order_id': order.pk}
+            for i in range(4)
+        ] + [{'code': 'GLUE-7', 'type': 'IN', 'qty': '0.5', 'client_scan_id': 'g-1'}]
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.post(items)
+        self.assertEqual((data['saved'], data['failed']), (5, 0))
+        self.assertEqual(data['results'][0]['balance'], 2.0)
+        self.bolt.refresh_from_db()
+        self.assertEqual(self.bolt.quantity, Decimal('2'))
+        self.assertEqual(MaterialTransaction.objects.filter(order=order).count(), 4)
+        # Sessiya, foydalanuvchi, guruhlar + mavjud skanlar, materiallar, buyurtmalar,
+        # har bir material uchun UPDATE (2), qoldiqlar, bitta INSERT
+        self.assertEqual(len([q for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]), 10)
+
+    def test_retry_is_idempotent(self):
+        items = [{'code': 'BLT-1', 'type': 'OUT', 'qty': 3, 'client_scan_id': 'retry-1'}]
+        first = self.post(items)
+        second = self.post(items + items)
+        self.assertEqual(first['saved'], 1)
+        self.assertEqual([r['status'] for r in second['results']], ['duplicate', 'duplicate'])
+        self.assertEqual(second['results'][0]['transaction_id'], first['results'][0]['transaction_id'])
+        self.bolt.refresh_from_db()
+        self.assertEqual(self.bolt.quantity, Decimal('7'))
+
+    def test_overdraw_and_unknown_code_fail_per_item(self):
+        data = self.post([
+            {'code': 'GLUE-7', 'type': 'OUT', 'qty': 1, 'client_scan_id': 'a'},
+            {'code': 'GLUE-7', 'type': 'OUT', 'qty': 1, 'client_scan_id': 'b'},
+            {'code': 'NOMALUM', 'type': 'IN', 'qty': 1, 'client_scan_id': 'c'},
+            {'code': 'BLT-1', 'type': 'IN', 'qty': 'abc', 'client_scan_id': 'd'},
+            {'code': 'BLT-1', 'type': 'IN', 'qty': 5, 'client_scan_id': 'e'},
+        ])
+        self.assertEqual([r['status'] for r in data['results']], ['error', 'error', 'error', 'error', 'saved'])
+        self.assertIn("yetarli qoldiq yo'q", data['results'][0]['error'])
+        self.glue.refresh_from_db()
+        self.assertEqual(self.glue.quantity, Decimal('1'))
+        self.assertTrue(MaterialTransaction.objects.get(client_scan_id='e').transaction_barcode)
+
+    def test_bad_payload(self):
+        response = self.client.post(reverse('save_scanned_transactions_api'), 'x', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class StockConcurrencyTests(TransactionTestCase):
+    """Parallel chiqimlar qoldiqni manfiyga tushirmaydi va hech biri yo'qolmaydi."""
+
+    def test_parallel_outs_never_overdraw(self):
+        material = Material.objects.create(name='Vint', unit='son', quantity=Decimal('5'))
+        done, rejected, errors = [], [], []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            try:
+                barrier.wait()
+                record_movement(Material.objects.get(pk=material.pk), 'OUT', 1)
+                done.append(1)
+            except InsufficientStock:
+                rejected.append(1)
+            except Exception as e:  # pragma: no cover - xato bo'lsa test yiqiladi
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual((len(done), len(rejected)), (5, 3))
+        material.refresh_from_db()
+        self.assertEqual(material.quantity, Decimal('0'))
+        self.assertEqual(MaterialTransaction.objects.count(), 5)
+
+
+class NotificationCounterTests(TestCase):
+    """Belgi hisoblagichdan o'qiladi, o'qish endpointlari uni kamaytiradi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qabul', password='x')
+        cls.other = User.objects.create_user('boshqa', password='x')
+
+    def setUp(self):
+        self.order = make_order()
+        self.client.force_login(self.user)
+
+    def counter(self, user=None):
+        return NotificationCounter.objects.get(user=user or self.user).unread
+
+    def test_counter_follows_create_and_delete(self):
+        notify([self.user, self.other], self.order, 'Bir')
+        notify(self.user, self.order, 'Ikki')
+        single = Notification.objects.create(user=self.user, order=self.order, message='Uch')
+        self.assertEqual((self.counter(), self.counter(self.other)), (3, 1))
+        single.delete()
+        self.assertEqual(self.counter(), 2)
+
+    def test_latest_endpoint_does_not_count_history(self):
+        notify(self.user, self.order, 'Bir')
+        notify(self.user, self.order, 'Ikki')
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('notifications_api'), {'limit': 1}).json()
+        self.assertEqual(data['unread'], 2)
+        self.assertEqual([n['message'] for n in data['notifications']], ['Ikki'])
+        self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+
+    def test_mark_one_and_all_read(self):
+        first, second = notify(self.user, self.order, 'Bir') + notify(self.user, self.order, 'Ikki')
+        notify(self.other, self.order, 'Begona')
+
+        data = self.client.post(reverse('notification_mark_read_api', args=[first.pk])).json()
+        self.assertEqual((data['changed'], data['unread']), (True, 1))
+        data = self.client.post(reverse('notification_mark_read_api', args=[first.pk])).json()
+        self.assertEqual((data['changed'], data['unread']), (False, 1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.post(reverse('notifications_mark_all_read_api')).json()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "orders_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(self.counter(), 0)
+        self.assertEqual(self.counter(self.other), 1)
+
+
+class GroupNotificationTests(TestCase):
+    """Guruh xabari bir marta yoziladi, o'qilganlik har bir foydalanuvchi uchun alohida."""
+
+    @classmethod
+    def setUpTestData(cls):
+        managers = Group.objects.create(name='Menejer/Tasdiqlovchi')
+        cls.members = [User.objects.create_user(f'menejer{i}', password='x') for i in range(5)]
+        for user in cls.members:
+            user.groups.add(managers)
+        cls.outsider = User.objects.create_user('begona', password='x')
+        cls.superuser = User.objects.create_superuser('bosh', password='x')
+
+    def setUp(self):
+        self.order = make_order()
+
+    def test_group_message_is_stored_once(self):
+        notify('Menejer/Tasdiqlovchi', self.order, 'Tasdiqlash talab qilinadi')
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(NotificationReceipt.objects.count(), 0)
+        self.assertEqual(latest_notifications(self.outsider), [])
+
+    def test_inbox_merges_direct_and_group(self):
+        notify('Menejer/Tasdiqlovchi', self.order, 'Guruhga')
+        notify(self.members[0], self.order, 'Shaxsiy')
+        inbox = latest_notifications(self.members[0])
+        self.assertEqual([n.message for n in inbox], ['Shaxsiy', 'Guruhga'])
+        self.assertEqual(unread_count(self.members[0]), 2)
+
+    def test_read_receipt_is_per_user(self):
+        group_message, = notify('Menejer/Tasdiqlovchi', self.order, 'Guruhga')
+        self.assertTrue(mark_read(self.members[0], group_message.pk))
+        self.assertFalse(mark_read(self.members[0], group_message.pk))
+        self.assertFalse(mark_read(self.outsider, group_message.pk))
+        self.assertEqual(NotificationReceipt.objects.count(), 1)
+        self.assertEqual(latest_notifications(self.members[0]), [])
+        self.assertEqual(len(latest_notifications(self.members[1])), 1)
+        self.assertEqual((unread_count(self.members[0]), unread_count(self.members[1])), (0, 1))
+
+        self.client.force_login(self.members[1])
+        self.client.post(reverse('notifications_mark_all_read_api'))
+        self.assertEqual(unread_count(self.members[1]), 0)
+        self.assertTrue(latest_notifications(self.members[1], unread_only=False)[0].is_read)
+
+    def test_membership_change_updates_counter(self):
+        notify('Menejer/Tasdiqlovchi', self.order, 'Guruhga')
+        managers = Group.objects.get(name='Menejer/Tasdiqlovchi')
+
+        self.outsider.groups.add(managers)
+        self.assertEqual(unread_count(self.outsider), 1)
+        self.assertEqual(len(latest_notifications(User.objects.get(pk=self.outsider.pk))), 1)
+
+        self.members[0].groups.remove(managers)
+        self.assertEqual(unread_count(self.members[0]), 0)
+
+        managers.user_set.clear()
+        self.assertEqual([unread_count(user) for user in self.members[1:] + [self.outsider]], [0] * 5)
+        managers.user_set.add(self.members[1])
+        self.assertEqual(unread_count(self.members[1]), 1)
+
+    def test_superuser_sees_admin_group_and_delete_updates_counters(self):
+        message, = notify('Glavniy Admin', self.order, 'Adminlarga')
+        self.assertEqual(unread_count(self.superuser), 1)
+        self.assertEqual(latest_notifications(self.superuser), [message])
+        message.delete()
+        self.assertEqual(unread_count(self.superuser), 0)
+
+
+class RecordingBroker:
+    """Testlar uchun broker: e'lon qilingan hodisalarni ro'yxatga yozadi."""
+    published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+
+
+@override_settings(LIVE_BROKER='orders.tests.RecordingBroker')
+class LiveEventsTests(TestCase):
+    """Status o'zgarishlari va xabarlar commit dan keyin kanallarga e'lon qilinadi."""
+
+    def setUp(self):
+        live.get_broker.cache_clear()
+        self.addCleanup(live.get_broker.cache_clear)
+        RecordingBroker.published = []
+
+    def test_status_change_is_published_after_commit(self):
+        order = Order.objects.get(pk=make_order(status='TASDIQLANDI').pk)
+        order.deadline_breach_alert_sent = True
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=['deadline_breach_alert_sent'])
+        self.assertEqual(RecordingBroker.published, [])
+
+        order.status = 'ISHDA'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+            self.assertEqual(RecordingBroker.published, [])
+        channel, event = RecordingBroker.published[0]
+        self.assertEqual((channel, event['type'], event['order']['status']), ('orders', 'order.status', 'ISHDA'))
+
+    def test_notifications_go_to_user_and_group_channels(self):
+        user = User.objects.create_user('usta', password='x')
+        user.groups.add(Group.objects.create(name='Menejer/Tasdiqlovchi'))
+        order = make_order()
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(['Menejer/Tasdiqlovchi'], order, 'Guruhga')
+            notify(user, order, 'Shaxsiy')
+        channels = [channel for channel, event in RecordingBroker.published if event['type'] == 'notification']
+        self.assertEqual(channels, ['group:Menejer/Tasdiqlovchi', f'user:{user.pk}'])
+        self.assertIn('group:Menejer/Tasdiqlovchi', live.user_channels(user))
+
+    def test_in_process_broker_delivers_across_threads(self):
+        broker = live.InProcessBroker()
+
+        async def scenario():
+            subscription = await broker.subscribe(['orders', 'user:1'])
+            publisher = threading.Thread(target=broker.publish, args=('user:1', {'type': 'notification'}))
+            publisher.start()
+            broker.publish('user:2', {'type': 'boshqa'})
+            item = await subscription.get(timeout=2)
+            publisher.join()
+            self.assertIsNone(await subscription.get(timeout=0.05))
+            await subscription.close()
+            return item
+
+        self.assertEqual(async_to_sync(scenario)(), ('user:1', {'type': 'notification'}))
+        self.assertEqual(broker.subscriptions, set())
+
+    def test_sse_endpoint_requires_login(self):
+        response = self.client.get(reverse('live_events'))
+        self.assertEqual(response.status_code, 403)
+
+
+class LiveStreamTests(TestCase):
+    """SSE oqimi obuna bo'lgan kanaldagi hodisani brauzer formatida uzatadi."""
+
+    async def test_stream_yields_published_event(self):
+        live.get_broker.cache_clear()
+        self.addCleanup(live.get_broker.cache_clear)
+        user = await sync_to_async(User.objects.create_user)('planshet', password='x')
+        await sync_to_async(self.async_client.force_login)(user)
+
+        response = await self.async_client.get(reverse('live_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+
+        next_chunk = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        live.get_broker().publish(f'user:{user.pk}', {'type': 'notification', 'message': 'Salom'})
+        chunk = await asyncio.wait_for(next_chunk, timeout=2)
+        self.assertTrue(chunk.startswith(b'event: notification\ndata: '))
+        await response.streaming_content.aclose()
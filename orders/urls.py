@@ -14,6 +14,8 @@ urlpatterns = [
 
     # Asosiy Boshqaruv
     path('', views.order_list, name='order_list'),
+    path('api/dashboard-stats/', views.dashboard_stats_api, name='dashboard_stats_api'),
+    path('api/orders/more/', views.order_list_more, name='order_list_more'),
     
     # Buyurtma Operatsiyalari
     path('create/', views.order_create, name='order_create'),
@@ -34,6 +36,7 @@ urlpatterns = [
 
     # AUDIT LOG
     path('report/audit/', views.product_audit_log_view, name='product_audit_log_view'),
+    path('report/audit/more/', views.product_audit_log_more, name='product_audit_log_more'),
     path('audit-log/export-csv/', views.export_audit_log_csv, name='export_audit_log_csv'), 
 
     # Tafsilotlar va Rasm yuklash
@@ -47,6 +50,7 @@ urlpatterns = [
 
     path('worker-panel/', views.worker_panel, name='worker_panel'),
     path('worker-orders/<int:worker_id>/', views.worker_orders, name='worker_orders'),
+    path('api/worker-orders/<int:worker_id>/more/', views.worker_orders_more, name='worker_orders_more'),
     # Ham eski, ham yangi nom bilan ishlashi uchun:
     # path('worker-panel/', views.worker_panel, name='worker_panel'),
     path('worker-my-orders/', views.worker_panel, name='worker_my_orders'), # SHUNI QO'SHING
@@ -59,6 +63,12 @@ urlpatterns = [
     # Koordinatalarni fonda qabul qilish (POST so'rovlar uchun)
     path('track-location/', views.track_location, name='track_location'),
     path('archive/', views.order_archive, name='order_archive'),
+    path('api/archive/more/', views.order_archive_more, name='order_archive_more'),
+    path('api/orders/search/', views.order_search_api, name='order_search_api'),
+    path('api/live/', views.live_events, name='live_events'),
+    path('api/notifications/', views.notifications_api, name='notifications_api'),
+    path('api/notifications/<int:pk>/read/', views.notification_mark_read_api, name='notification_mark_read_api'),
+    path('api/notifications/read-all/', views.notifications_mark_all_read_api, name='notifications_mark_all_read_api'),
     # EKSPORT YO'LI
     path('worker-report/export-csv/', views.export_worker_activity_csv, name='export_worker_activity_csv'),
     path('material_report/', views.material_sarfi_report, name='material_report'),
@@ -81,8 +91,13 @@ urlpatterns = [
     path('warehouse/', views.warehouse_dashboard, name='warehouse_dashboard'),
     # 4. Boshqa inventarizatsiya harakatlari
     path('inventory/transaction/create/', views.material_transaction_create, name='material_transaction_create'),
+    path('api/materials/catalog/', views.material_catalog_api, name='material_catalog_api'),
+    path('api/materials/search/', views.material_autocomplete_api, name='material_autocomplete_api'),
+    path('api/orders/open/search/', views.order_autocomplete_api, name='order_autocomplete_api'),
+    path('api/materials/<int:material_id>/', views.get_material_details, name='material_details_api'),
     path('fast-scanner/', views.fast_scanner_view, name='fast_scanner'),
     path('api/find-material/', views.find_material_by_code_api, name='find_material_api'),
+    path('api/find-material/stats/', views.material_lookup_stats_api, name='material_lookup_stats_api'),
     path('api/save-scanned-transactions/', views.save_scanned_transactions_api, name='save_scanned_transactions_api'),
 ]
 
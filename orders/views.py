@@ -3,26 +3,52 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import Group 
 from django.contrib import messages 
 from django.contrib.auth import get_user_model 
-from django.db.models import Q, Sum 
+from django.db.models import Prefetch, Q, Sum
 from orders.models import Worker, Order     
 from datetime import date, timedelta, datetime
-from django.http import HttpResponse, JsonResponse
+from decimal import Decimal, InvalidOperation
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
 import csv 
-from django.urls import reverse_lazy
+from collections import Counter
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.views import LoginView
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 from .models import Material
 from django.db.models import Sum, F
 from django.conf import settings
+from django.core.files.storage import default_storage
 
 # AUDIT LOG UCHUN IMPORTLAR
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.admin.models import LogEntry, CHANGE, DELETION, ADDITION 
 
-from .models import Order, Notification, Worker 
+from .models import CustomerStats, Order, OrderAuditEvent, Notification, OrderDailyStats, Worker
 from .forms import OrderForm, StartImageUploadForm, FinishImageUploadForm
+from .alerts import create_overdue_alerts
+from .dashboard import (
+    ARCHIVE_STATUSES, CHILD_Q, CLOSED_STATUSES, COMPLETED_STATUSES, MAIN_Q,
+    ORDER_LIST_SECTIONS, annotate_order_rows, date_range_q, get_order_list_stats,
+    order_row_data, status_filter_q,
+)
+from .notifications import (
+    create_notifications, latest_notifications, mark_all_read, mark_read, notify, unread_count,
+)
+from .pagination import KEYSET_ORDERING, keyset_paginate, parse_page_size
+from .search import search_orders, search_terms
+from .stock import MAX_SCAN_BATCH, InsufficientStock, ingest_scans, record_movement, reverse_movement
+from .audit import filter_events
+from .catalog import catalog_etag, catalog_payload, current_version
+from .customers import customer_summary, rating_row
+from .exports import CSV_CHUNK_SIZE, stream_csv
+from .rollups import daily_rows, order_totals, worker_activity_rows
+from .telegram import enqueue_photos
+from . import live, material_lookup
+from .material_lookup import get_or_create_for_code
 
 from django.db.models import Count, Case, When, IntegerField
 
@@ -30,18 +56,8 @@ from django.db.models import Count, Case, When, IntegerField
 User = get_user_model()
 
 # --- Yordamchi Funksiya: Foydalanuvchi qaysi guruhda ekanligini tekshirish ---
-def is_in_group(user, group_name):
-    """Foydalanuvchi berilgan guruhda mavjudligini tekshiradi."""
-    if user.is_anonymous:
-        return False
-        
-    if user.is_superuser and group_name == 'Glavniy Admin':
-        return True
-        
-    try:
-        return user.groups.filter(name=group_name).exists()
-    except Group.DoesNotExist:
-        return False
+# Guruhlar so'rov davomida bir marta yuklanadi (roles.GroupNamesMiddleware)
+from .roles import is_in_group
 
 # --- Yangi: Kuzatuvchi funksiyalari ---
 def is_observer(user):
@@ -60,46 +76,56 @@ def is_observer_or_above(user):
         user.is_superuser
     )
 
-# ----------------------------------------------------------------------
-# 💡 YORDAMCHI FUNKSIYA: MUDDAT BUZILISHINI TEKSHIRISH
-# ----------------------------------------------------------------------
-def check_and_create_overdue_alerts(order):
+def get_order_list_querysets(user, roles, filter_type='all', now=None):
     """
-    Berilgan buyurtma uchun muddat o'tgan bo'lsa va ogohlantirish yuborilmagan bo'lsa,
-    Notification yaratadi.
+    order_list bo'limlari uchun (sahifalanmagan) querysetlar:
+    'all', 'main', 'panel', 'ugol', 'other'. Usta faqat o'ziga
+    tayinlangan buyurtmalarni ko'radi.
     """
-    if not order.deadline or order.deadline > timezone.now():
-        return False 
-    
-    if order.status in ['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']:
-        return False 
+    now = now or timezone.now()
 
-    if hasattr(order, 'deadline_breach_alert_sent') and order.deadline_breach_alert_sent:
-        return False 
+    # Faol (bitmagan) buyurtmalar + filtr tugmasi (completed, in_progress, overdue)
+    base_qs = Order.objects.exclude(status__in=ARCHIVE_STATUSES).filter(status_filter_q(filter_type, now))
+    if roles['worker_scope']:
+        base_qs = base_qs.filter(
+            assigned_workers__user=user,
+        ).exclude(
+            status='RAD_ETILDI'
+        ).distinct()
 
-    admin_users = User.objects.filter(
-        Q(is_superuser=True) | 
-        Q(groups__name='Glavniy Admin') | 
-        Q(groups__name="Ishlab Chiqarish Boshlig'i")
-    ).distinct()
-    
-    message = (
-        f"🚨 URGENT: Buyurtma #{order.order_number} ning muddati {order.deadline.strftime('%d-%m %H:%M')} da O'TIB KETDI. "
-        f"Status: {order.get_status_display()}."
+    querysets = {'all': base_qs}
+    for name, stage_q in ORDER_LIST_SECTIONS.items():
+        querysets[name] = base_qs.filter(stage_q)
+
+    # Qatorlar uchun ustalar va `is_mine` ni oldindan yuklash (N+1 so'rovlarsiz)
+    return {
+        name: annotate_order_rows(qs, user).order_by(*KEYSET_ORDERING)
+        for name, qs in querysets.items()
+    }
+
+
+# order_list va uning API'larini ko'ra oladigan rollar
+ORDER_LIST_ROLE_KEYS = ('is_glavniy_admin', 'is_production_boss', 'is_manager', 'is_worker', 'is_observer')
+
+
+def get_order_list_roles(user):
+    """order_list va uning API'si uchun foydalanuvchi rollarini aniqlaydi."""
+    roles = {
+        'is_glavniy_admin': user.is_superuser or is_in_group(user, 'Glavniy Admin'),
+        'is_production_boss': is_in_group(user, "Ishlab Chiqarish Boshlig'i"),
+        'is_manager': is_in_group(user, 'Menejer/Tasdiqlovchi'),
+        'is_worker': is_in_group(user, 'Usta'),
+        'is_observer': is_in_group(user, 'Kuzatuvchi'),
+    }
+    is_supervisor = (
+        roles['is_glavniy_admin'] or roles['is_production_boss'] or
+        roles['is_manager'] or roles['is_observer']
     )
-    
-    for admin in admin_users:
-        Notification.objects.create(
-            user=admin,
-            order=order,
-            message=message
-        )
-    
-    if hasattr(order, 'deadline_breach_alert_sent'):
-        order.deadline_breach_alert_sent = True
-        order.save(update_fields=['deadline_breach_alert_sent'])
-    
-    return True
+    # Usta faqat o'ziga tayinlangan buyurtmalarni ko'radi
+    roles['worker_scope'] = roles['is_worker'] and not is_supervisor
+    # Qarzdorlik statistikasi faqat Admin va Menejerga ko'rinadi
+    roles['can_view_unpaid'] = roles['is_glavniy_admin'] or roles['is_manager']
+    return roles
 
 # --- Yordamchi Funksiya: Hisobotni ko'rishga ruxsatni tekshirish ---
 def is_report_viewer(user):
@@ -220,219 +246,44 @@ class CustomLoginView(LoginView):
 def order_list(request):
     
     # Guruhlar tekshiruvi
-    is_glavniy_admin = request.user.is_superuser or is_in_group(request.user, 'Glavniy Admin')
-    is_production_boss = is_in_group(request.user, "Ishlab Chiqarish Boshlig'i")
-    is_manager_or_confirmer = is_in_group(request.user, 'Menejer/Tasdiqlovchi')
-    is_worker = is_in_group(request.user, 'Usta')
-    is_observer = is_in_group(request.user, 'Kuzatuvchi')
+    roles = get_order_list_roles(request.user)
+    is_glavniy_admin = roles['is_glavniy_admin']
+    is_production_boss = roles['is_production_boss']
+    is_manager_or_confirmer = roles['is_manager']
+    is_worker = roles['is_worker']
+    is_observer = roles['is_observer']
 
     # Filtr parametri
     filter_type = request.GET.get('filter', 'all')  # all, completed, in_progress, overdue
-    # 1. Avval barcha faol (bitmagan) buyurtmalarni bazaviy filtrlab olamiz
-    base_qs = Order.objects.exclude(status__in=['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR'])
-
-    # 2. Arxivdagilar sonini alohida hisoblaymiz
-    archived_count = Order.objects.filter(
-        status__in=['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR']
-    ).count()
-    # ASOSIY BUYURTMALAR (parent_order=None)
-    main_orders = base_qs.filter(parent_order__isnull=True).order_by('-created_at')
-    
-    # CHILD BUYURTMALAR - PANEL va UGUL
-    all_child_orders = base_qs.filter(parent_order__isnull=False).order_by('-created_at')
-    
-    # Panel child orderlar (product_name ichida "panel" so'zi borlar)
-    panel_child_orders = all_child_orders.filter(
-        Q(product_name__icontains='panel') | 
-        Q(product_name__icontains='панель') |
-        Q(product_name__icontains='панел')
-    )
-    
-    # Ugul child orderlar (product_name ichida "ugul" so'zi borlar)
-    ugul_child_orders = all_child_orders.filter(
-        Q(product_name__icontains='ugul') | 
-        Q(product_name__icontains='угол') |
-        Q(product_name__icontains='уголь')
-    )
-    
-    # Boshqa child orderlar
-    other_child_orders = all_child_orders.exclude(
-        Q(product_name__icontains='panel') | 
-        Q(product_name__icontains='панель') |
-        Q(product_name__icontains='панел') |
-        Q(product_name__icontains='ugul') | 
-        Q(product_name__icontains='угол') |
-        Q(product_name__icontains='уголь')
-    )
-    
-    # Hammasini vaqt bo'yicha ko'rsatadi (asosiy va child birlashtirilgan)
-    orders = base_qs.all().order_by('-created_at')
-    customers_count = Order.objects.values('customer_unique_id').distinct().count()
-    # Filtrlash
     now = timezone.now()
-    if filter_type == 'completed':
-        # Tayyor buyurtmalar
-        main_orders = main_orders.filter(status__in=['TAYYOR', 'BAJARILDI'])
-        panel_child_orders = panel_child_orders.filter(status__in=['TAYYOR', 'BAJARILDI'])
-        ugul_child_orders = ugul_child_orders.filter(status__in=['TAYYOR', 'BAJARILDI'])
-        other_child_orders = other_child_orders.filter(status__in=['TAYYOR', 'BAJARILDI'])
-        orders = orders.filter(status__in=['TAYYOR', 'BAJARILDI'])
-    elif filter_type == 'in_progress':
-        # Jarayondagi buyurtmalar - FAQAT MUDDATI O'TMAGANLAR
-        main_orders = main_orders.exclude(status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']).filter(
-            Q(deadline__isnull=True) | Q(deadline__gte=now)
-        )
-        panel_child_orders = panel_child_orders.exclude(status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']).filter(
-            Q(deadline__isnull=True) | Q(deadline__gte=now)
-        )
-        ugul_child_orders = ugul_child_orders.exclude(status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']).filter(
-            Q(deadline__isnull=True) | Q(deadline__gte=now)
-        )
-        other_child_orders = other_child_orders.exclude(status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']).filter(
-            Q(deadline__isnull=True) | Q(deadline__gte=now)
-        )
-        orders = orders.exclude(status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']).filter(
-            Q(deadline__isnull=True) | Q(deadline__gte=now)
-        )
-    elif filter_type == 'overdue':
-        # Muddati o'tgan buyurtmalar - FAQAT JARAYONDAGI VA MUDDATI O'TGANLAR
-        main_orders = main_orders.filter(
-            deadline__lt=now
-        ).exclude(
-            status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-        )
-        panel_child_orders = panel_child_orders.filter(
-            deadline__lt=now
-        ).exclude(
-            status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-        )
-        ugul_child_orders = ugul_child_orders.filter(
-            deadline__lt=now
-        ).exclude(
-            status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-        )
-        other_child_orders = other_child_orders.filter(
-            deadline__lt=now
-        ).exclude(
-            status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-        )
-        orders = orders.filter(
-            deadline__lt=now
-        ).exclude(
-            status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-        )
-    
-    # Filterlash mantigi
-    should_filter = True 
-
-    if is_glavniy_admin or is_production_boss or is_manager_or_confirmer or is_observer:
-        should_filter = False 
-    
-    if is_worker:
-        if not (is_glavniy_admin or is_production_boss or is_manager_or_confirmer or is_observer):
-            try:
-                # Ustaga tayinlangan barcha buyurtmalar ro'yxatini olamiz
-                orders = orders.filter(
-                    assigned_workers__user=request.user, 
-                ).exclude(
-                    status='RAD_ETILDI'
-                ).distinct().order_by('-created_at')
-                
-                main_orders = main_orders.filter(
-                    assigned_workers__user=request.user, 
-                ).exclude(
-                    status='RAD_ETILDI'
-                ).distinct().order_by('-created_at')
-                
-                panel_child_orders = panel_child_orders.filter(
-                    assigned_workers__user=request.user, 
-                ).exclude(
-                    status='RAD_ETILDI'
-                ).distinct().order_by('-created_at')
-                
-                ugul_child_orders = ugul_child_orders.filter(
-                    assigned_workers__user=request.user, 
-                ).exclude(
-                    status='RAD_ETILDI'
-                ).distinct().order_by('-created_at')
-                
-                other_child_orders = other_child_orders.filter(
-                    assigned_workers__user=request.user, 
-                ).exclude(
-                    status='RAD_ETILDI'
-                ).distinct().order_by('-created_at')
-                
-                if not orders.exists():
-                    messages.info(request, "Sizga tayinlangan buyurtmalar topilmadi.")
-
-            except Exception:
-                orders = orders.none() 
-                main_orders = main_orders.none()
-                panel_child_orders = panel_child_orders.none()
-                ugul_child_orders = ugul_child_orders.none()
-                other_child_orders = other_child_orders.none()
-                messages.warning(request, "Buyurtmalarni yuklashda xato: Usta profili noto'g'ri bog'langan bo'lishi mumkin.")
-            
-            should_filter = True
 
-    if should_filter and not is_worker:
-        pass
+    sections = get_order_list_querysets(request.user, roles, filter_type, now)
+    orders = sections['all']
 
-    # Muddat buzilishini tekshirish
-    if is_glavniy_admin or is_production_boss:
-        overdue_orders = main_orders.filter(
-            deadline__lt=timezone.now(),
-            status__in=['TASDIQLANDI', 'USTA_QABUL_QILDI', 'USTA_BOSHLA', 'ISHDA', 'KIRITILDI']
-        )
-        for order in overdue_orders:
-            check_and_create_overdue_alerts(order)
+    if roles['worker_scope'] and not orders.exists():
+        messages.info(request, "Sizga tayinlangan buyurtmalar topilmadi.")
 
-    user_notifications = Notification.objects.filter(user=request.user, is_read=False)[:5]
-    
-    # STATISTIKA
-    total_orders = main_orders.count()  # Faqat asosiy buyurtmalar
-    completed_orders = main_orders.filter(status__in=['TAYYOR', 'BAJARILDI']).count()
-    
-    # Jarayondagi buyurtmalar soni - FAQAT MUDDATI O'TMAGANLAR
-    in_progress_orders = main_orders.exclude(
-        status__in=['TAYYOR', 'BAJARILDI', 'RAD_ETILDI']
-    ).filter(
-        Q(deadline__isnull=True) | Q(deadline__gte=now)
-    ).count()
-    
-    # Muddati o'tgan buyurtmalar soni
-    overdue_orders_count = main_orders.filter(
-        deadline__lt=now
-    ).exclude(
-        status__in=['BAJARILDI', 'RAD_ETILDI', 'TAYYOR']
-    ).count()
-    
-    # Child orderlar statistikasi
-    all_child_orders_count = all_child_orders.count()
-    panel_child_count = panel_child_orders.count()
-    ugul_child_count = ugul_child_orders.count()
-    other_child_count = other_child_orders.count()
-    
-    panel_completed = panel_child_orders.filter(status__in=['TAYYOR', 'BAJARILDI']).count()
-    ugul_completed = ugul_child_orders.filter(status__in=['TAYYOR', 'BAJARILDI']).count()
-    unpaid_orders = Order.objects.none() # Bo'sh queryset
-    total_unpaid_amount = 0
-    unpaid_orders_count = 0
+    # Har bir bo'lim kursorli sahifalanadi: birinchi sahifa shu yerda, qolganlari
+    # "Yana yuklash" (order_list_more) orqali
+    main_orders = keyset_paginate(sections['main'])
+    panel_child_orders = keyset_paginate(sections['panel'])
+    ugul_child_orders = keyset_paginate(sections['ugol'])
+    other_child_orders = keyset_paginate(sections['other'])
 
+    # Muddat buzilishi xabarlari bu yerda yaratilmaydi: ular `run_overdue_alerts`
+    # buyrug'i tomonidan fon rejimida yoziladi (sahifa faqat o'qiydi)
 
-    if is_glavniy_admin or is_manager_or_confirmer:
+    user_notifications = latest_notifications(request.user)
     
-        unpaid_orders = Order.objects.filter(
-            parent_order__isnull=True,
-            total_price__gt=F('prepayment')
-        ).exclude(status='BEKOR_QILINDI')
-    
-    unpaid_orders_count = unpaid_orders.count()
-    total_unpaid_amount = sum(order.remaining_amount for order in unpaid_orders)
-    
-    unpaid_orders_count = unpaid_orders.count()
-    # Har birining remaining_amount'ini qo'shib chiqamiz
-    total_unpaid_amount = sum(order.remaining_amount for order in unpaid_orders)
+    # STATISTIKA (bitta agregatsiya so'rovi)
+    stats = get_order_list_stats(
+        request.user,
+        filter_type=filter_type,
+        worker_scope=roles['worker_scope'],
+        include_unpaid=roles['can_view_unpaid'],
+        now=now,
+    )
+
     can_view_orders = any([
         is_glavniy_admin, 
         is_production_boss, 
@@ -441,13 +292,9 @@ def order_list(request):
         is_observer
     ])
 
-
-    
     context = {
-        'archived_count': archived_count, # Shuni qo'shing
+        **stats,
         'orders': orders,
-        'unpaid_orders_count': unpaid_orders_count,
-        'total_unpaid_amount': total_unpaid_amount,
         'main_orders': main_orders,
         'panel_child_orders': panel_child_orders,
         'ugul_child_orders': ugul_child_orders,
@@ -458,67 +305,226 @@ def order_list(request):
         'is_worker': is_worker,
         'is_observer': is_observer,
         'notifications': user_notifications, 
-        'now': timezone.now(),
+        'unread_notifications_count': unread_count(request.user),
+        'now': now,
         'filter_type': filter_type,
-        'total_orders': total_orders,
-        'completed_orders': completed_orders,
-        'in_progress_orders': in_progress_orders,
-        'overdue_orders_count': overdue_orders_count,
-        'all_child_orders_count': all_child_orders_count,
-        'panel_child_count': panel_child_count,
-        'ugul_child_count': ugul_child_count,
-        'other_child_count': other_child_count,
-        'panel_completed': panel_completed,
-        'ugul_completed': ugul_completed,
         'is_storekeeper': request.user.username.lower() == 'omborchi' or 'store' in request.user.username.lower(),
-        'customers_count': customers_count,
         'can_view_orders': can_view_orders,
     }
     return render(request, 'orders/order_list.html', context)
 
 
+@login_required
+def dashboard_stats_api(request):
+    """order_list hisoblagichlarini JSON ko'rinishida qaytaradi (AJAX yangilash uchun)."""
+    roles = get_order_list_roles(request.user)
+    if not any(roles[key] for key in ORDER_LIST_ROLE_KEYS):
+        return JsonResponse({'success': False, 'error': "Ruxsat yo'q."}, status=403)
+    stats = get_order_list_stats(
+        request.user,
+        filter_type=request.GET.get('filter', 'all'),
+        worker_scope=roles['worker_scope'],
+        include_unpaid=roles['can_view_unpaid'],
+    )
+    stats['total_unpaid_amount'] = float(stats['total_unpaid_amount'] or 0)
+    return JsonResponse({'success': True, 'stats': stats})
+
+
+def keyset_page_response(request, page, rows_template=None, context=None):
+    """
+    "Yana yuklash" javobi: `?format=json` bo'lsa qatorlarning xom ma'lumotlari,
+    aks holda `rows_template` orqali chizilgan HTML qatorlar.
+    """
+    if rows_template is None or request.GET.get('format') == 'json':
+        return JsonResponse({
+            'success': True,
+            'orders': [order_row_data(order) for order in page],
+            'next_cursor': page.next_cursor,
+        })
+    html = render_to_string(rows_template, {**(context or {}), 'orders': page.rows}, request=request)
+    return JsonResponse({'success': True, 'html': html, 'next_cursor': page.next_cursor})
 
-from django.db.models import Q
 
 @login_required
-def order_archive(request):
-    search_query = request.GET.get('q', '')
-    
-    # Arxiv statuslari
-    archive_statuses = ['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR']
-    
+def order_list_more(request):
+    """order_list bo'limining keyingi sahifasi (kursor bo'yicha)."""
+    section = request.GET.get('section', 'main')
+    if section not in ORDER_LIST_SECTIONS:
+        return JsonResponse({'success': False, 'error': "Noma'lum bo'lim."}, status=400)
+
+    roles = get_order_list_roles(request.user)
+    if not any(roles[key] for key in ORDER_LIST_ROLE_KEYS):
+        return JsonResponse({'success': False, 'error': "Ruxsat yo'q."}, status=403)
+
+    now = timezone.now()
+    queryset = get_order_list_querysets(
+        request.user, roles, request.GET.get('filter', 'all'), now,
+    )[section]
+    page = keyset_paginate(queryset, request.GET.get('cursor'), parse_page_size(request.GET.get('limit')))
+
+    return keyset_page_response(request, page, 'orders/partials/order_list_rows.html', {
+        'section': section,
+        'now': now,
+        'is_glavniy_admin': roles['is_glavniy_admin'],
+        'is_manager': roles['is_manager'],
+        'is_production_boss': roles['is_production_boss'],
+        'is_worker': roles['is_worker'],
+        'is_observer': roles['is_observer'],
+    })
+
+
+
+from django.db.models import Q
+
+def get_archive_querysets(search_query=''):
+    """Arxiv bo'limlari ('main', 'child') uchun (sahifalanmagan) querysetlar."""
     # Asosiy buyurtmalar
     main_orders = Order.objects.filter(
-        parent_order__isnull=True, 
-        status__in=archive_statuses
-    ).order_by('-created_at')
-    
+        MAIN_Q,
+        status__in=ARCHIVE_STATUSES
+    )
+
     # Ichki buyurtmalar
     child_orders = Order.objects.filter(
-        parent_order__isnull=False, 
-        status__in=archive_statuses
-    ).order_by('-created_at')
+        CHILD_Q,
+        status__in=ARCHIVE_STATUSES
+    )
 
-    # Agar qidiruv bo'lsa
+    # Agar qidiruv bo'lsa (to'liq matnli indeks orqali)
     if search_query:
-        main_orders = main_orders.filter(
-            Q(id__icontains=search_query) |
-            Q(customer_name__icontains=search_query) |
-            Q(product_name__icontains=search_query)
-        )
-        child_orders = child_orders.filter(
-            Q(id__icontains=search_query) |
-            Q(product_name__icontains=search_query)
-        )
+        main_orders = search_orders(main_orders, search_query)
+        child_orders = search_orders(child_orders, search_query)
 
+    return {'main': main_orders, 'child': child_orders}
+
+
+@login_required
+def order_archive(request):
+    search_query = request.GET.get('q', '')
+    sections = get_archive_querysets(search_query)
+
+    # Arxiv cheksiz o'sadi: faqat birinchi sahifa, qolgani "Yana yuklash" orqali
     context = {
-        'main_orders': main_orders,
-        'child_orders': child_orders,
+        'main_orders': keyset_paginate(sections['main']),
+        'child_orders': keyset_paginate(sections['child']),
+        'main_count': sections['main'].count(),
+        'child_count': sections['child'].count(),
         'search_query': search_query,
     }
     return render(request, 'orders/order_archive.html', context)
 
 
+@login_required
+def order_archive_more(request):
+    """Arxiv bo'limining keyingi sahifasi (kursor bo'yicha)."""
+    section = request.GET.get('section', 'main')
+    sections = get_archive_querysets(request.GET.get('q', ''))
+    if section not in sections:
+        return JsonResponse({'success': False, 'error': "Noma'lum bo'lim."}, status=400)
+
+    page = keyset_paginate(sections[section], request.GET.get('cursor'), parse_page_size(request.GET.get('limit')))
+    return keyset_page_response(request, page, 'orders/partials/archive_rows.html', {'section': section})
+
+
+# ======================== JONLI YANGILANISHLAR (SSE) ========================
+
+def _live_channels(request):
+    user = request.user
+    return live.user_channels(user) if user.is_authenticated else None
+
+
+async def live_events(request):
+    """
+    Server-sent events: foydalanuvchi kanallaridagi hodisalarni uzatadi
+    (buyurtma statusi, yangi xabarlar, darvoza). ASGI server ostida ishlaydi.
+    """
+    channels = await sync_to_async(_live_channels)(request)
+    if channels is None:
+        return JsonResponse({'success': False, 'error': "Avtorizatsiya talab qilinadi."}, status=403)
+
+    subscription = await live.get_broker().subscribe(channels)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                item = await subscription.get(timeout=live.HEARTBEAT_SECONDS)
+                if item is None:
+                    yield ": ping\n\n"
+                    continue
+                _, event = item
+                yield live.format_sse(event)
+        finally:
+            await subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ======================== BILDIRISHNOMALAR (JSON) ========================
+
+def notification_row_data(notification):
+    return {
+        'id': notification.pk,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+        'order_id': notification.order_id,
+        'order_url': reverse('order_detail', args=[notification.order_id]) if notification.order_id else None,
+    }
+
+
+@login_required
+def notifications_api(request):
+    """Oxirgi N ta xabar va o'qilmaganlar soni (hisoblagichdan, COUNT siz)."""
+    limit = parse_page_size(request.GET.get('limit'), default=5)
+    unread_only = request.GET.get('all') != '1'
+    return JsonResponse({
+        'success': True,
+        'unread': unread_count(request.user),
+        'notifications': [notification_row_data(n) for n in latest_notifications(request.user, limit, unread_only)],
+    })
+
+
+@require_POST
+@login_required
+def notification_mark_read_api(request, pk):
+    changed = mark_read(request.user, pk)
+    return JsonResponse({'success': True, 'changed': changed, 'unread': unread_count(request.user)})
+
+
+@require_POST
+@login_required
+def notifications_mark_all_read_api(request):
+    updated = mark_all_read(request.user)
+    return JsonResponse({'success': True, 'updated': updated, 'unread': 0})
+
+
+@login_required
+def order_search_api(request):
+    """Buyurtmalar bo'yicha typeahead: raqam, mijoz, mahsulot va izohlar bo'yicha qidiruv."""
+    query = request.GET.get('q', '').strip()
+    if not search_terms(query):
+        return JsonResponse({'success': True, 'results': []})
+
+    limit = parse_page_size(request.GET.get('limit'), default=10)
+    orders = search_orders(Order.objects.all(), query).order_by(*KEYSET_ORDERING)[:limit]
+
+    results = [{
+        'id': order.pk,
+        'order_number': order.order_number,
+        'customer_name': order.customer_name,
+        'customer_unique_id': order.customer_unique_id,
+        'product_name': order.product_name,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'url': reverse('order_detail', args=[order.pk]),
+    } for order in orders]
+    return JsonResponse({'success': True, 'results': results})
+
+
 
 
 
@@ -640,6 +646,7 @@ def guard_dashboard(request):
             # KIRISH VAQTINI MUHRLASH
             order.work_started_at = now 
             order.save()
+            live.publish_gate_event(order, action, now)
         elif action == 'exit':
             status_text = "CHIQDI (Zavoddan)"
             status_emoji = "📤"
@@ -647,6 +654,7 @@ def guard_dashboard(request):
             order.status = 'YUK_CHIQDI'
             order.work_finished_at = now
             order.save()
+            live.publish_gate_event(order, action, now)
 
         # Telegramga yuborish (vaqt bilan)
         if img:
@@ -657,13 +665,9 @@ def guard_dashboard(request):
                 f"🚛 Moshina: {order.worker_comment}\n"
                 f"🕒 Vaqt: {now.strftime('%H:%M')}"
             )
-            try:
-                url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
-                img.seek(0)
-                files = {'photo': (img.name, img.read(), img.content_type)}
-                requests.post(url, data={'chat_id': TELEGRAM_GROUP_ID, 'caption': caption}, files=files)
-            except Exception as e:
-                print(f"Telegram error: {e}")
+            # Rasm saqlanadi va navbatga qo'yiladi, run_outbox yuboradi
+            photo_name = default_storage.save(f"telegram_outbox/guard/{img.name}", img)
+            enqueue_photos([photo_name], caption)
 
         messages.success(request, f"#{order.id} {status_text} tasdiqlandi (Vaqt: {now.strftime('%H:%M')}).")
         return redirect('guard_dashboard')
@@ -707,9 +711,6 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .models import GuardPatrol
 
-# Telegram bot sozlamalari
-BOT_TOKEN = '7234567890:ABCdefGHIjklMNOpqrSTUvwxYZ' # O'zingizniki bilan almashtiring
-CHAT_ID = '-100123456789' # Guruh ID sini qo'ying
 import json
 import requests
 from datetime import datetime
@@ -718,9 +719,6 @@ from django.shortcuts import render, redirect
 from django.contrib import messages
 from .models import GuardPatrol
 
-# Sozlamalarni o'zgaruvchilarga chiqaramiz
-BOT_TOKEN = "8593760936:AAGAeS-Dj9OHcRnJPcyu1o1pkW3ow0W7dDk"
-CHAT_ID = "-1003274223599"
 
 import json
 import requests
@@ -731,15 +729,12 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import GuardPatrol
 
-# --- TELEGRAM SOZLAMALARI ---
-BOT_TOKEN = "8593760936:AAGAeS-Dj9OHcRnJPcyu1o1pkW3ow0W7dDk"
-CHAT_ID = "-1003274223599"
 
 import json
 import requests
 
 def send_patrol_to_telegram(patrol):
-    """Hisobotni va rasmlarni bitta albom qilib Telegramga yuborish"""
+    """Hisobot va rasmlarni bitta albom qilib Telegram navbatiga qo'yish (run_outbox yuboradi)"""
     map_url = f"https://www.google.com/maps?q={patrol.latitude},{patrol.longitude}"
 
     caption = (
@@ -750,58 +745,13 @@ def send_patrol_to_telegram(patrol):
         f"📍 [Xaritada ko'rish]({map_url})"
     )
 
-    media_url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMediaGroup"
-    files = {}
-    media = []
-
     # ✅ 4 ta rasm
     image_fields = [patrol.image1, patrol.image2, patrol.image3, patrol.image4]
+    item = enqueue_photos([f.name for f in image_fields if f], caption, parse_mode='Markdown')
 
-    for i, img_field in enumerate(image_fields, 1):
-        if img_field and img_field.name:
-            file_key = f"pic{i}"
-            try:
-                # local storage bo‘lsa path bo‘ladi
-                files[file_key] = open(img_field.path, "rb")
-                media.append({
-                    "type": "photo",
-                    "media": f"attach://{file_key}",
-                    "caption": caption if i == 1 else "",
-                    "parse_mode": "Markdown",
-                })
-            except Exception as e:
-                print(f"Rasm ochishda xato ({file_key}): {e}")
-
-    if not media:
+    if item is None:
         print("Telegramga yuborish bekor: rasm topilmadi (media bo'sh).")
-        return None
-
-    try:
-        response = requests.post(
-            media_url,
-            data={"chat_id": CHAT_ID, "media": json.dumps(media)},
-            files=files,
-            timeout=40
-        )
-
-        # ✅ debug: aynan nima xato ekanini ko‘rasan
-        print("TELEGRAM STATUS =", response.status_code)
-        print("TELEGRAM TEXT =", response.text)
-
-        return response.json()
-
-    except requests.exceptions.Timeout:
-        print("Telegram xatosi: Timeout (rasmlar katta bo'lishi mumkin).")
-    except Exception as e:
-        print(f"Telegram yuborishda kutilmagan xato: {e}")
-    finally:
-        for f in files.values():
-            try:
-                f.close()
-            except:
-                pass
-
-    return None
+    return item
 
             
 from datetime import datetime
@@ -892,8 +842,7 @@ def guard_patrol_view(request):
                 longitude=float(lng) if lng and lng != "undefined" else 0.0
             )
 
-            result = send_patrol_to_telegram(patrol)  # ✅ resultni ushlab qolamiz
-            print("TELEGRAM RESULT =", result)         # ✅ konsolda ko‘rasan
+            send_patrol_to_telegram(patrol)  # ✅ navbatga qo'yiladi, run_outbox yuboradi
 
             messages.success(request, "Patrul hisoboti muvaffaqiyatli topshirildi!")
             return redirect('guard_patrol')
@@ -944,12 +893,6 @@ from .models import Order
 from .forms import OrderForm
 import requests
 
-# TELEGRAM CONFIG
-TELEGRAM_BOT_TOKEN = "8593760936:AAGAeS-Dj9OHcRnJPcyu1o1pkW3ow0W7dDk"
-TELEGRAM_GROUP_ID = "-1003274223599"
-
-def is_in_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
 
 @login_required
 def order_detail(request, pk):
@@ -1005,14 +948,6 @@ def order_detail(request, pk):
                 f"🕒 Vaqt: {timezone.now().strftime('%Y-%m-%d %H:%M')}"
             )
 
-            # Telegramga yuborish
-            try:
-                url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendPhoto"
-                requests.post(url, data={"chat_id": TELEGRAM_GROUP_ID, "caption": caption}, files={"photo": image})
-            except Exception as e:
-                messages.error(request, f"Telegramga yuborishda xatolik: {str(e)}")
-                return redirect('order_detail', pk=order.pk)
-
             # Ma'lumotlarni saqlash
             if upload_type == 'start_image':
                 order.start_image = image
@@ -1028,7 +963,10 @@ def order_detail(request, pk):
                 order.status = 'USTA_TUGATDI'
 
             order.save()
-            messages.success(request, f"{'Boshlash' if upload_type=='start_image' else 'Tugatish'} rasmi Telegramga yuborildi.")
+
+            # Telegramga yuborish: saqlangan rasm navbatga qo'yiladi (run_outbox yuboradi)
+            enqueue_photos([getattr(order, upload_type).name], caption)
+            messages.success(request, f"{'Boshlash' if upload_type=='start_image' else 'Tugatish'} rasmi saqlandi va Telegramga yuborish navbatiga qo'yildi.")
         else:
             messages.error(request, "Rasm yuklanmadi yoki noto‘g‘ri action.")
         return redirect('order_detail', pk=order.pk)
@@ -1129,9 +1067,8 @@ def order_worker_finish(request, pk):
         
         # Muddatdan o'tib ketgan bo'lsa ogohlantirish
         if order.deadline and current_time > order.deadline:
-            # Agar funksiya mavjud bo'lsa chaqiriladi
-            if 'check_and_create_overdue_alerts' in globals():
-                check_and_create_overdue_alerts(order)
+            if not order.deadline_breach_alert_sent:
+                create_overdue_alerts([order])
             messages.warning(request, f"⚠️ Buyurtma #{order.order_number} muddatidan kech yakunlandi.")
             
         order.save(update_fields=['status', 'worker_finished_at'])
@@ -1165,15 +1102,13 @@ def order_worker_finish(request, pk):
                     )
                     
                     # Topilgan barcha Panel va Ugol ustalarni yangi buyurtmaga biriktiramiz
-                    for worker in next_workers:
-                        new_order.assigned_workers.add(worker)
-                        
-                        # Har biriga bildirishnoma yuboramiz
-                        Notification.objects.create(
-                            user=worker.user,
-                            order=new_order,
-                            message=f"Yangi ish: List usta #{order.order_number} chizmasini bitirdi. Panel/Ugol bosqichini boshlang."
-                        )
+                    new_order.assigned_workers.add(*next_workers)
+
+                    # Har biriga bildirishnoma yuboramiz
+                    notify(
+                        next_workers, new_order,
+                        f"Yangi ish: List usta #{order.order_number} chizmasini bitirdi. Panel/Ugol bosqichini boshlang."
+                    )
                     
                     messages.success(request, "Panel va Ugol ustalari uchun avtomatik buyurtma yaratildi.")
         # ================================================================
@@ -1225,6 +1160,41 @@ def worker_panel(request):
     
     return render(request, 'orders/worker_panel.html', context)
 
+def get_worker_orders_access(user, worker):
+    """worker_orders sahifasi uchun ruxsat bayroqlari."""
+    access = {
+        'is_glavniy_admin': user.is_superuser or is_in_group(user, 'Glavniy Admin'),
+        'is_production_boss': is_in_group(user, "Ishlab Chiqarish Boshlig'i"),
+        'is_worker_self': user == worker.user,
+        'is_observer': is_in_group(user, 'Kuzatuvchi'),  # ✅ YANGI
+    }
+    access['can_view'] = any(access.values())
+    return access
+
+
+def get_worker_orders_queryset(worker, start_date=None, end_date=None, status_filter=''):
+    """Ustaning buyurtmalari sana oralig'i va status bo'yicha filtrlangan holda."""
+    # select_related - bog'langan model ma'lumotlarini bitta so'rovda oladi
+    # prefetch_related - ManyToMany (ustalar) bog'liqligini tezlashtiradi
+    orders = Order.objects.filter(assigned_workers=worker)\
+        .select_related('parent_order')\
+        .prefetch_related(Prefetch(
+            'assigned_workers',
+            queryset=Worker.objects.select_related('user'),
+            to_attr='prefetched_workers',
+        ))
+
+    # Filtrlash
+    if start_date:
+        orders = orders.filter(created_at__gte=start_date)
+    if end_date:
+        end_datetime = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+        orders = orders.filter(created_at__lt=end_datetime)
+    if status_filter:
+        orders = orders.filter(status=status_filter)
+    return orders
+
+
 @login_required
 @user_passes_test(lambda u: is_in_group(u, 'Usta') or u.is_superuser or 
                    is_in_group(u, "Ishlab Chiqarish Boshlig'i") or 
@@ -1236,12 +1206,8 @@ def worker_orders(request, worker_id):
     worker = get_object_or_404(Worker, id=worker_id)
     
     # Ruxsatni tekshirish
-    is_glavniy_admin = request.user.is_superuser or is_in_group(request.user, 'Glavniy Admin')
-    is_production_boss = is_in_group(request.user, "Ishlab Chiqarish Boshlig'i")
-    is_worker_self = request.user == worker.user
-    is_observer = is_in_group(request.user, 'Kuzatuvchi')  # ✅ YANGI
-    
-    if not (is_glavniy_admin or is_production_boss or is_worker_self or is_observer):  # ✅ YANGI
+    access = get_worker_orders_access(request.user, worker)
+    if not access['can_view']:  # ✅ YANGI
         messages.error(request, "Sizda bu sahifani ko'rish uchun ruxsat yo'q.")
         return redirect('order_list')
     
@@ -1250,48 +1216,54 @@ def worker_orders(request, worker_id):
     end_date = request.GET.get('end_date')
     status_filter = request.GET.get('status', '')
     
-    # Ustaning buyurtmalari
-    # orders = Order.objects.filter(assigned_workers=worker).order_by('-created_at')
-    # select_related - bog'langan model ma'lumotlarini bitta so'rovda oladi
-# prefetch_related - ManyToMany (ustalar) bog'liqligini tezlashtiradi
-    orders = Order.objects.filter(assigned_workers=worker)\
-        .select_related('parent_order')\
-        .prefetch_related('assigned_workers')\
-        .order_by('-created_at')
-    
-    # Filtrlash
-    if start_date:
-        orders = orders.filter(created_at__gte=start_date)
-    if end_date:
-        end_datetime = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-        orders = orders.filter(created_at__lt=end_datetime)
-    if status_filter:
-        orders = orders.filter(status=status_filter)
+    orders = get_worker_orders_queryset(worker, start_date, end_date, status_filter)
     
-    # Statistikani hisoblash
-    total_orders = orders.count()
-    completed_orders = orders.filter(status__in=['TAYYOR', 'BAJARILDI']).count()
-    total_kvadrat = orders.filter(status__in=['TAYYOR', 'BAJARILDI']).aggregate(
-        Sum('panel_kvadrat')
-    )['panel_kvadrat__sum'] or 0
+    # Statistikani hisoblash (bitta so'rovda)
+    done_q = Q(status__in=['TAYYOR', 'BAJARILDI'])
+    stats = orders.aggregate(
+        total_orders=Count('pk'),
+        completed_orders=Count('pk', filter=done_q),
+        total_kvadrat=Sum('panel_kvadrat', filter=done_q),
+    )
     
     context = {
         'worker': worker,
-        'orders': orders,
-        'total_orders': total_orders,
-        'completed_orders': completed_orders,
-        'total_kvadrat': total_kvadrat,
+        # Birinchi sahifa; keyingilari worker_orders_more orqali
+        'orders': keyset_paginate(orders),
+        'total_orders': stats['total_orders'],
+        'completed_orders': stats['completed_orders'],
+        'total_kvadrat': stats['total_kvadrat'] or 0,
         'start_date': start_date,
         'end_date': end_date,
         'status_filter': status_filter,
-        'is_glavniy_admin': is_glavniy_admin,
-        'is_production_boss': is_production_boss,
-        'is_worker_self': is_worker_self,
-        'is_observer': is_observer,  # ✅ YANGI
+        'is_glavniy_admin': access['is_glavniy_admin'],
+        'is_production_boss': access['is_production_boss'],
+        'is_worker_self': access['is_worker_self'],
+        'is_observer': access['is_observer'],  # ✅ YANGI
     }
     
     return render(request, 'orders/worker_orders.html', context)
 
+
+@login_required
+@user_passes_test(lambda u: is_in_group(u, 'Usta') or u.is_superuser or 
+                   is_in_group(u, "Ishlab Chiqarish Boshlig'i") or 
+                   is_in_group(u, 'Kuzatuvchi'), login_url='/login/')  # ✅ YANGI
+def worker_orders_more(request, worker_id):
+    """Ustaning buyurtmalari tarixidan keyingi sahifa (JSON, kursor bo'yicha)."""
+    worker = get_object_or_404(Worker, id=worker_id)
+    if not get_worker_orders_access(request.user, worker)['can_view']:
+        return JsonResponse({'success': False, 'error': "Ruxsat yo'q."}, status=403)
+
+    orders = get_worker_orders_queryset(
+        worker,
+        request.GET.get('start_date'),
+        request.GET.get('end_date'),
+        request.GET.get('status', ''),
+    )
+    page = keyset_paginate(orders, request.GET.get('cursor'), parse_page_size(request.GET.get('limit')))
+    return keyset_page_response(request, page)
+
 # ----------------------------------------------------------------------
 # QOLGAN FUNKSIYALAR
 # views.py - order_create funksiyasini yangilang
@@ -1430,31 +1402,21 @@ def order_confirm(request, pk):
         
         messages.success(request, f"Buyurtma №{order.order_number} Tasdiqlandi.")
         
-        if order.created_by:
-            Notification.objects.create(
-                user=order.created_by,
-                order=order,
-                message=f"Siz kiritgan buyurtma №{order.order_number} Muvaffaqiyatli Tasdiqlandi."
-            )
-        
-        try:
-            boss_group = Group.objects.get(name="Ishlab Chiqarish Boshlig'i")
-            for boss in boss_group.user_set.all():
-                Notification.objects.create(
-                    user=boss,
-                    order=order,
-                    message=f"Yangi buyurtma №{order.order_number} Tasdiqlandi. Ishlab chiqarishni boshlashingiz mumkin."
-                )
-        except Group.DoesNotExist:
-            messages.warning(request, "Ishlab Chiqarish Boshlig'i guruhi topilmadi.")
+        notify(
+            order.created_by, order,
+            f"Siz kiritgan buyurtma №{order.order_number} Muvaffaqiyatli Tasdiqlandi."
+        )
 
-        if order.assigned_workers.exists():
-            for worker in order.assigned_workers.all():
-                Notification.objects.create(
-                    user=worker.user,
-                    order=order,
-                    message=f"Tayinlangan buyurtma №{order.order_number} Tasdiqlandi! Ishni boshlashingiz mumkin."
-                )
+        if not notify(
+            "Ishlab Chiqarish Boshlig'i", order,
+            f"Yangi buyurtma №{order.order_number} Tasdiqlandi. Ishlab chiqarishni boshlashingiz mumkin."
+        ):
+            messages.warning(request, "Ishlab Chiqarish Boshlig'i guruhida foydalanuvchi topilmadi.")
+
+        notify(
+            order.assigned_workers.all(), order,
+            f"Tayinlangan buyurtma №{order.order_number} Tasdiqlandi! Ishni boshlashingiz mumkin."
+        )
             
     else:
         messages.warning(request, "Bu buyurtma allaqachon tasdiqlangan yoki boshqa bosqichda.")
@@ -1490,20 +1452,14 @@ def order_reject(request, pk):
         
         messages.error(request, f"Buyurtma №{order.order_number} **Rad Etildi**.")
         
-        if order.created_by:
-            Notification.objects.create(
-                user=order.created_by,
-                order=order,
-                message=f"Siz kiritgan buyurtma №{order.order_number} Menejer tomonidan **RAD ETILDI**."
-            )
-
-        if order.assigned_workers.exists():
-            for worker in order.assigned_workers.all():
-                Notification.objects.create(
-                    user=worker.user,
-                    order=order,
-                    message=f"Sizga tayinlangan buyurtma №{order.order_number} RAD ETILDI."
-                )
+        notify(
+            order.created_by, order,
+            f"Siz kiritgan buyurtma №{order.order_number} Menejer tomonidan **RAD ETILDI**."
+        )
+        notify(
+            order.assigned_workers.all(), order,
+            f"Sizga tayinlangan buyurtma №{order.order_number} RAD ETILDI."
+        )
         
     else:
         messages.warning(request, "Rad etishni faqat 'Kiritildi' statusidagi buyurtmadan boshlash mumkin.")
@@ -1539,13 +1495,10 @@ def order_start_production(request, pk):
         
         messages.info(request, f"Buyurtma №{order.order_number} ishlab chiqarishga berildi.")
         
-        if order.assigned_workers.exists():
-            for worker in order.assigned_workers.all():
-                Notification.objects.create(
-                    user=worker.user,
-                    order=order,
-                    message=f"Buyurtma №{order.order_number} ISHGA TUSHDI. O'z ishingizni boshlashingiz mumkin."
-                )
+        notify(
+            order.assigned_workers.all(), order,
+            f"Buyurtma №{order.order_number} ISHGA TUSHDI. O'z ishingizni boshlashingiz mumkin."
+        )
         
     else:
         messages.warning(request, "Ishlab chiqarishni faqat Tasdiqlangan buyurtmadan boshlash mumkin.")
@@ -1588,17 +1541,10 @@ def order_finish(request, pk):
         
         messages.success(request, f"Buyurtma №{order.order_number} yakunlandi.")
         
-        # Notificationlar qismi (o'zgarishsiz qoladi)
-        try:
-            manager_group = Group.objects.get(name='Menejer/Tasdiqlovchi') 
-            for manager in manager_group.user_set.all():
-                Notification.objects.create(
-                    user=manager,
-                    order=order,
-                    message=f"Buyurtma №{order.order_number} usta tomonidan tugatildi."
-                )
-        except Group.DoesNotExist:
-            pass
+        notify(
+            'Menejer/Tasdiqlovchi', order,
+            f"Buyurtma №{order.order_number} usta tomonidan tugatildi."
+        )
 
     else:
         messages.warning(request, "Buyurtmani yakunlash uchun u jarayonda bo'lishi kerak.")
@@ -1634,12 +1580,10 @@ def order_complete(request, pk):
         
         messages.success(request, f"Buyurtma №{order.order_number} **BAJARILDI** deb belgilandi. Jarayon to'liq yakunlandi.")
         
-        if order.created_by:
-            Notification.objects.create(
-                user=order.created_by,
-                order=order,
-                message=f"Siz kiritgan buyurtma №{order.order_number} Muvaffaqiyatli **BAJARILDI**."
-            )
+        notify(
+            order.created_by, order,
+            f"Siz kiritgan buyurtma №{order.order_number} Muvaffaqiyatli **BAJARILDI**."
+        )
         
     else:
         messages.warning(request, "Buyurtma Bajarildi deb belgilanishi uchun u avval 'Tayyor' bo'lishi kerak.")
@@ -1679,27 +1623,22 @@ def order_create(request):
             messages.success(request, f"Buyurtma №{order.order_number} kiritildi. Ish turi: {order.get_worker_type_display()}")
 
             # 🔴 Notification 1: Menejerlarga
-            try:
-                manager_group = Group.objects.get(name='Menejer/Tasdiqlovchi') 
-                for manager in manager_group.user_set.all():
-                    Notification.objects.create(
-                        user=manager,
-                        order=order,
-                        message=f"Yangi buyurtma: №{order.order_number}. Tasdiqlash talab qilinadi."
-                    )
-            except Group.DoesNotExist:
-                pass
+            notify(
+                'Menejer/Tasdiqlovchi', order,
+                f"Yangi buyurtma: №{order.order_number}. Tasdiqlash talab qilinadi."
+            )
 
             # 🔴 Notification 2: Biriktirilgan ustalarga (Universal usta ham shu yerda)
-            # save_m2m() dan keyin chaqirish kerak!
-            workers = order.assigned_workers.all()
-            if workers.exists():
-                for worker in workers:
-                    Notification.objects.create(
-                        user=worker.user,
-                        order=order,
-                        message=f"№{order.order_number} buyurtmasi sizga tayinlandi. Rolingiz: {worker.get_role_display()}"
-                    )
+            # save_m2m() dan keyin chaqirish kerak! Xabar matni rolga bog'liq bo'lgani
+            # uchun notify() o'rniga to'g'ridan-to'g'ri bulk_create (worker.user so'ralmaydi)
+            create_notifications([
+                Notification(
+                    user_id=worker.user_id,
+                    order=order,
+                    message=f"№{order.order_number} buyurtmasi sizga tayinlandi. Rolingiz: {worker.get_role_display()}"
+                )
+                for worker in order.assigned_workers.all()
+            ])
             
             return redirect('order_list')
     else:
@@ -1734,95 +1673,52 @@ def order_delete(request, pk):
         return redirect('order_list')
         
     return render(request, 'orders/order_confirm_delete.html', {'order': order})
-
 from decimal import Decimal
 from datetime import datetime, timedelta
 from django.db.models import Q
 from django.utils import timezone
 # ... (boshqa importlar)
 
-@login_required
-@user_passes_test(is_report_viewer_or_observer, login_url='/login/')
-def weekly_report_view(request):
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
+def report_date_range(request, default_days=None):
+    """
+    GET dagi start_date / end_date (YYYY-MM-DD) ni sana obyektlariga aylantiradi.
+    Sana berilmasa yoki noto'g'ri bo'lsa: default_days berilgan bo'lsa oxirgi
+    shuncha kun, aks holda None (chegara yo'q).
+    """
+    start_date = end_date = None
+    try:
+        if request.GET.get('start_date'):
+            start_date = date.fromisoformat(request.GET['start_date'])
+        if request.GET.get('end_date'):
+            end_date = date.fromisoformat(request.GET['end_date'])
+    except ValueError:
+        messages.error(request, "Noto'g'ri sana formati kiritildi. Iltimos, YYYY-MM-DD formatida kiriting.")
+        start_date = end_date = None
 
-    # Vaqt zonasidan xabardor sanalarni saqlash uchun o'zgaruvchilar
-    start_datetime_aware = None
-    end_datetime_aware = None
+    if default_days is not None:
+        end_date = end_date or timezone.localdate()
+        start_date = start_date or end_date - timedelta(days=default_days)
+    return start_date, end_date
 
-    # ----------------------------------------------------------------------
-    # 💡 MUHIM TUZATISH: Sanani TZ-Aware qilish
-    # ----------------------------------------------------------------------
 
-    if start_date_str:
-        try:
-            # 1. Tanlangan sanani Naive Datetime obyektiga o'tkazamiz (00:00:00)
-            start_datetime_naive = datetime.strptime(start_date_str, '%Y-%m-%d')
-            # 2. Uni loyihaning TIME_ZONE zonasidan xabardor qilamiz (Masalan, Toshkent vaqti)
-            start_datetime_aware = timezone.make_aware(start_datetime_naive)
-        except ValueError:
-             messages.error(request, "Boshlanish sana formati noto'g'ri.")
-             start_date_str = None # Noto'g'ri bo'lsa filtrlashni to'xtatamiz
+@login_required
+@user_passes_test(is_report_viewer_or_observer, login_url='/login/')
+def weekly_report_view(request):
+    """Haftalik hisobot: kunlar bo'yicha buyurtmalar va ustalar ish faoliyati (kunlik yig'ma jadvallardan)."""
+    start_date, end_date = report_date_range(request, default_days=6)
 
-    if end_date_str:
-        try:
-            # 1. Tanlangan sanani Naive Datetime obyektiga o'tkazamiz (+1 kun)
-            end_datetime_naive = datetime.strptime(end_date_str, '%Y-%m-%d') + timedelta(days=1)
-            # 2. Uni loyihaning TIME_ZONE zonasidan xabardor qilamiz
-            end_datetime_aware = timezone.make_aware(end_datetime_naive)
-        except ValueError:
-            messages.error(request, "Tugash sana formati noto'g'ri.")
-            end_date_str = None
-            
-    # ----------------------------------------------------------------------
-    # 1. Umumiy Buyurtmalar (created_at bo'yicha) filtrlash
-    # ----------------------------------------------------------------------
-    orders = Order.objects.all().select_related('created_by')
-    filter_q = Q()
-    
-    if start_datetime_aware:
-        # created_at__gte ni TZ-aware qiymat bilan solishtiramiz
-        filter_q &= Q(created_at__gte=start_datetime_aware) 
-    if end_datetime_aware:
-        # created_at__lt ni TZ-aware qiymat bilan solishtiramiz
-        filter_q &= Q(created_at__lt=end_datetime_aware) 
-            
-    report_orders = orders.filter(filter_q).order_by('-created_at')
-    
-    # ... (Umumiy statistikani hisoblash)
-    
-    # ----------------------------------------------------------------------
-    # 2. Ustalar Ish Faoliyati Hisoboti (worker_finished_at bo'yicha)
-    # ----------------------------------------------------------------------
-    worker_report_orders = Order.objects.filter(
-        status__in=['TAYYOR', 'BAJARILDI']
-    ).filter(
-        worker_finished_at__isnull=False 
-    ).prefetch_related(
-        'assigned_workers__user'
-    ) 
-    
-    worker_filter_q = Q()
-    # Yuqorida tayyorlangan TZ-aware obyektlarni qayta ishlatamiz!
-    if start_datetime_aware:
-        worker_filter_q &= Q(worker_finished_at__gte=start_datetime_aware)
-    if end_datetime_aware:
-        worker_filter_q &= Q(worker_finished_at__lt=end_datetime_aware)
-            
-    worker_report_orders = worker_report_orders.filter(worker_filter_q)
-    
-    # ... (Qolgan loop va kontekst mantig'i)
-    
-    # Kontekstni yangilash
+    worker_report_list = worker_activity_rows(start_date, end_date)
     context = {
-        # ... (boshqa kontekstlar)
+        "title": "Haftalik Hisobot",
+        'daily_rows': daily_rows(start_date, end_date, stages=['ASOSIY']),
+        'order_totals': order_totals(start_date, end_date, stages=['ASOSIY']),
+        'worker_report_list': worker_report_list,
+        'total_finished_kvadrat': sum(row['total_finished_kvadrat'] for row in worker_report_list),
+        'total_order_count': sum(row['total_order_count'] for row in worker_report_list),
         # Template uchun sanalarni string formatida qaytarish
-        'start_date': start_date_str,
-        'end_date': end_date_str,
-        # ...
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
     }
-
     return render(request, 'orders/weekly_report_view.html', context)
 # orders/views.py
 
@@ -1892,51 +1788,33 @@ def material_transaction_create(request):
         
         if form.is_valid():
             try:
-                with transaction.atomic():
-                    transaction_obj = form.save(commit=False)
-                    transaction_obj.performed_by = request.user
-                    
-                    # Materialni olish
-                    material = transaction_obj.material
-                    quantity = transaction_obj.quantity_change
-                    transaction_type = transaction_obj.transaction_type
-                    
-                    # DEBUG
-                    print(f"Material: {material.name} (ID: {material.id})")
-                    print(f"Quantity: {quantity}")
-                    print(f"Type: {transaction_type}")
-                    
-                    # Barcode yaratish
-                    create_barcode = request.POST.get('create_batch_barcode') == 'on'
-                    if transaction_type == 'IN' and create_barcode:
-                        import uuid
-                        new_code = f"P-{uuid.uuid4().hex[:8].upper()}"
-                        transaction_obj.transaction_barcode = new_code
-                    
-                    # Qoldiqni yangilash
-                    if transaction_type == 'IN':
-                        material.quantity += quantity
-                        message_type = "✅ Kirim"
-                    else:  # OUT
-                        if material.quantity < quantity:
-                            raise ValueError(
-                                f"Omborda yetarli qoldiq yo'q! "
-                                f"Mavjud: {material.quantity} {material.unit}, "
-                                f"So'ralgan: {quantity}"
-                            )
-                        material.quantity -= quantity
-                        message_type = "📤 Chiqim"
-                    
-                    material.save()
-                    transaction_obj.save()
-                    
-                    messages.success(request, 
-                        f"{message_type} muvaffaqiyatli bajarildi. "
-                        f"Material: {material.name}, "
-                        f"Yangi qoldiq: {material.quantity} {material.unit}"
+                # Yangi kategoriya (form.save) va qoldiq bitta tranzaksiyada: chiqim rad etilsa
+                # kategoriya ham yaratilmaydi
+                with db_transaction.atomic():
+                    movement = form.save(commit=False)
+                    transaction_type = movement.transaction_type
+                    barcode = None
+                    if transaction_type == 'IN' and form.cleaned_data.get('create_batch_barcode'):
+                        barcode = f"P-{uuid.uuid4().hex[:8].upper()}"
+
+                    # Qoldiq va tranzaksiya yozuvi bitta shartli UPDATE + INSERT bilan (orders.stock)
+                    material = movement.material
+                    record_movement(
+                        material, transaction_type, movement.quantity_change,
+                        received_by=movement.received_by or None,
+                        notes=movement.notes or None,
+                        order=movement.order,
+                        performed_by=request.user,
+                        transaction_barcode=barcode,
                     )
-                    return redirect('material_list')
-                    
+                message_type = "✅ Kirim" if transaction_type == 'IN' else "📤 Chiqim"
+                messages.success(request,
+                    f"{message_type} muvaffaqiyatli bajarildi. "
+                    f"Material: {material.name}, "
+                    f"Yangi qoldiq: {material.quantity} {material.unit}"
+                )
+                return redirect('material_list')
+
             except ValueError as e:
                 messages.error(request, f"⚠️ {str(e)}")
             except Exception as e:
@@ -1949,22 +1827,86 @@ def material_transaction_create(request):
     else:
         form = MaterialTransactionForm()
     
-    # Material ma'lumotlarini JSON formatda yuborish
-    materials = Material.objects.all().select_related('category').order_by('name')
-    material_data = {}
-    
-    for mat in materials:
-        material_data[str(mat.id)] = {
-            'name': mat.name,
-            'quantity': float(mat.quantity),
-            'unit': mat.unit,
-            'category': mat.category.name if mat.category else 'Kategoriyasiz',
-            'product_name': mat.product_name if hasattr(mat, 'product_name') else '',
-        }
-    
+    # Materiallar katalogi sahifaga yozilmaydi: brauzer uni material_catalog_api dan (ETag bilan) oladi
     return render(request, 'orders/material_transaction_create.html', {
         'form': form,
-        'material_data_json': json.dumps(material_data, ensure_ascii=False),
+    })
+
+
+def _catalog_state(request):
+    """(version, reset_version, since): ETag va javob uchun bir so'rovda bir marta o'qiladi."""
+    if not hasattr(request, '_catalog_state'):
+        try:
+            since = int(request.GET['since'])
+        except (KeyError, ValueError):
+            since = None
+        request._catalog_state = (*current_version(), since)
+    return request._catalog_state
+
+
+def _catalog_etag(request):
+    version, _, since = _catalog_state(request)
+    return catalog_etag(version, since)
+
+
+@login_required
+@require_GET
+@condition(etag_func=_catalog_etag)
+def material_catalog_api(request):
+    """
+    Material katalogi (JSON). If-None-Match mos kelsa 304; `?since=N` - faqat
+    N-versiyadan keyin o'zgargan materiallar.
+    """
+    response = JsonResponse(catalog_payload(*_catalog_state(request)))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# ======================== AUTOCOMPLETE (MaterialTransactionForm) ========================
+
+AUTOCOMPLETE_LIMIT = 20
+
+
+@login_required
+@require_GET
+def material_autocomplete_api(request):
+    """Materiallar: nom, QR kod yoki maxsulot kodi boshlanishi bo'yicha (ko'pi bilan `limit` ta)."""
+    q = request.GET.get('q', '').strip()
+    materials = Material.objects.select_related('category').order_by('name')
+    if q:
+        prefix = Material.normalize_code(q)
+        materials = materials.filter(
+            Q(name__istartswith=q) | Q(code__istartswith=q) | Q(product_code__startswith=prefix)
+        )
+    limit = parse_page_size(request.GET.get('limit'), default=AUTOCOMPLETE_LIMIT)
+    field = MaterialTransactionForm.base_fields['material']
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {'id': material.pk, 'text': field.label_from_instance(material), 'unit': material.unit}
+            for material in materials[:limit]
+        ],
+    })
+
+
+@login_required
+@require_GET
+def order_autocomplete_api(request):
+    """Ochiq buyurtmalar (yakunlanmagan, bekor qilinmagan): to'liq matnli indeks bo'yicha prefiks qidiruv."""
+    orders = Order.objects.exclude(status__in=[*CLOSED_STATUSES, 'BEKOR_QILINDI'])
+    orders = search_orders(orders, request.GET.get('q', '')).order_by(*KEYSET_ORDERING)
+    limit = parse_page_size(request.GET.get('limit'), default=AUTOCOMPLETE_LIMIT)
+    rows = orders.only('pk', 'order_number', 'customer_name', 'product_name', 'status')[:limit]
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'id': order.pk,
+                'text': f"№{order.order_number} - {order.customer_name} ({order.product_name})",
+                'status': order.status,
+            }
+            for order in rows
+        ],
     })
 
 
@@ -2246,6 +2188,7 @@ from django.contrib.auth.decorators import login_required
 
 @login_required
 def find_material_by_code_api(request):
+    """Skanerlangan kod bo'yicha material (keshdan); topilmasa yangi material ochiladi."""
     if request.method == 'GET':
         code = request.GET.get('code', '').strip()
         
@@ -2253,65 +2196,66 @@ def find_material_by_code_api(request):
             return JsonResponse({'success': False, 'error': 'Kod kiritilmadi.'}, status=400)
         
         try:
-            # 1. Materialni topishga urinish (product_name orqali)
-            material = Material.objects.get(product_name__iexact=code)
-            is_new = False
-            
-        except Material.DoesNotExist:
-            # 2. Agar topilmasa, uni avtomatik yaratish!
-            try:
-                with db_transaction.atomic():
-                    material = Material.objects.create(
-                        name=f"Yangi Material (Kod: {code})",
-                        product_name=code, # Kodni bu yerga saqlash
-                        unit='dona',
-                        quantity=0, # Boshlang'ich qoldiq
-                        price_per_unit=0
-                        # Agar modelda boshqa majburiy maydonlar bo'lsa, ularni qo'shing (masalan, category_id)
-                    )
-                is_new = True
-            except Exception as create_error:
-                return JsonResponse({
-                    'success': False, 
-                    'error': f"Avtomatik yaratishda xato: {create_error}"
-                }, status=500)
-        
-        # 3. Natijani qaytarish
+            material, is_new = get_or_create_for_code(code)
+        except Exception as create_error:
+            return JsonResponse({
+                'success': False, 
+                'error': f"Avtomatik yaratishda xato: {create_error}"
+            }, status=500)
+        
         return JsonResponse({
             'success': True,
             'material_id': material.id,
             'material_name': material.name,
-            'material_code': material.product_name, # Kod sifatida product_name ni yuborish
+            'material_code': material.product_name or material.code,
             'material_unit': material.unit,
-            'scanned_raw_code': code, # <-- Shu yerda code o'zgaruvchisi yuborilmoqda
-            # ... boshqa maydonlar
+            'scanned_raw_code': code,
             'is_new': is_new
         })
         
     return JsonResponse({'success': False, 'error': 'Faqat GET so\'rovi qabul qilinadi.'}, status=405)
 
+
 @login_required
-@csrf_exempt  # Faqat test uchun
+@user_passes_test(lambda u: u.is_superuser, login_url='/login/')
+def material_lookup_stats_api(request):
+    """Skaner kodlari keshi hisoblagichlari (shu jarayon uchun)."""
+    return JsonResponse({'success': True, 'stats': material_lookup.cache.stats()})
+
+@login_required
+@require_POST
 def save_scanned_transactions_api(request):
-    """API: Skanerlangan tranzaksiyalarni saqlash"""
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            
-            # Bu yerda ma'lumotlarni saqlash logikasi
-            # Misol:
-            # for item in data['items']:
-            #     Transaction.objects.create(...)
-            
-            return JsonResponse({
-                'success': True,
-                'message': f"{len(data.get('items', []))} ta element saqlandi"
-            })
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
+    """
+    API: Skaner paketini saqlash.
+    Kutilgan JSON: {"items": [{"code", "type": "IN"|"OUT", "qty", "client_scan_id", "order_id"}, ...]}
+    Har bir element uchun natija qaytadi; client_scan_id bo'yicha qayta yuborish xavfsiz.
+    """
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'error': "Noto'g'ri JSON."}, status=400)
+
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': "Elementlar ro'yxati bo'sh."}, status=400)
+    if len(items) > MAX_SCAN_BATCH:
+        return JsonResponse({'success': False, 'error': f"Bitta paketda ko'pi bilan {MAX_SCAN_BATCH} ta element."}, status=400)
+
+    results = ingest_scans(items, user=request.user)
+    for result in results:
+        if 'balance' in result:
+            result['balance'] = float(result['balance'])
+    counts = Counter(result['status'] for result in results)
+    return JsonResponse({
+        'success': True,
+        'saved': counts['saved'],
+        'duplicates': counts['duplicate'],
+        'failed': counts['error'],
+        'message': f"{counts['saved']} ta element saqlandi",
+        'results': results,
+    })
+
+
 # orders/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
@@ -2325,8 +2269,21 @@ def add_transaction_view(request):
     if request.method == 'POST':
         form = MaterialTransactionForm(request.POST)
         if form.is_valid():
-            form.save()
-            return redirect('material_list') # Muvaffaqiyatli saqlangandan keyin inventarizatsiya sahifasiga qaytish
+            try:
+                # Chiqim rad etilsa form.save dagi yangi kategoriya ham bekor bo'ladi
+                with db_transaction.atomic():
+                    movement = form.save(commit=False)
+                    record_movement(
+                        movement.material, movement.transaction_type, movement.quantity_change,
+                        received_by=movement.received_by or None,
+                        notes=movement.notes or None,
+                        order=movement.order,
+                        performed_by=request.user if request.user.is_authenticated else None,
+                    )
+            except InsufficientStock as e:
+                form.add_error('quantity_change', str(e))
+            else:
+                return redirect('material_list') # Muvaffaqiyatli saqlangandan keyin inventarizatsiya sahifasiga qaytish
     else:
         form = MaterialTransactionForm()
         
@@ -2358,7 +2315,7 @@ def remove_transaction_view(request):
     
     try:
         material_id = request.POST.get('material_id')
-        quantity = float(request.POST.get('quantity'))
+        quantity = Decimal(request.POST.get('quantity'))
         reason = request.POST.get('reason', 'Chiqim sababi ko\'rsatilmadi')
         
         material = get_object_or_404(Material, pk=material_id)
@@ -2366,30 +2323,21 @@ def remove_transaction_view(request):
         if quantity <= 0:
             return JsonResponse({'success': False, 'error': 'Noto\'g\'ri miqdor kiritildi'}, status=400)
         
-        with transaction.atomic():
-            # Zaxira yetarli yoki yo'qligini tekshirish
-            if material.current_stock < quantity:
-                return JsonResponse({'success': False, 'error': f'Zaxirada yetarli {material.unit} mavjud emas. (Mavjud: {material.current_stock})'}, status=400)
-            
-            # 1. Zaxirani yangilash
-            material.current_stock -= quantity
-            material.save()
-            
-            # 2. Tranzaksiyani yaratish (Chiqim)
-            MaterialTransaction.objects.create(
-                material=material,
-                transaction_type='OUT', # Chiqim
-                quantity=quantity,
-                unit=material.unit,
-                reason=reason,
-                # user=request.user # Agar foydalanuvchi tizimga kirgan bo'lsa
+        # Zaxira tekshiruvi va ayirish bitta shartli UPDATE da (orders.stock)
+        try:
+            _, balance = record_movement(
+                material, 'OUT', quantity,
+                notes=reason,
+                performed_by=request.user if request.user.is_authenticated else None,
             )
+        except InsufficientStock as e:
+            return JsonResponse({'success': False, 'error': f'Zaxirada yetarli {material.unit} mavjud emas. (Mavjud: {e.available})'}, status=400)
         
-        return JsonResponse({'success': True, 'message': 'Chiqim muvaffaqiyatli amalga oshirildi.'})
+        return JsonResponse({'success': True, 'message': 'Chiqim muvaffaqiyatli amalga oshirildi.', 'quantity': float(balance)})
         
     except Material.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Material topilmadi.'}, status=404)
-    except ValueError:
+    except (ValueError, TypeError, InvalidOperation):
         return JsonResponse({'success': False, 'error': 'Miqdor noto\'g\'ri formatda.'}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'error': f'Kutilmagan xato: {str(e)}'}, status=500)
@@ -2403,15 +2351,8 @@ def material_transaction_delete(request, pk):
     
     if request.method == 'POST':
         try:
-            # Qaytarish logikasi (agar kerak bo'lsa)
-            material = transaction.material
-            if transaction.transaction_type == 'IN':
-                material.quantity -= transaction.quantity_change
-            else:  # OUT
-                material.quantity += transaction.quantity_change
-            
-            material.save()
-            transaction.delete()
+            # Qoldiqni qaytarish va yozuvni o'chirish bitta tranzaksiyada (orders.stock)
+            reverse_movement(transaction)
             
             messages.success(request, "✅ Tranzaksiya muvaffaqiyatli o'chirildi.")
             return redirect('material_transaction_list')
@@ -2424,27 +2365,6 @@ def material_transaction_delete(request, pk):
     }
     
     return render(request, 'orders/material_transaction_confirm_delete.html', context)
-def get_material_data():
-    """
-    Material ma'lumotlarini JSON uchun tayyorlash
-    """
-    material_objects = Material.objects.all().select_related('category').values(
-        'id', 'name', 'unit', 'quantity', 'category__name'
-    )
-    
-    material_data = {
-        str(m['id']): {
-            'name': m['name'], 
-            'unit': m['unit'], 
-            'quantity': float(m['quantity']) if m['quantity'] is not None else 0,
-            'category': m['category__name'] if m['category__name'] else 'Kategoriyasiz'
-        } 
-        for m in material_objects
-    }
-    
-    return material_data
-
-
 # orders/views.py
 
 
@@ -2539,43 +2459,20 @@ from django.db.models import Sum, Count, F, Q
 
 @login_required
 def worker_activity_report_view(request):
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
-
-    # 1. Archive dagi kabi statuslar
-    archive_statuses = ['BAJARILDI', 'USTA_TUGATDI', 'TAYYOR']
-    
-    # 2. Barcha buyurtmalar (Asosiy va ichki)
-    # Xuddi Archive dagi kabi filtrlaymiz
-    orders = Order.objects.filter(status__in=archive_statuses)
-
-    # 3. Sana bo'yicha filtr (Agar sana tanlangan bo'lsa)
-    if start_date:
-        orders = orders.filter(worker_finished_at__date__gte=start_date)
-    if end_date:
-        orders = orders.filter(worker_finished_at__date__lte=end_date)
-
-    # 4. Ustalar bo'yicha guruhlash
-    # Har bir orderning 'assigned_workers' maydonidan foydalanamiz
-    worker_report_list = orders.values(
-        'assigned_workers__id'
-    ).annotate(
-        first_name=F('assigned_workers__user__first_name'),
-        last_name=F('assigned_workers__user__last_name'),
-        username=F('assigned_workers__user__username'),
-        total_order_count=Count('id'),
-        total_finished_kvadrat=Sum('panel_kvadrat')
-    ).filter(assigned_workers__id__isnull=False).order_by('-total_finished_kvadrat')
-
-    # 5. Jami summa
-    total_kv = orders.aggregate(Sum('panel_kvadrat'))['panel_kvadrat__sum'] or 0
+    """
+    Ustalar bo'yicha bajarilgan ishlar (ARCHIVE_STATUSES, worker_finished_at
+    sanasi bo'yicha). Order/assigned_workers birikmasi o'rniga WorkerDailyStats dan.
+    """
+    start_date, end_date = report_date_range(request)
 
+    worker_report_list = worker_activity_rows(start_date, end_date)
     context = {
         "title": "Ustalar Ish Faoliyati Hisoboti",
         'worker_report_list': worker_report_list,
-        'total_finished_kvadrat': total_kv,
-        'start_date': start_date,
-        'end_date': end_date,
+        'total_finished_kvadrat': sum(row['total_finished_kvadrat'] for row in worker_report_list),
+        'total_order_count': sum(row['total_order_count'] for row in worker_report_list),
+        'start_date': start_date.strftime('%Y-%m-%d') if start_date else '',
+        'end_date': end_date.strftime('%Y-%m-%d') if end_date else '',
     }
     return render(request, 'orders/weekly_report_view.html', context)
 
@@ -2585,106 +2482,81 @@ def export_worker_activity_csv(request):
     """
     Ustalarning ish faoliyati hisobotini CSV fayl shaklida eksport qiladi.
     """
-    # 1. CSV javobini tayyorlash
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="usta_faoliyat_hisoboti_{datetime.now().strftime("%Y-%m-%d")}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Jadval sarlavhalari
-    writer.writerow([
-        'T/r', 
-        'Usta F.I.Sh.', 
-        'Bajarilgan Kvadratura (m²)', 
-        'Bajarilgan Buyurtmalar Soni'
-    ])
-
-    # 2. Filtrlash shartlarini yaratish
-    start_date_str = request.GET.get('start_date')
-    end_date_str = request.GET.get('end_date')
-    
-    # ✅ Xato tuzatildi: Statusni to'g'ri string qiymati bilan filtrlash
-    worker_filter_q = Q(status='FINISHED') 
-    
-    start_date = None
-    end_date = None
-
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            worker_filter_q &= Q(updated_at__date__gte=start_date)
-        except ValueError:
-            pass 
-
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            worker_filter_q &= Q(updated_at__date__lte=end_date)
-        except ValueError:
-            pass
-
-    # 3. Hisobot ma'lumotlarini olish
-    worker_report_list = Order.objects.filter(worker_filter_q).exclude(assigned_workers__isnull=True).values(
-        'assigned_workers__user__first_name',
-        'assigned_workers__user__last_name'
-    ).annotate(
-    total_finished_kvadrat=Sum('panel_kvadrat', default=0), 
-    total_order_count=Count('id')
-
-    ).order_by('assigned_workers__user__first_name')
-    
-    # 4. CSV ga ma'lumotlarni yozish
-    for i, worker in enumerate(worker_report_list):
-        writer.writerow([
-            i + 1,
-            f"{worker['assigned_workers__user__first_name']} {worker['assigned_workers__user__last_name']}",
-            f"{worker['total_finished_kvadrat']:.2f}",
-            worker['total_order_count']
-        ])
-        
-    return response
+    # Hisobot ma'lumotlari (sahifadagi hisobot bilan bir xil manba - WorkerDailyStats)
+    start_date, end_date = report_date_range(request)
+    worker_report_list = worker_activity_rows(start_date, end_date)
+
+    def rows():
+        for i, worker in enumerate(worker_report_list, 1):
+            yield [
+                i,
+                f"{worker['first_name']} {worker['last_name']}".strip() or worker['username'],
+                f"{worker['total_finished_kvadrat']:.2f}",
+                worker['total_order_count'],
+            ]
+
+    return stream_csv(
+        f"usta_faoliyat_hisoboti_{timezone.localdate():%Y-%m-%d}.csv",
+        ['T/r', 'Usta F.I.Sh.', 'Bajarilgan Kvadratura (m²)', 'Bajarilgan Buyurtmalar Soni'],
+        rows(),
+        delimiter=',',
+    )
 
 @login_required
 @user_passes_test(lambda u: u.is_superuser or is_in_group(u, 'Glavniy Admin'), login_url='/login/')
 def export_orders_csv(request):
-    """Buyurtmalarni CSV formatida eksport qilish (oxirgi 7 kunlik)."""
+    """
+    Buyurtmalarni CSV formatida eksport qilish. start_date / end_date (YYYY-MM-DD)
+    berilmasa - oxirgi 7 kunlik. Fayl oqim bilan yuboriladi.
+    """
     # Kuzatuvchi tekshiruvi
     if is_observer(request.user):
         messages.error(request, "Kuzatuvchi rejimida bu amalni bajarish mumkin emas.")
         return redirect('order_list')
-        
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="EcoProm_Buyurtmalar_Hisboti_7kunlik.csv"'
 
-    writer = csv.writer(response, delimiter=';') 
+    start_date, end_date = report_date_range(request, default_days=7)
 
-    writer.writerow([
-        "Buyurtma Raqami", 
-        "Xaridor Nomi", 
-        "Kvadrat (m²)", 
-        "Summa (so'm)", 
-        "Status", 
-        "Kiritilgan Sana",
-        "Kiritgan Xodim"
-    ])
+    orders = (
+        Order.objects.filter(date_range_q(start_date, end_date))
+        .select_related('created_by')
+        .only(
+            'order_number', 'customer_name', 'panel_kvadrat', 'total_price', 'status', 'created_at',
+            'created_by', 'created_by__first_name', 'created_by__last_name', 'created_by__username',
+        )
+        .order_by('-created_at')
+    )
 
-    seven_days_ago = date.today() - timedelta(days=7)
-    orders = Order.objects.filter(
-        created_at__gte=seven_days_ago
-    ).order_by('-created_at')
+    def rows():
+        for order in orders.iterator(chunk_size=CSV_CHUNK_SIZE):
+            yield [
+                order.order_number,
+                order.customer_name,
+                order.panel_kvadrat,
+                order.total_price,
+                order.get_status_display(),
+                timezone.localtime(order.created_at).strftime("%Y-%m-%d %H:%M"),
+                order.created_by.get_full_name() if order.created_by else "Noma'lum",
+            ]
+
+    return stream_csv(
+        f"EcoProm_Buyurtmalar_{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}.csv",
+        [
+            "Buyurtma Raqami",
+            "Xaridor Nomi",
+            "Kvadrat (m²)",
+            "Summa (so'm)",
+            "Status",
+            "Kiritilgan Sana",
+            "Kiritgan Xodim",
+        ],
+        rows(),
+    )
 
-    for order in orders:
-        writer.writerow([
-            order.order_number,
-            order.customer_name,
-            order.panel_kvadrat,
-            order.total_price,
-            order.get_status_display(),
-            order.created_at.strftime("%Y-%m-%d %H:%M"),
-            order.created_by.get_full_name() if order.created_by else "Noma'lum", 
-        ])
+# Sotuv hisobotidagi jadvalda ko'rsatiladigan buyurtmalar soni (jami ko'rsatkichlar barcha buyurtmalar bo'yicha)
+REPORT_ORDER_LIMIT = 200
+# Jurnal sahifasidagi yozuvlar soni
+AUDIT_PAGE_SIZE = 50
 
-    return response
 
 @login_required
 @user_passes_test(is_report_viewer_or_observer, login_url='/login/')
@@ -2708,40 +2580,38 @@ def sales_report_view(request):
         start_date = today - timedelta(days=30)
         end_date = today
 
-    # 🔴 Asosiy buyurtmalar
-    main_orders = Order.objects.filter(
-        parent_order__isnull=True,  # Faqat asosiy buyurtmalar
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-    ).order_by('-created_at')
+    # Jami ko'rsatkichlar kunlik yig'ma jadvaldan (oraliq uzunligidan qat'i nazar bir necha yuz qator)
+    main_totals = order_totals(start_date, end_date, stages=['ASOSIY'])
+    child_totals = order_totals(start_date, end_date, stages=Order.CHILD_STAGES)
 
-    # 🔴 Child buyurtmalar (alohida)
-    child_orders = Order.objects.filter(
-        parent_order__isnull=False,  # Faqat child buyurtmalar
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-    ).order_by('-created_at')
+    # 🔴 Asosiy buyurtmalar: jadvalda faqat oxirgilari (stage, created_at indeksi bo'yicha)
+    main_orders = list(
+        Order.objects.filter(MAIN_Q, date_range_q(start_date, end_date))
+        .annotate(child_count=Count('sub_orders'))
+        .order_by('-created_at')[:REPORT_ORDER_LIMIT]
+    )
 
-    # 🔴 Barcha buyurtmalar (umumiy ko'rish uchun)
-    all_orders = Order.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-    ).order_by('-created_at')
+    # 🔴 Child buyurtmalar (alohida, oxirgi 5 tasi)
+    child_orders = list(
+        Order.objects.filter(CHILD_Q, date_range_q(start_date, end_date))
+        .select_related('parent_order')
+        .order_by('-created_at')[:5]
+    )
 
-    total_orders_count = main_orders.count()
-    total_square = main_orders.aggregate(Sum('panel_kvadrat'))['panel_kvadrat__sum'] or 0
-    total_revenue = main_orders.aggregate(Sum('total_price'))['total_price__sum'] or 0
+    total_orders_count = main_totals['order_count']
 
     context = {
         "title": "Sotuv Hisoboti (Vaqt Oralig'i)",
         'report_orders': main_orders,  # 🔴 Faqat asosiylar ko'rsatiladi
+        'report_orders_truncated': total_orders_count > len(main_orders),
         'child_orders': child_orders,  # 🔴 Child buyurtmalar (alohida)
-        'all_orders': all_orders,  # 🔴 Barcha buyurtmalar
+        'child_orders_count': child_totals['order_count'],
         'start_date': start_date.strftime('%Y-%m-%d'),
         'end_date': end_date.strftime('%Y-%m-%d'),
         'total_orders_count': total_orders_count,
-        'total_square': total_square,
-        'total_revenue': total_revenue,
+        'total_square': main_totals['kvadrat_sum'],
+        'total_revenue': main_totals['revenue_sum'],
+        'total_prepayment': main_totals['prepayment_sum'],
         'is_glavniy_admin': True,
         'today': timezone.now().date(),
         'is_observer': is_observer(request.user),
@@ -2750,99 +2620,97 @@ def sales_report_view(request):
 
 
 
+def audit_log_filters(request):
+    """Jurnal sahifasi, "Yana yuklash" va CSV eksport uchun umumiy GET filtrlari."""
+    start_date, end_date = report_date_range(request)
+    return {
+        'q': request.GET.get('q', ''),
+        'action': request.GET.get('action', ''),
+        'status': request.GET.get('status', ''),
+        'actor': request.GET.get('actor', ''),
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser or is_in_group(u, 'Glavniy Admin'), login_url='/login/')
 def product_audit_log_view(request):
-    """Mahsulot/Buyurtma o'zgarishlari jurnalini ko'rish funksiyasi."""
+    """
+    Buyurtmalar jurnali (OrderAuditEvent): birinchi sahifa, qolgani "Yana yuklash"
+    orqali. Sahifadagi qatorlar sonidan qat'i nazar so'rovlar soni o'zgarmas.
+    """
     # Kuzatuvchi tekshiruvi
     if is_observer(request.user):
         messages.error(request, "Kuzatuvchi rejimida bu amalni bajarish mumkin emas.")
         return redirect('order_list')
-        
-    try:
-        order_content_type = ContentType.objects.get(app_label='orders', model='order')
-        
-        log_entries = LogEntry.objects.filter(
-            content_type=order_content_type
-        ).select_related('user').order_by('-action_time')
-        
-        for log in log_entries:
-            try:
-                log.related_object_name = Order.objects.get(pk=log.object_id).order_number
-            except Order.DoesNotExist:
-                log.related_object_name = log.object_repr
-    except ContentType.DoesNotExist:
-        log_entries = []
-        messages.error(request, "Buyurtma (Order) modeli uchun ContentType topilmadi. `LogEntry` filtrlanmaydi.")
-    
 
+    filters = audit_log_filters(request)
     context = {
         "title": "Mahsulot O'zgarishlari Jurnali (Audit Log)",
-        'log_entries': log_entries,
+        'events': keyset_paginate(filter_events(filters), page_size=parse_page_size(request.GET.get('limit'), AUDIT_PAGE_SIZE)),
+        'filters': filters,
+        'action_choices': OrderAuditEvent.ACTION_CHOICES,
+        'status_choices': Order.STATUS_CHOICES,
         'is_glavniy_admin': True,
-        'is_observer': False, 
+        'is_observer': False,
     }
-    
     return render(request, 'orders/product_audit_log.html', context)
 
+
+@login_required
+@user_passes_test(lambda u: u.is_superuser or is_in_group(u, 'Glavniy Admin'), login_url='/login/')
+def product_audit_log_more(request):
+    """Jurnalning keyingi sahifasi (kursor bo'yicha), HTML qatorlar bilan."""
+    page = keyset_paginate(
+        filter_events(audit_log_filters(request)),
+        request.GET.get('cursor'),
+        parse_page_size(request.GET.get('limit'), AUDIT_PAGE_SIZE),
+    )
+    html = render_to_string('orders/partials/audit_rows.html', {'events': page.rows}, request=request)
+    return JsonResponse({'success': True, 'html': html, 'next_cursor': page.next_cursor})
+
+
 @login_required
 @user_passes_test(lambda u: u.is_superuser or is_in_group(u, 'Glavniy Admin'), login_url='/login/')
 def export_audit_log_csv(request):
-    """Audit Log yozuvlarini CSV formatida eksport qilish."""
+    """
+    Jurnal yozuvlarini CSV formatida eksport qilish (sahifadagi filtrlar bilan).
+    Foydalanuvchilar select_related orqali olinadi: qator uchun qo'shimcha so'rov yo'q.
+    """
     # Kuzatuvchi tekshiruvi
     if is_observer(request.user):
         messages.error(request, "Kuzatuvchi rejimida bu amalni bajarish mumkin emas.")
         return redirect('order_list')
-        
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="EcoProm_Audit_Log_Hisoboti.csv"'
-
-    writer = csv.writer(response, delimiter=';') 
 
-    writer.writerow([
-        "Harakat Vaqti", 
-        "Foydalanuvchi", 
-        "Harakat Turi", 
-        "Buyurtma Raqami/Obyekt", 
-        "O'zgarish Tafsiloti (Change Message)"
-    ])
-
-    try:
-        order_content_type = ContentType.objects.get(app_label='orders', model='order')
-        log_entries = LogEntry.objects.filter(
-            content_type=order_content_type
-        ).select_related('user').order_by('-action_time')
-    except ContentType.DoesNotExist:
-        messages.error(request, "Buyurtma (Order) modeli ContentType topilmadi. Eksport qilish bekor qilindi.")
-        return redirect('product_audit_log_view') 
-
-    def get_action_type(flag):
-        if flag == ADDITION:
-            return 'Yaratildi (ADDITION)'
-        elif flag == CHANGE:
-            return 'Tahrirlandi (CHANGE)'
-        elif flag == DELETION:
-            return 'Oʻchirildi (DELETION)'
-        return 'Nomaʼlum'
-
-    for log in log_entries:
-        
-        object_identifier = ''
-        try:
-            object_identifier = Order.objects.get(pk=log.object_id).order_number
-        except Order.DoesNotExist:
-            object_identifier = f"O'chirilgan obyekti (ID: {log.object_id})"
-
-        
-        writer.writerow([
-            log.action_time.strftime("%Y-%m-%d %H:%M:%S"),
-            log.user.get_full_name() or log.user.username,
-            get_action_type(log.action_flag),
-            object_identifier,
-            log.change_message.replace('\r\n', ' ').replace('\n', ' ') 
-        ])
-
-    return response
+    events = filter_events(audit_log_filters(request)).order_by(*KEYSET_ORDERING)
+
+    def rows():
+        for event in events.iterator(chunk_size=CSV_CHUNK_SIZE):
+            actor = event.actor
+            yield [
+                timezone.localtime(event.created_at).strftime("%Y-%m-%d %H:%M:%S"),
+                (actor.get_full_name() or actor.username) if actor else 'Tizim',
+                event.get_action_display(),
+                event.order_number or f"O'chirilgan obyekt (ID: {event.order_id})",
+                event.from_status_display,
+                event.to_status_display,
+                event.message.replace('\r\n', ' ').replace('\n', ' '),
+            ]
+
+    return stream_csv(
+        "EcoProm_Audit_Log_Hisoboti.csv",
+        [
+            "Harakat Vaqti",
+            "Foydalanuvchi",
+            "Harakat Turi",
+            "Buyurtma Raqami",
+            "Oldingi Status",
+            "Yangi Status",
+            "Izoh",
+        ],
+        rows(),
+    )
 
 from django.db.models import F
 
@@ -2977,11 +2845,12 @@ def customer_rating(request):
     # ======================== 1. AJAX SO'ROVLAR ========================
     customer_id = request.GET.get('get_orders')
     if customer_id:
+        # Buyurtmalar (customer_unique_id, created_at) indeksi bo'yicha, yig'indi esa CustomerStats dan
         orders = Order.objects.filter(
-            customer_unique_id=customer_id, 
-            parent_order__isnull=True
+            customer_unique_id=customer_id,
+            stage='ASOSIY',
         ).order_by('-created_at')
-        
+
         orders_list = [{
             'order_number': o.order_number,
             'product_name': o.product_name or "Eshik/Mebel",
@@ -2991,110 +2860,79 @@ def customer_rating(request):
             'prepayment': float(o.prepayment or 0),
             'created_at': o.created_at.strftime('%Y-%m-%d %H:%M') if o.created_at else '',
         } for o in orders]
-        
-        customer_stats = orders.aggregate(
-            total_orders=Count('id'),
-            total_amount=Coalesce(Sum('total_price'), Value(0, output_field=DecimalField())),
-            total_paid=Coalesce(Sum('prepayment'), Value(0, output_field=DecimalField())),
-            total_area=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
-            avg_order_value=Coalesce(Avg('total_price'), Value(0, output_field=DecimalField()))
-        )
-        
+
         return JsonResponse({
             'orders': orders_list,
-            'stats': customer_stats,
+            'stats': customer_summary(customer_id),
             'customer_id': customer_id
         })
 
-    # ======================== 2. MIJOZLAR REYTINGI (Annotate) ========================
-    ratings_query = Order.objects.filter(parent_order__isnull=True).values('customer_unique_id').annotate(
-        display_name=Max('customer_name'),
-        order_count=Count('id'),
-        first_order_date=Min('created_at'),
-        last_order_date=Max('created_at'),
-        total_m2=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
-        total_billed=Coalesce(Sum('total_price'), Value(0, output_field=DecimalField())),
-        total_paid=Coalesce(Sum('prepayment'), Value(0, output_field=DecimalField())),
-    ).annotate(
-        payment_ratio=Case(
-            When(total_billed__gt=0, then=100.0 * F('total_paid') / F('total_billed')),
-            default=Value(0.0),
-            output_field=FloatField()
-        ),
-        avg_order_value=ExpressionWrapper(F('total_billed') / F('order_count'), output_field=DecimalField())
-    ).annotate(
-        loyalty_score=Case(
-            When(Q(order_count__gt=5) & Q(payment_ratio__gt=80), then=Value('A')),
-            When(Q(order_count__gt=2) & Q(payment_ratio__gt=60), then=Value('B')),
-            default=Value('C'),
-            output_field=CharField()
-        )
-    )
-
-    m2_ratings = list(ratings_query.order_by('-total_m2')[:15])
-    sum_ratings = list(ratings_query.order_by('-total_paid')[:15])
-    order_count_ratings = list(ratings_query.order_by('-order_count')[:10])
-    loyal_customers = list(ratings_query.filter(loyalty_score='A').order_by('-total_paid')[:10])
+    # ======================== 2. MIJOZLAR REYTINGI (CustomerStats) ========================
+    # Har bir ro'yxat indekslangan ustun bo'yicha TOP-N: Order jadvali guruhlanmaydi
+    m2_ratings = list(CustomerStats.objects.order_by('-total_m2')[:15])
+    sum_ratings = list(CustomerStats.objects.order_by('-total_paid')[:15])
+    order_count_ratings = list(CustomerStats.objects.order_by('-order_count')[:10])
+    loyal_customers = list(CustomerStats.objects.filter(loyalty_score='A').order_by('-total_paid')[:10])
 
     # ======================== 3. UMUMIY STATISTIKA ========================
-    base_aggregate = Order.objects.filter(parent_order__isnull=True).aggregate(
-        total_orders=Count('id'),
-        total_customers=Count('customer_unique_id', distinct=True),
-        total_revenue=Coalesce(Sum('total_price'), Value(0, output_field=DecimalField())),
-        total_prepayment=Coalesce(Sum('prepayment'), Value(0, output_field=DecimalField())),
-        total_area=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
-        avg_order_value=Coalesce(Avg('total_price'), Value(0, output_field=DecimalField())),
+    overall_stats = CustomerStats.objects.aggregate(
+        total_orders=Coalesce(Sum('order_count'), 0),
+        total_customers=Count('customer_unique_id'),
+        total_revenue=Coalesce(Sum('total_billed'), Value(0, output_field=DecimalField())),
+        total_prepayment=Coalesce(Sum('total_paid'), Value(0, output_field=DecimalField())),
+        total_area=Coalesce(Sum('total_m2'), Value(0, output_field=DecimalField())),
     )
-
-    overall_stats = base_aggregate
+    total_orders = overall_stats['total_orders']
+    overall_stats['avg_order_value'] = overall_stats['total_revenue'] / total_orders if total_orders else 0
     if overall_stats['total_revenue'] > 0:
         overall_stats['avg_prepayment_ratio'] = (float(overall_stats['total_prepayment']) * 100) / float(overall_stats['total_revenue'])
     else:
         overall_stats['avg_prepayment_ratio'] = 0
 
-    completed_orders = Order.objects.filter(parent_order__isnull=True, status__in=['completed', 'delivered']).count()
-    overall_stats['completion_rate'] = (completed_orders * 100 / overall_stats['total_orders']) if overall_stats['total_orders'] > 0 else 0
+    completed_orders = order_totals(stages=['ASOSIY'], statuses=COMPLETED_STATUSES)['order_count']
+    overall_stats['completion_rate'] = (completed_orders * 100 / total_orders) if total_orders > 0 else 0
 
     # ======================== 4. PANEL QALINLIGI STATISTIKASI ========================
-    thickness_stat = Order.objects.filter(
-        parent_order__isnull=True
-    ).exclude(
-        Q(panel_thickness__isnull=True) | Q(panel_thickness='')
-    ).values('panel_thickness').annotate(
-        count=Count('id'),
-        total_area=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
-        eshik_types=Count('product_name', distinct=True)
+    # 4-6 bo'limlar kunlik yig'ma jadvaldan (OrderDailyStats): Order jadvali guruhlanmaydi
+    main_stats = OrderDailyStats.objects.filter(stage='ASOSIY', order_count__gt=0)
+    thickness_stat = main_stats.exclude(panel_thickness='').values('panel_thickness').annotate(
+        count=Sum('order_count'),
+        total_area=Coalesce(Sum('kvadrat_sum'), Value(0, output_field=DecimalField())),
+        # Shu qalinlikdagi panel turlari soni
+        eshik_types=Count('panel_type', distinct=True),
     ).order_by('panel_thickness')
 
-  # ... (oldingi hisob-kitoblar) ...
-
     # ======================== 5. PIR PANELLAR TAHLILI ========================
-    pir_all = Order.objects.filter(panel_type__icontains='PIR')
-    
-    pir_stats = pir_all.values('panel_type').annotate(
-        count=Count('id'),
-        total_m2=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
-        total_revenue=Coalesce(Sum('total_price'), Value(0, output_field=DecimalField()))
-    ).order_by('-total_m2')
-
-    pir_details = {
-        'total_pir': pir_all.count(),
-        'total_area': pir_all.aggregate(s=Sum('panel_kvadrat'))['s'] or 0,
-        'tom_panels': pir_all.filter(Q(panel_subtype__icontains='TOM') | Q(product_name__icontains='TOM')).count(),
-        'secret_panels': pir_all.filter(Q(panel_subtype__icontains='SECRET') | Q(product_name__icontains='SECRET')).count(),
-        'sovut_panels': pir_all.filter(Q(panel_subtype__icontains='SOVUT') | Q(product_name__icontains='SOVUT')).count(),
-    }
+    # Turlar bo'yicha yig'indi va kichik turlar soni bitta jadvaldan
+    pir_rows = OrderDailyStats.objects.filter(panel_type__icontains='PIR')
+    pir_stats = list(
+        pir_rows
+        .values('panel_type')
+        .annotate(
+            count=Sum('order_count'),
+            total_m2=Sum('kvadrat_sum'),
+            total_revenue=Sum('revenue_sum'),
+        )
+        .filter(count__gt=0)
+        .order_by('-total_m2')
+    )
+
+    pir_details = pir_rows.aggregate(
+        tom_panels=Coalesce(Sum('order_count', filter=Q(panel_subtype='TOM')), 0),
+        secret_panels=Coalesce(Sum('order_count', filter=Q(panel_subtype='SECRETPIR')), 0),
+        sovut_panels=Coalesce(Sum('order_count', filter=Q(panel_subtype='SOVUTGICH')), 0),
+    )
+    pir_details['total_pir'] = sum(row['count'] for row in pir_stats)
+    pir_details['total_area'] = sum(row['total_m2'] for row in pir_stats)
 
     # ======================== 6. ESHIKLAR TAHLILI ========================
-    eshik_stat = Order.objects.filter(parent_order__isnull=True).exclude(
-        Q(eshik_turi__isnull=True) | Q(eshik_turi='')
-    ).values('eshik_turi').annotate(
-        eshik_soni=Count('id'),
-        total_revenue=Sum('total_price')
+    eshik_stat = main_stats.exclude(eshik_turi='').values('eshik_turi').annotate(
+        eshik_soni=Sum('order_count'),
+        total_revenue=Sum('revenue_sum'),
     ).order_by('-eshik_soni')
 
     # ======================== 7. MASHHUR MAHSULOTLAR ========================
-    product_rankings = Order.objects.filter(parent_order__isnull=True).values('product_name').annotate(
+    product_rankings = Order.objects.filter(stage='ASOSIY').values('product_name').annotate(
         order_count=Count('id'),
         total_m2=Coalesce(Sum('panel_kvadrat'), Value(0, output_field=DecimalField())),
         total_revenue=Coalesce(Sum('total_price'), Value(0, output_field=DecimalField()))
@@ -3119,8 +2957,8 @@ def customer_rating(request):
         'pir_details': pir_details,  # <--- BU ENDI O'CHIB KETMAYDI
         'eshik_stat': list(eshik_stat),
         'json_data': {
-            'm2_ratings': json.dumps(list(m2_ratings), default=str),
-            'sum_ratings': json.dumps(list(sum_ratings), default=str),
+            'm2_ratings': json.dumps([rating_row(stats) for stats in m2_ratings], default=str),
+            'sum_ratings': json.dumps([rating_row(stats) for stats in sum_ratings], default=str),
         }
     }
 
@@ -3130,11 +2968,12 @@ from django.contrib.auth.decorators import login_required
 
 @login_required
 def get_customer_orders(request, customer_id):
-    orders = Order.objects.filter(customer_unique_id=customer_id).values(
+    # CustomerStats faqat asosiy buyurtmalardan yig'iladi - ro'yxat ham shunga mos
+    orders = Order.objects.filter(customer_unique_id=customer_id, stage='ASOSIY').values(
         'order_number', 'product_name', 'panel_kvadrat', 'status', 'created_at'
     ).order_by('-created_at')
-    
-    return JsonResponse({'orders': list(orders)})
+
+    return JsonResponse({'orders': list(orders), 'stats': customer_summary(customer_id)})
 
 
 